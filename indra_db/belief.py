@@ -112,7 +112,8 @@ def load_mock_statements(db, hashes=None, sup_links=None):
                              db.RawUniqueLinks.raw_stmt_id],
                             *db.link(db.Reading, db.RawUniqueLinks))
     if hashes is not None:
-        q_rdg = q_rdg.filter(db.RawUniqueLinks.pa_stmt_mk_hash.in_(hashes))
+        q_rdg = q_rdg.filter(dbu.in_values(db.RawUniqueLinks.pa_stmt_mk_hash,
+                                           hashes))
     res_rdg = q_rdg.all()
 
     for src_api, mk_hash, sid in res_rdg:
@@ -125,7 +126,8 @@ def load_mock_statements(db, hashes=None, sup_links=None):
                              db.RawUniqueLinks.raw_stmt_id],
                             *db.link(db.DBInfo, db.RawUniqueLinks))
     if hashes is not None:
-        q_dbs = q_dbs.filter(db.RawUniqueLinks.pa_stmt_mk_hash.in_(hashes))
+        q_dbs = q_dbs.filter(dbu.in_values(db.RawUniqueLinks.pa_stmt_mk_hash,
+                                           hashes))
     res_dbs = q_dbs.all()
 
     for src_api, db_name, mk_hash, sid in res_dbs:
@@ -141,7 +143,7 @@ def load_mock_statements(db, hashes=None, sup_links=None):
             # then adding another constraint would have no effect (but to slow
             # down the query). Otherwise this is a bit arbitrary.
             sup_link_q = sup_link_q.filter(
-                db.PASupportLinks.supported_mk_hash.in_(hashes)
+                dbu.in_values(db.PASupportLinks.supported_mk_hash, hashes)
             )
         sup_links = sup_link_q.all()
 
@@ -1,4 +1,5 @@
-__all__ = ['submit_curation', 'get_curations', 'get_grounding_curations']
+__all__ = ['submit_curation', 'get_curations', 'get_grounding_curations',
+           'get_curation_counts', 'rebuild_curation_counts']
 
 import re
 import logging
@@ -6,8 +7,9 @@ import datetime
 from collections import Counter
 
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert
 
-from indra_db.util import get_primary_db
+from indra_db.util import get_primary_db, in_values
 from indra_db.exceptions import BadHashError
 
 logger = logging.getLogger(__name__)
@@ -47,9 +49,17 @@ def submit_curation(hash_val, tag, curator, ip, text=None,
 
     logger.info("Adding curation: %s" % str(inp))
 
+    # Add the curation and count it in one transaction, so the count cannot
+    # drift from the curations.
+    db.grab_session()
     try:
-        dbid = db.insert(db.Curation, **inp)
+        curation = db.Curation(**inp)
+        db.session.add(curation)
+        db.session.flush()
+        dbid = curation.id
+        _increment_curation_count(db, hash_val, ev_hash)
     except IntegrityError as e:
+        db.session.rollback()
         logger.error("Got a bad entry.")
         msg = e.args[0]
         detail_line = msg.splitlines()[1]
@@ -63,9 +73,81 @@ def submit_curation(hash_val, tag, curator, ip, text=None,
                 "Erred hash %s does not match input hash %s." % (h, hash_val)
             logger.error("Bad hash: %s" % h)
             raise BadHashError(h)
+    except Exception:
+        db.session.rollback()
+        raise
+    db.commit("Failed to add curation of %s." % hash_val)
     return dbid
 
 
+def _increment_curation_count(db, pa_hash, source_hash):
+    """Add one to the running count of curations for a pa/source hash.
+
+    The change is made in the session, and is not committed.
+    """
+    cc = db.CurationCounts
+    source_hash = 0 if source_hash is None else source_hash
+    upsert = (insert(cc.__table__)
+              .values(pa_hash=pa_hash, source_hash=source_hash,
+                      num_curations=1)
+              .on_conflict_do_update(
+                  constraint='curation_count_uniqueness',
+                  set_={'num_curations': cc.__table__.c.num_curations + 1}
+              ))
+    db.session.execute(upsert)
+    return
+
+
+def get_curation_counts(hashes, db=None):
+    """Get the number of curations for each evidence of the given statements.
+
+    Parameters
+    ----------
+    hashes : iterable[int]
+        The pa_hashes (mk_hashes) of the statements of interest.
+    db : Optional[DatabaseManager]
+        A database manager object used to access the database. If not given,
+        the database configured as primary is used.
+
+    Returns
+    -------
+    dict
+        A dict keyed by pa_hash, whose values are dicts of curation counts
+        keyed by source_hash. Curations of the statement as a whole are keyed
+        by None. Statements with no curations are not included.
+    """
+    if db is None:
+        db = get_primary_db()
+    cc = db.CurationCounts
+
+    hashes = {int(h) for h in hashes}
+    if not hashes:
+        return {}
+
+    res = db.select_all([cc.pa_hash, cc.source_hash, cc.num_curations],
+                        in_values(cc.pa_hash, hashes))
+    counts = {}
+    for pa_hash, source_hash, num in res:
+        if source_hash == 0:
+            source_hash = None
+        counts.setdefault(pa_hash, {})[source_hash] = num
+    return counts
+
+
+def rebuild_curation_counts(db=None):
+    """Recompute the curation_counts table from the curation table.
+
+    The table is filled this way when it is created (see
+    `DatabaseManager.create_tables`), so this is only needed to fix it if
+    curations were added or removed without going through `submit_curation`.
+    """
+    if db is None:
+        db = get_primary_db()
+    db.CurationCounts.rebuild(db)
+    db.commit("Failed to rebuild the curation counts.")
+    return
+
+
 def get_curations(db=None, **params):
     """Get all curations for a certain level given certain criteria."""
     if db is None:
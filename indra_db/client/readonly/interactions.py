@@ -1,10 +1,9 @@
 __all__ = ['stmt_from_interaction']
 
-from indra.statements import get_statement_by_name, Agent, ActiveForm
-
 
 def stmt_from_interaction(interaction):
     """Get a shell statement from an interaction."""
+    from indra.statements import get_statement_by_name, Agent, ActiveForm
     StmtClass = get_statement_by_name(interaction['type'])
     if issubclass(StmtClass, ActiveForm):
         return None
@@ -4,21 +4,21 @@ __all__ = ['StatementQueryResult', 'QueryCore', 'Intersection', 'Union',
            'MergeQueryCore', 'HasAgent', 'FromMeshId', 'HasHash',
            'HasSources', 'HasOnlySource', 'HasReadings', 'HasDatabases',
            'SourceCore', 'SourceIntersection', 'HasType', 'IntrusiveQueryCore',
-           'HasNumAgents', 'HasNumEvidence', 'FromPapers', 'EvidenceFilter']
+           'HasNumAgents', 'HasNumEvidence', 'FromPapers', 'EvidenceFilter',
+           'get_evidence']
 
 import json
 import logging
+from time import perf_counter
 from collections import OrderedDict, Iterable, defaultdict
 
 from sqlalchemy import desc, true, select, intersect_all, union_all, or_, \
-    except_, func, null, String, and_
+    except_, func, null, String, and_, tuple_
 from sqlalchemy.dialects.postgresql import JSONB
 
-from indra.statements import stmts_from_json, get_statement_by_name, \
-    get_all_descendants
 from indra_db.schemas.readonly_schema import ro_role_map, ro_type_map, \
     SOURCE_GROUPS
-from indra_db.util import regularize_agent_id, get_ro
+from indra_db.util import regularize_agent_id, get_ro, in_values
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +41,9 @@ class QueryResult(object):
         The total numbers of evidence for each element.
     query_json : dict
         A description of the query that was used.
+    next_cursor : str
+        (optional) A cursor which, passed as `after` to the same query, gets
+        the next page of results.
 
     Attributes
     ----------
@@ -51,13 +54,16 @@ class QueryResult(object):
         The limit that was applied to this query.
     next_offset : int
         The next offset that would be appropriate if this is a paging query.
+    next_cursor : str
+        The cursor for the next page of results, or None if there are no
+        more results.
     evidence_totals : dict
         The total numbers of evidence for each element.
     query_json : dict
         A description of the query that was used.
     """
     def __init__(self, results, limit: int, offset: int, offset_comp: int,
-                 evidence_totals: dict, query_json: dict):
+                 evidence_totals: dict, query_json: dict, next_cursor=None):
         if not isinstance(results, Iterable) or isinstance(results, str):
             raise ValueError("Input `results` is expected to be an iterable, "
                              "and not a string.")
@@ -70,6 +76,7 @@ class QueryResult(object):
             self.next_offset = None
         else:
             self.next_offset = (0 if offset is None else offset) + offset_comp
+        self.next_cursor = next_cursor
         self.query_json = query_json
 
     def json(self) -> dict:
@@ -81,7 +88,7 @@ class QueryResult(object):
             json_results = self.results
         return {'results': json_results, 'limit': self.limit,
                 'offset': self.offset, 'next_offset': self.next_offset,
-                'query': self.query_json,
+                'next_cursor': self.next_cursor, 'query': self.query_json,
                 'evidence_totals': self.evidence_totals,
                 'total_evidence': self.total_evidence}
 
@@ -101,15 +108,21 @@ class StatementQueryResult(QueryResult):
         The limit that was applied to this query.
     query_json : dict
         A description of the query that was used.
+    timings : dict
+        The seconds spent in each stage of the query: building and executing
+        the SQL ('sql'), and unpacking the rows ('unpack'). The hashes are
+        found in a sub-query of the query for content, so the time postgres
+        takes to find them cannot be told apart from the rest.
     """
     def __init__(self, results: dict, limit: int, offset: int,
                  evidence_totals: dict, returned_evidence: int,
-                 source_counts: dict, query_json: dict):
+                 source_counts: dict, query_json: dict, timings=None):
         super(StatementQueryResult, self).__init__(results, limit,
                                                    offset, len(results),
                                                    evidence_totals, query_json)
         self.returned_evidence = returned_evidence
         self.source_counts = source_counts
+        self.timings = timings if timings is not None else {}
 
     def json(self) -> dict:
         """Get the JSON dump of the results."""
@@ -120,6 +133,7 @@ class StatementQueryResult(QueryResult):
 
     def statements(self) -> list:
         """Get a list of Statements from the results."""
+        from indra.statements import stmts_from_json
         return stmts_from_json(list(self.results.values()))
 
 
@@ -129,6 +143,30 @@ def _make_agent_dict(ag_dict):
             if str(n) in ag_dict}
 
 
+def _parse_cursor(cursor):
+    """Get the (ev_count, mk_hash) key from a paging cursor."""
+    try:
+        ev_count, mk_hash = (int(n) for n in cursor.split(','))
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return ev_count, mk_hash
+
+
+def _get_next_cursor(keys, limit, best_first):
+    """Get the cursor following the last of the (ev_count, mk_hash) keys.
+
+    If fewer keys than the limit were found, there are no more pages, and
+    None is returned.
+    """
+    if limit is None or len(keys) < limit or not keys:
+        return None
+    if best_first:
+        ev_count, mk_hash = min(keys)
+    else:
+        ev_count, mk_hash = max(keys, key=lambda k: k[1])
+    return f'{ev_count},{mk_hash}'
+
+
 class QueryCore(object):
     """The core class for all queries; not functional on its own."""
 
@@ -232,6 +270,8 @@ class QueryCore(object):
 
         # Get the query for mk_hashes and ev_counts, and apply the generic
         # limits to it.
+        timings = {}
+        stage_start = perf_counter()
         mk_hashes_q = self.get_hash_query(ro)
         mk_hashes_q = self._apply_limits(ro, mk_hashes_q, limit, offset,
                                          best_first)
@@ -293,8 +333,10 @@ class QueryCore(object):
             logger.debug("res is %d row by %d cols." % (len(res), len(res[0])))
         else:
             logger.debug("res is empty.")
+        timings['sql'] = perf_counter() - stage_start
 
         # Unpack the statements.
+        stage_start = perf_counter()
         stmts_dict = OrderedDict()
         ev_totals = OrderedDict()
         source_counts = OrderedDict()
@@ -330,46 +372,18 @@ class QueryCore(object):
                 stmts_dict[mk_hash] = json.loads(pa_json_bts.decode('utf-8'))
                 stmts_dict[mk_hash]['evidence'] = []
 
-            # Add annotations if not present.
+            # Add the evidence JSON to the list.
             if ev_limit != 0:
-                raw_json = json.loads(raw_json_bts.decode('utf-8'))
-                ev_json = raw_json['evidence'][0]
-                if 'annotations' not in ev_json.keys():
-                    ev_json['annotations'] = {}
-
-                # Add agents' raw text to annotations.
-                ev_json['annotations']['agents'] = \
-                    {'raw_text': _get_raw_texts(raw_json)}
-
-                # Add prior UUIDs to the annotations
-                if 'prior_uuids' not in ev_json['annotations'].keys():
-                    ev_json['annotations']['prior_uuids'] = []
-                ev_json['annotations']['prior_uuids'].append(raw_json['id'])
-
-                # Add and/or update text refs.
-                if 'text_refs' not in ev_json.keys():
-                    ev_json['text_refs'] = {}
-                if ref_dict['pmid']:
-                    ev_json['pmid'] = ref_dict['pmid']
-                elif 'PMID' in ev_json['text_refs']:
-                    del ev_json['text_refs']['PMID']
-                ev_json['text_refs'].update({k.upper(): v
-                                             for k, v in ref_dict.items()
-                                             if v is not None})
-
-                # Add the source dictionary.
-                if ref_dict['source']:
-                    ev_json['annotations']['content_source'] = ref_dict['source']
-
-                # Add the evidence JSON to the list.
+                ev_json = _make_ev_json(raw_json_bts, ref_dict)
                 stmts_dict[mk_hash]['evidence'].append(ev_json)
+        timings['unpack'] = perf_counter() - stage_start
 
         return StatementQueryResult(stmts_dict, limit, offset, ev_totals,
                                     returned_evidence, source_counts,
-                                    self.to_json())
+                                    self.to_json(), timings)
 
-    def get_hashes(self, ro=None, limit=None, offset=None, best_first=True) \
-            -> QueryResult:
+    def get_hashes(self, ro=None, limit=None, offset=None, best_first=True,
+                   after=None) -> QueryResult:
         """Get the hashes of statements that satisfy this query.
 
         Parameters
@@ -385,6 +399,11 @@ class QueryCore(object):
             allows you to page through results.
         best_first : bool
             Return the best (most evidence) statements first.
+        after : str
+            Get results following this cursor, taken from the `next_cursor`
+            of the previous page. Unlike `offset`, the skipped results need
+            not be computed again, so this is the better way to page through
+            large results.
 
         Returns
         -------
@@ -403,25 +422,30 @@ class QueryCore(object):
         # limits to it.
         mk_hashes_q = self.get_hash_query(ro)
         mk_hashes_q = self._apply_limits(ro, mk_hashes_q, limit, offset,
-                                         best_first)
+                                         best_first, after)
 
         # Make the query, and package the results.
         result = mk_hashes_q.all()
         evidence_totals = {h: cnt for h, cnt in result}
 
+        next_cursor = _get_next_cursor([(cnt, h) for h, cnt in result],
+                                       limit, best_first)
         return QueryResult(list(evidence_totals.keys()), limit, offset,
-                           len(result), evidence_totals, self.to_json())
+                           len(result), evidence_totals, self.to_json(),
+                           next_cursor)
 
-    def _get_name_query(self, ro, limit=None, offset=None, best_first=True):
+    def _get_name_query(self, ro, limit=None, offset=None, best_first=True,
+                        after=None):
         mk_hashes_q = self.get_hash_query(ro)
         mk_hashes_q = self._apply_limits(ro, mk_hashes_q, limit, offset,
-                                         best_first)
+                                         best_first, after)
 
         mk_hashes_sq = mk_hashes_q.subquery('mk_hashes')
         q = (ro.session.query(ro.NameMeta.mk_hash, ro.NameMeta.db_id,
                               ro.NameMeta.ag_num, ro.NameMeta.type_num,
                               ro.NameMeta.agent_count, ro.NameMeta.activity,
-                              ro.NameMeta.is_active, ro.SourceMeta.src_json)
+                              ro.NameMeta.is_active, ro.SourceMeta.src_json,
+                              mk_hashes_sq.c.ev_count)
              .filter(ro.NameMeta.mk_hash == mk_hashes_sq.c.mk_hash,
                      ro.SourceMeta.mk_hash == mk_hashes_sq.c.mk_hash))
         sq = q.subquery('names')
@@ -435,19 +459,21 @@ class QueryCore(object):
             sq.c.agent_count,
             sq.c.activity,
             sq.c.is_active,
-            sq.c.src_json.cast(JSONB).label('src_json')
+            sq.c.src_json.cast(JSONB).label('src_json'),
+            sq.c.ev_count
         ).group_by(
             sq.c.mk_hash,
             sq.c.type_num,
             sq.c.agent_count,
             sq.c.activity,
             sq.c.is_active,
-            sq.c.src_json.cast(JSONB)
+            sq.c.src_json.cast(JSONB),
+            sq.c.ev_count
         )
         return q
 
-    def get_interactions(self, ro=None, limit=None, offset=None, best_first=True) \
-            -> QueryResult:
+    def get_interactions(self, ro=None, limit=None, offset=None, best_first=True,
+                         after=None) -> QueryResult:
         """Get the simple interaction information from the Statements metadata.
 
        Each entry in the result corresponds to a single preassembled Statement,
@@ -466,6 +492,9 @@ class QueryCore(object):
             allows you to page through results.
         best_first : bool
             Return the best (most evidence) statements first.
+        after : str
+            Get results following this cursor, taken from the `next_cursor`
+            of the previous page (see `get_hashes`).
         """
         if ro is None:
             ro = get_ro('primary')
@@ -473,11 +502,13 @@ class QueryCore(object):
         if self.empty:
             return QueryResult({}, limit, offset, {}, self.to_json())
 
-        q = self._get_name_query(ro, limit, offset, best_first)
+        q = self._get_name_query(ro, limit, offset, best_first, after)
         names = q.all()
         results = {}
         ev_totals = {}
-        for h, ag_json, type_num, n_ag, activity, is_active, src_json in names:
+        keys = []
+        for h, ag_json, type_num, n_ag, activity, is_active, src_json, ev_cnt \
+                in names:
             results[h] = {
                 'hash': h,
                 'id': str(h),
@@ -488,13 +519,14 @@ class QueryCore(object):
                 'source_counts': src_json,
             }
             ev_totals[h] = sum(src_json.values())
+            keys.append((ev_cnt, h))
 
+        next_cursor = _get_next_cursor(keys, limit, best_first)
         return QueryResult(results, limit, offset, len(results), ev_totals,
-                           self.to_json())
+                           self.to_json(), next_cursor)
 
     def get_relations(self, ro=None, limit=None, offset=None, best_first=True,
-                      with_hashes=False) \
-            -> QueryResult:
+                      with_hashes=False, after=None) -> QueryResult:
         """Get the agent and type information from the Statements metadata.
 
          Each entry in the result corresponds to a relation, meaning an
@@ -513,6 +545,9 @@ class QueryCore(object):
             allows you to page through results.
         best_first : bool
             Return the best (most evidence) statements first.
+        after : str
+            Get results following this cursor, taken from the `next_cursor`
+            of the previous page (see `get_hashes`).
         with_hashes : bool
             Default is False. If True, retrieve all the hashes that fit within
             each relational grouping.
@@ -523,8 +558,11 @@ class QueryCore(object):
         if self.empty:
             return QueryResult({}, limit, offset, {}, self.to_json())
 
-        names_q = self._get_name_query(ro, limit, offset, best_first)
+        names_q = self._get_name_query(ro, limit, offset, best_first, after)
 
+        # The hashes and evidence counts are only gathered if they are to be
+        # returned, or are needed for the cursor of the next page.
+        need_keys = with_hashes or limit is not None
         sq = names_q.subquery('names')
         q = ro.session.query(
             sq.c.agent_json,
@@ -533,7 +571,9 @@ class QueryCore(object):
             sq.c.activity,
             sq.c.is_active,
             func.array_agg(sq.c.src_json),
-            func.array_agg(sq.c.mk_hash) if with_hashes else null()
+            func.count(sq.c.mk_hash),
+            func.array_agg(sq.c.mk_hash) if need_keys else null(),
+            func.array_agg(sq.c.ev_count) if need_keys else null()
         ).group_by(
             sq.c.agent_json,
             sq.c.type_num,
@@ -546,7 +586,9 @@ class QueryCore(object):
         results = {}
         ev_totals = {}
         num_hashes = 0
-        for ag_json, type_num, n_ag, activity, is_active, srcs, hashes in names:
+        keys = []
+        for ag_json, type_num, n_ag, activity, is_active, srcs, n_hashes, \
+                hashes, ev_cnts in names:
             ordered_agents = [ag_json.get(str(n)) for n in range(n_ag)]
             agent_key = '(' + ', '.join(str(ag) for ag in ordered_agents) + ')'
 
@@ -564,16 +606,19 @@ class QueryCore(object):
             results[key] = {'id': key, 'source_counts': dict(source_counts),
                             'agents': _make_agent_dict(ag_json),
                             'type': stmt_type, 'activity': activity,
-                            'is_active': is_active, 'hashes': hashes}
+                            'is_active': is_active,
+                            'hashes': hashes if with_hashes else None}
             ev_totals[key] = sum(source_counts.values())
-            num_hashes += len(hashes)
+            num_hashes += n_hashes
+            if need_keys:
+                keys.extend(zip(ev_cnts, hashes))
 
+        next_cursor = _get_next_cursor(keys, limit, best_first)
         return QueryResult(results, limit, offset, num_hashes, ev_totals,
-                           self.to_json())
+                           self.to_json(), next_cursor)
 
     def get_agents(self, ro=None, limit=None, offset=None, best_first=True,
-                   with_hashes=False) \
-            -> QueryResult:
+                   with_hashes=False, after=None) -> QueryResult:
         """Get the agent pairs from the Statements metadata.
 
          Each entry is simply a pair (or more) of Agents involved in an
@@ -592,6 +637,9 @@ class QueryCore(object):
             allows you to page through results.
         best_first : bool
             Return the best (most evidence) statements first.
+        after : str
+            Get results following this cursor, taken from the `next_cursor`
+            of the previous page (see `get_hashes`).
         with_hashes : bool
             Default is False. If True, retrieve all the hashes that fit within
             each agent pair grouping.
@@ -602,14 +650,19 @@ class QueryCore(object):
         if self.empty:
             return QueryResult({}, limit, offset, {}, self.to_json())
 
-        names_q = self._get_name_query(ro, limit, offset, best_first)
+        names_q = self._get_name_query(ro, limit, offset, best_first, after)
 
+        # The hashes and evidence counts are only gathered if they are to be
+        # returned, or are needed for the cursor of the next page.
+        need_keys = with_hashes or limit is not None
         sq = names_q.subquery('names')
         q = ro.session.query(
             sq.c.agent_json,
             sq.c.agent_count,
             func.array_agg(sq.c.src_json),
-            func.array_agg(sq.c.mk_hash) if with_hashes else null()
+            func.count(sq.c.mk_hash),
+            func.array_agg(sq.c.mk_hash) if need_keys else null(),
+            func.array_agg(sq.c.ev_count) if need_keys else null()
         ).group_by(
             sq.c.agent_json,
             sq.c.agent_count
@@ -619,7 +672,8 @@ class QueryCore(object):
         results = {}
         ev_totals = {}
         num_hashes = 0
-        for ag_json, n_ag, src_jsons, hashes in names:
+        keys = []
+        for ag_json, n_ag, src_jsons, n_hashes, hashes, ev_cnts in names:
             ordered_agents = [ag_json.get(str(n)) for n in range(n_ag)]
             key = 'Agents(' + ', '.join(str(ag) for ag in ordered_agents) + ')'
 
@@ -633,23 +687,41 @@ class QueryCore(object):
                     source_counts[src] += cnt
             results[key] = {'id': key, 'source_counts': dict(source_counts),
                             'agents': _make_agent_dict(ag_json),
-                            'hashes': hashes}
+                            'hashes': hashes if with_hashes else None}
             ev_totals[key] = sum(source_counts.values())
-            num_hashes += len(hashes)
+            num_hashes += n_hashes
+            if need_keys:
+                keys.extend(zip(ev_cnts, hashes))
 
+        next_cursor = _get_next_cursor(keys, limit, best_first)
         return QueryResult(results, limit, offset, num_hashes, ev_totals,
-                           self.to_json())
+                           self.to_json(), next_cursor)
 
     def _apply_limits(self, ro, mk_hashes_q, limit=None, offset=None,
-                      best_first=True):
+                      best_first=True, after=None):
         """Apply the general query limits to the net hash query."""
         mk_hashes_q = mk_hashes_q.distinct()
 
         mk_hash_obj, ev_count_obj = self._hash_count_pair(ro)
 
+        # Pick up where a previous page left off. The order is made total by
+        # the mk_hash, so that no result is skipped or repeated.
+        if after is not None:
+            ev_count, mk_hash = _parse_cursor(after)
+            if best_first:
+                mk_hashes_q = mk_hashes_q.filter(
+                    tuple_(ev_count_obj, mk_hash_obj) < tuple_(ev_count,
+                                                               mk_hash)
+                )
+            else:
+                mk_hashes_q = mk_hashes_q.filter(mk_hash_obj > mk_hash)
+
         # Apply the general options.
         if best_first:
-            mk_hashes_q = mk_hashes_q.order_by(desc(ev_count_obj))
+            mk_hashes_q = mk_hashes_q.order_by(desc(ev_count_obj),
+                                               desc(mk_hash_obj))
+        elif after is not None or limit is not None:
+            mk_hashes_q = mk_hashes_q.order_by(mk_hash_obj)
         if limit is not None:
             mk_hashes_q = mk_hashes_q.limit(limit)
         if offset is not None:
@@ -1189,7 +1261,8 @@ class HasHash(SourceCore):
 
     def __init__(self, stmt_hashes):
         empty = len(stmt_hashes) == 0
-        self.stmt_hashes = tuple(stmt_hashes)
+        # Hashes posted by web clients are often strings.
+        self.stmt_hashes = tuple(int(h) for h in stmt_hashes)
         super(HasHash, self).__init__(empty)
 
     def _copy(self):
@@ -1223,11 +1296,8 @@ class HasHash(SourceCore):
             else:
                 clause = mk_hash != self.stmt_hashes[0]
         else:
-            # Otherwise use "in"s.
-            if not inverted:
-                clause = mk_hash.in_(self.stmt_hashes)
-            else:
-                clause = mk_hash.notin_(self.stmt_hashes)
+            # Otherwise use "in"s (or an array, for long lists).
+            clause = in_values(mk_hash, self.stmt_hashes, negate=inverted)
         return query.filter(clause)
 
 
@@ -1593,6 +1663,8 @@ class HasType(IntrusiveQueryCore):
     col_name = 'type_num'
 
     def __init__(self, stmt_types, include_subclasses=False):
+        from indra.statements import get_statement_by_name, get_all_descendants
+
         # Do the expansion of sub classes, if requested.
         st_set = set(stmt_types)
         if include_subclasses:
@@ -2154,7 +2226,118 @@ class EvidenceFilter:
         return query
 
 
+def _make_ev_json(raw_json_bts, ref_dict):
+    """Get the evidence JSON from a raw statement JSON and its text refs."""
+    raw_json = json.loads(raw_json_bts.decode('utf-8'))
+    ev_json = raw_json['evidence'][0]
+
+    # Add annotations if not present.
+    if 'annotations' not in ev_json.keys():
+        ev_json['annotations'] = {}
+
+    # Add agents' raw text to annotations.
+    ev_json['annotations']['agents'] = {'raw_text': _get_raw_texts(raw_json)}
+
+    # Add prior UUIDs to the annotations
+    if 'prior_uuids' not in ev_json['annotations'].keys():
+        ev_json['annotations']['prior_uuids'] = []
+    ev_json['annotations']['prior_uuids'].append(raw_json['id'])
+
+    # Add and/or update text refs.
+    if 'text_refs' not in ev_json.keys():
+        ev_json['text_refs'] = {}
+    if ref_dict['pmid']:
+        ev_json['pmid'] = ref_dict['pmid']
+    elif 'PMID' in ev_json['text_refs']:
+        del ev_json['text_refs']['PMID']
+    ev_json['text_refs'].update({k.upper(): v for k, v in ref_dict.items()
+                                 if v is not None})
+
+    # Add the source dictionary.
+    if ref_dict['source']:
+        ev_json['annotations']['content_source'] = ref_dict['source']
+    return ev_json
+
+
+def get_evidence(mk_hash, ro=None, limit=None, after=None,
+                 evidence_filter=None) -> QueryResult:
+    """Get a page of the evidence for one preassembled statement.
+
+    The evidence is ordered by raw statement id, so pages may be fetched in
+    turn by passing the `next_cursor` of each result as `after`, without the
+    database having to find the evidence on earlier pages again.
+
+    Parameters
+    ----------
+    mk_hash : int
+        The hash of the preassembled statement.
+    ro : DatabaseManager
+        A database manager handle that has valid Readonly tables built.
+    limit : int
+        The maximum number of evidence to return.
+    after : str
+        Get evidence following this cursor, taken from the `next_cursor` of
+        the previous page.
+    evidence_filter : None or EvidenceFilter
+        If given, only evidence passing the filter is returned, for example
+        the `ev_filter` of a HasSources or FromPapers query.
+
+    Returns
+    -------
+    result : QueryResult
+        The results are a list of evidence JSONs, and the evidence totals
+        give the total evidence for the statement, without any filter.
+    """
+    if ro is None:
+        ro = get_ro('primary')
+
+    frp = ro.FastRawPaLink
+    ref_link_cols = list(ro.ReadingRefLink.__table__.columns)
+    ref_link_keys = [col.name for col in ref_link_cols]
+    q = (ro.session.query(frp.id, frp.raw_json, *ref_link_cols)
+         .select_from(frp))
+
+    tables_joined = {'fast_raw_pa_link'}
+    if evidence_filter is not None:
+        q = evidence_filter.join_table(ro, q, tables_joined)
+        q = evidence_filter.apply_filter(ro, q)
+    if 'reading_ref_link' not in tables_joined:
+        q = q.outerjoin(ro.ReadingRefLink,
+                        ro.ReadingRefLink.rid == frp.reading_id)
+
+    q = q.filter(frp.mk_hash == mk_hash)
+    if after is not None:
+        try:
+            last_id = int(after)
+        except ValueError:
+            raise ValueError(f"Invalid cursor: {after}")
+        q = q.filter(frp.id > last_id)
+    q = q.order_by(frp.id)
+    if limit is not None:
+        q = q.limit(limit)
+
+    ev_list = []
+    last_id = None
+    for row in q.all():
+        last_id = row[0]
+        ref_dict = dict(zip(ref_link_keys, row[2:]))
+        ev_list.append(_make_ev_json(row[1], ref_dict))
+
+    if limit is not None and len(ev_list) == limit:
+        next_cursor = str(last_id)
+    else:
+        next_cursor = None
+
+    ev_count = (ro.session.query(ro.SourceMeta.ev_count)
+                .filter(ro.SourceMeta.mk_hash == mk_hash).scalar())
+    query_json = {'mk_hash': mk_hash, 'after': after,
+                  'filtered': evidence_filter is not None}
+    return QueryResult(ev_list, limit, None, len(ev_list),
+                       {mk_hash: ev_count or 0}, query_json, next_cursor)
+
+
 def _get_raw_texts(stmt_json):
+    from indra.statements import get_statement_by_name
     raw_text = []
     agent_names = get_statement_by_name(stmt_json['type'])._agent_order
     for ag_name in agent_names:
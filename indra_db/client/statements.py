@@ -13,7 +13,6 @@ logger = logging.getLogger(__file__)
 
 from indra.databases import hgnc_client
 from indra.util import batch_iter, clockit
-from indra.statements import Unresolved, Evidence, Statement
 
 from indra_db.util import get_primary_db, get_raw_stmts_frm_db_list, \
     get_statement_object
@@ -388,6 +387,7 @@ def get_evidence(pa_stmt_list, db=None, fix_refs=True, use_views=True):
     -------
     None - modifications are made to the Statements "in-place".
     """
+    from indra.statements import Evidence
     warnings.warn(('This module is being taken out of service, as the tools '
                    'have become deprecated. Moreover, the service has been '
                    're-implemented to use newer tools as best as possible, '
@@ -499,6 +499,7 @@ def get_statements_from_hashes(statement_hashes, preassembled=True, db=None,
 
 def get_support(statements, db=None, recursive=False):
     """Populate the supports and supported_by lists of the given statements."""
+    from indra.statements import Unresolved
     warnings.warn(('This module is being taken out of service, as the tools '
                    'have become deprecated. Moreover, the service has been '
                    're-implemented to use newer tools as best as possible, '
@@ -19,6 +19,7 @@ DB_CONFIG_PATH = path.join(DB_CONFIG_DIR, 'db_config.ini')
 DB_STR_FMT = "{prefix}://{username}{password}{host}{port}/{name}"
 PRINCIPAL_ENV_PREFIX = 'INDRADB'
 READONLY_ENV_PREFIX = 'INDRARO'
+REPLICA_ENV_SUFFIX = '_replicas'
 S3_DUMP_ENV_VAR = 'INDRA_DB_S3_PREFIX'
 LAMBDA_NAME_ENV_VAR = 'DB_SERVICE_LAMBDA_NAME'
 
@@ -82,24 +83,49 @@ def _load_config():
         if def_dict['password']:
             def_dict['password'] = ':' + def_dict['password']
 
+        # Get the urls of any read replicas, which share all but the host.
+        replica_urls = []
+        for replica_host in def_dict.get('replica_hosts', '').split(','):
+            replica_host = replica_host.strip()
+            if not replica_host:
+                continue
+            replica_dict = dict(def_dict, host='@' + replica_host)
+            if ':' in replica_host:
+                replica_dict['port'] = ''
+            replica_urls.append(DB_STR_FMT.format(**replica_dict))
+
         # Get the role of the database
         url = DB_STR_FMT.format(**def_dict)
         if def_dict.get('role') == 'readonly':
             # Include the entry both with and without the -ro. This is only
             # needed when sometimes a readonly database has the same name
             # as a principal database (e.g. primary).
+            labels = [section]
             if section.endswith('-ro'):
-                CONFIG['readonly'][section[:-3]] = url
-            CONFIG['readonly'][section] = url
+                labels.append(section[:-3])
+            for label in labels:
+                CONFIG['readonly'][label] = url
+                if replica_urls:
+                    CONFIG['replicas']['readonly'][label] = replica_urls
         else:
             CONFIG['databases'][section] = url
+            if replica_urls:
+                CONFIG['replicas']['databases'][section] = replica_urls
 
 
 def _load_env_config():
     assert CONFIG, "CONFIG must be defined BEFORE calling this function."
 
-    CONFIG['databases'].update(_get_urls_from_env(PRINCIPAL_ENV_PREFIX))
-    CONFIG['readonly'].update(_get_urls_from_env(READONLY_ENV_PREFIX))
+    for key, prefix in [('databases', PRINCIPAL_ENV_PREFIX),
+                        ('readonly', READONLY_ENV_PREFIX)]:
+        for label, url in _get_urls_from_env(prefix).items():
+            # Replicas are given as a comma separated list of urls, for
+            # example in INDRAROPRIMARY_REPLICAS.
+            if label.endswith(REPLICA_ENV_SUFFIX):
+                CONFIG['replicas'][key][label[:-len(REPLICA_ENV_SUFFIX)]] = \
+                    [u.strip() for u in url.split(',') if u.strip()]
+            else:
+                CONFIG[key][label] = url
 
     if S3_DUMP_ENV_VAR in environ:
         bucket, prefix = environ[S3_DUMP_ENV_VAR].split(':')
@@ -114,7 +140,8 @@ def _load_env_config():
 
 def _load(include_config=True):
     global CONFIG
-    CONFIG = {'databases': {}, 'readonly': {}, 's3_dump': {}}
+    CONFIG = {'databases': {}, 'readonly': {}, 's3_dump': {},
+              'replicas': {'databases': {}, 'readonly': {}}}
     if CONFIG_EXISTS and include_config:
         _load_config()
     _load_env_config()
@@ -135,6 +162,16 @@ def get_readonly_databases(force_update=False, include_config=True):
     return CONFIG['readonly']
 
 
+def get_replica_urls(label, readonly=False, force_update=False,
+                     include_config=True):
+    """Get the urls of the read replicas of a database, if any."""
+    if not CONFIG or force_update:
+        _load(include_config)
+
+    key = 'readonly' if readonly else 'databases'
+    return CONFIG['replicas'][key].get(label, [])
+
+
 def get_s3_dump(force_update=False, include_config=True):
     if not CONFIG or force_update:
         _load(include_config)
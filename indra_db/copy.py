@@ -1,16 +1,110 @@
-__all__ = ['CopyManager', 'LazyCopyManager', 'PushCopyManager']
+__all__ = ['CopyManager', 'LazyCopyManager', 'PushCopyManager',
+           'BinaryCopyStream']
 
+import struct
 import logging
-import tempfile
+from time import perf_counter
 
-from pgcopy import CopyManager
+from pgcopy import CopyManager as _PgCopyManager
+from pgcopy.copy import BINCOPY_HEADER, BINCOPY_TRAILER
 
 
 logger = logging.getLogger(__name__)
 
 
+class BinaryCopyStream(object):
+    """A file-like object that encodes rows for a binary COPY as it is read.
+
+    Rows are taken from `data` only as the database reads the stream, and
+    little more than `chunk_size` bytes of encoded rows are held at once, so
+    any number of rows may be streamed from a generator in flat memory.
+
+    Parameters
+    ----------
+    mngr : pgcopy.CopyManager
+        The copy manager whose column formatters are used to encode the rows.
+    data : iterable
+        The rows to be copied, as tuples of values.
+    chunk_size : int
+        The number of bytes to encode ahead of a read of unspecified size.
+    """
+    def __init__(self, mngr, data, chunk_size=2**20):
+        self._rows = iter(data)
+        self._formatters = mngr.formatters
+        self._n_cols = len(mngr.cols)
+        self._buf = bytearray(BINCOPY_HEADER)
+        self._done = False
+        self.chunk_size = chunk_size
+        self.row_count = 0
+        self.byte_count = 0
+
+    def _fill(self, size):
+        while not self._done and (size is None or len(self._buf) < size):
+            try:
+                record = next(self._rows)
+            except StopIteration:
+                self._buf += BINCOPY_TRAILER
+                self._done = True
+                break
+
+            fmt = ['>h']
+            rdat = [self._n_cols]
+            for formatter, val in zip(self._formatters, record):
+                f, d = formatter(val)
+                fmt.append(f)
+                rdat.extend(d)
+            self._buf += struct.pack(''.join(fmt), *rdat)
+            self.row_count += 1
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            self._fill(None)
+            size = len(self._buf)
+        else:
+            self._fill(size)
+        ret = bytes(self._buf[:size])
+        del self._buf[:size]
+        self.byte_count += len(ret)
+        return ret
+
+
+class CopyManager(_PgCopyManager):
+    """A copy manager that streams rows into the database as it encodes them.
+
+    Unlike the pgcopy CopyManager, no temporary file is written, so `data`
+    may be a generator of any length. After a copy, `row_count` and
+    `byte_count` give the number of rows and bytes that were sent.
+
+    If `stats` is set to a `QueryStats` instance, each copy is recorded there.
+    """
+    chunk_size = 2**20
+    stats = None
+
+    def copy(self, data, fobject_factory=None):
+        """Copy the rows in data into the database.
+
+        The `fobject_factory` is accepted for compatibility with pgcopy, but
+        is not used.
+        """
+        stream = BinaryCopyStream(self, data, self.chunk_size)
+        start = perf_counter()
+        self.copystream(stream)
+        self.row_count = stream.row_count
+        self.byte_count = stream.byte_count
+        if self.stats is not None:
+            self.stats.record_copy(self.table, perf_counter() - start,
+                                   self.row_count, self.byte_count)
+        return
+
+
 class LazyCopyManager(CopyManager):
-    """A copy manager that ignores entries which violate constraints."""
+    """A copy manager that ignores entries which violate constraints.
+
+    When reporting, the rows actually inserted are collected with
+    INSERT ... RETURNING, and the skipped rows are found by comparing them
+    with the rows that were copied in, so that the cost of the report
+    depends only on the size of the batch, not the size of the table.
+    """
     _fill_tmp_fmt = ('CREATE TEMP TABLE "tmp_{table}"\n'
                      'ON COMMIT DROP\n'
                      'AS SELECT "{cols}" FROM "{schema}"."{table}"\n'
@@ -22,26 +116,51 @@ class LazyCopyManager(CopyManager):
                   'SELECT "{cols}"\n'
                   'FROM "tmp_{table}" ON CONFLICT ')
 
+    _new_tmp_fmt = ('CREATE TEMP TABLE "new_{table}"\n'
+                    'ON COMMIT DROP\n'
+                    'AS SELECT "{cols}" FROM "{schema}"."{table}"\n'
+                    'WITH NO DATA;')
+
+    # Record the rows that were newly inserted by the merge.
+    _returning_fmt = ('RETURNING "{cols}", (xmax = 0) AS is_new)\n'
+                      'INSERT INTO "new_{table}" ("{cols}")\n'
+                      'SELECT "{cols}" FROM merged WHERE is_new;')
+
     def __init__(self, conn, table, cols, constraint=None):
         super().__init__(conn, table, cols)
         self.constraint = constraint
+        self.reporting = False
         return
 
-    def report_copy(self, data, order_by=None, return_cols=None,
-                    fobject_factory=tempfile.TemporaryFile):
-        self.copy(data, fobject_factory)
-        return self._get_skipped(len(data), order_by, return_cols)
+    def report_copy(self, data, return_cols=None):
+        """Copy the data and return the rows that were not inserted.
+
+        The rows are returned in no particular order.
+        """
+        self.reporting = True
+        self.copy(data)
+        return self._get_skipped(return_cols)
 
     def _stringify_cols(self, cols):
         if not isinstance(cols, list) and not isinstance(cols, tuple):
             raise ValueError("Argument `cols` must be a list or tuple.")
         return '", "'.join(cols)
 
-    def _get_sql(self):
-        cmd_fmt = '\n'.join([self._fill_tmp_fmt, self._merge_fmt])
+    def _get_conflict_action(self):
         if self.constraint:
-            cmd_fmt += 'ON CONSTRAINT "%s" ' % self.constraint
-        cmd_fmt += 'DO NOTHING;\n'
+            return 'ON CONSTRAINT "%s" DO NOTHING' % self.constraint
+        return 'DO NOTHING'
+
+    def _get_sql(self):
+        if self.reporting:
+            cmd_fmt = '\n'.join([self._fill_tmp_fmt, self._new_tmp_fmt,
+                                 'WITH merged AS (',
+                                 self._merge_fmt])
+            cmd_fmt += self._get_conflict_action() + '\n'
+            cmd_fmt += self._returning_fmt + '\n'
+        else:
+            cmd_fmt = '\n'.join([self._fill_tmp_fmt, self._merge_fmt])
+            cmd_fmt += self._get_conflict_action() + ';\n'
 
         # Fill in the format.
         columns = self._stringify_cols(self.cols)
@@ -49,7 +168,8 @@ class LazyCopyManager(CopyManager):
                              cols=columns)
         return sql
 
-    def _get_skipped(self, num, order_by, return_cols=None):
+    def _get_skipped(self, return_cols=None):
+        """Get the rows that were copied in but not newly inserted."""
         cursor = self.conn.cursor()
         inp_cols = self._stringify_cols(self.cols)
         if return_cols:
@@ -60,12 +180,8 @@ class LazyCopyManager(CopyManager):
             'SELECT "{ret_cols}" FROM\n'
             '(SELECT "{cols}" FROM "tmp_{table}"\n'
             ' EXCEPT\n'
-            ' (SELECT "{cols}"\n'
-            '  FROM "{schema}"."{table}"\n'
-            '  ORDER BY "{order_by}" DESC\n'
-            '  LIMIT {num})) as t;'
-        ).format(cols=inp_cols, table=self.table, schema=self.schema,
-                 ret_cols=ret_cols, order_by=order_by, num=num)
+            ' SELECT "{cols}" FROM "new_{table}") AS t;'
+        ).format(cols=inp_cols, table=self.table, ret_cols=ret_cols)
         logger.debug(diff_sql)
         cursor.execute(diff_sql)
         res = cursor.fetchall()
@@ -87,63 +203,19 @@ class LazyCopyManager(CopyManager):
 
 
 class PushCopyManager(LazyCopyManager):
-    _end_table_fmt = ('CREATE TEMP TABLE "end_{table}" '
-                      'ON COMMIT DROP '
-                      'AS SELECT "{order_by}" FROM "{schema}"."{table}" '
-                      'ORDER BY "{order_by}" DESC LIMIT 1; ')
+    """A copy manager that updates existing entries which violate constraints.
 
+    When reporting, the rows that updated existing entries are returned.
+    """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         if not self.constraint:
             raise ValueError("A constraint is required if you are updating "
                              "on-conflict.")
-        self.reporting = False
-        self.order_by = None
         return
 
-    def _get_sql(self):
-        if self.reporting:
-            cmd_fmt = '\n'.join([self._fill_tmp_fmt, self._end_table_fmt,
-                                 self._merge_fmt])
-        else:
-            cmd_fmt = '\n'.join([self._fill_tmp_fmt, self._merge_fmt])
+    def _get_conflict_action(self):
         update = ', '.join('{0} = EXCLUDED.{0}'.format(c)
                            for c in self.cols)
-        cmd_fmt += 'ON CONSTRAINT "%s" DO UPDATE SET %s;\n' \
-                   % (self.constraint, update)
-        columns = self._stringify_cols(self.cols)
-        sql = cmd_fmt.format(schema=self.schema, table=self.table,
-                             cols=columns, order_by=self.order_by)
-        return sql
-
-    def _get_report(self, return_cols=None):
-        cursor = self.conn.cursor()
-        inp_cols = self._stringify_cols(self.cols)
-        if return_cols:
-            ret_cols = self._stringify_cols(return_cols)
-        else:
-            ret_cols = inp_cols
-        diff_sql = (
-            'SELECT "{ret_cols}"\n'
-            'FROM\n'
-            '(SELECT "{cols}" FROM "tmp_{table}"\n'
-            ' EXCEPT\n'
-            ' (SELECT "{cols}"\n'
-            '  FROM "{schema}"."{table}"\n'
-            '  WHERE "{order_by}" > (SELECT "{order_by}" '
-            '                        FROM "end_{table}"))) AS t;'
-        ).format(ret_cols=ret_cols, order_by=self.order_by, table=self.table,
-                 schema=self.schema, cols=inp_cols)
-        logger.debug(diff_sql)
-        cursor.execute(diff_sql)
-        res = cursor.fetchall()
-        return res
-
-    def report_copy(self, data, order_by=None, return_cols=None,
-                    fobject_factory=tempfile.TemporaryFile):
-        self.reporting = True
-        self.order_by = order_by
-        self.copy(data, fobject_factory)
-        updated = self._get_report(return_cols)
-        return updated
-
+        return 'ON CONSTRAINT "%s" DO UPDATE SET %s' % (self.constraint,
+                                                       update)
@@ -3,12 +3,19 @@ __all__ = ['texttypes', 'formats', 'DatabaseManager', 'IndraDbException',
            'PrincipalDatabaseManager', 'ReadonlyDatabaseManager']
 
 import re
+import json
 import random
 import logging
-from io import BytesIO
+from io import StringIO
 from numbers import Number
 from functools import wraps
+from itertools import chain
 from datetime import datetime
+from queue import Queue
+from collections import OrderedDict
+from threading import local, Thread, BoundedSemaphore
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 
@@ -17,15 +24,19 @@ from sqlalchemy.schema import DropTable
 from sqlalchemy.sql.expression import Delete, Update
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base, DeclarativeMeta
-from sqlalchemy import create_engine, inspect, UniqueConstraint, func
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, inspect, UniqueConstraint, func, or_
+from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.orm.attributes import InstrumentedAttribute
 from sqlalchemy.engine.url import make_url
 
 from indra.util import batch_iter
 from indra_db.util import S3Path
+from indra_db.util.query_stats import QueryStats
+from indra_db.replicas import ReplicaSet, RoutingSession
 from indra_db.exceptions import IndraDbException
 from indra_db.schemas import principal_schema, readonly_schema
+from indra_db.schemas.mixins import SpecialColumnTable
 from indra_db.schemas.readonly_schema import CREATE_ORDER, CREATE_UNORDERED
 
 
@@ -78,13 +89,26 @@ def _copy_method(get_null_return=lambda: None):
     def super_wrapper(meth):
         @wraps(meth)
         def wrapper(obj, tbl_name, data, cols=None, commit=True, *args, **kwargs):
-            logger.info("Received request to %s %d entries into %s."
-                        % (meth.__name__, len(data), tbl_name))
             if not CAN_COPY:
                 raise RuntimeError("Cannot use copy methods. `pg_copy` is not "
                                    "available.")
-            if len(data) is 0:
-                return get_null_return()  # Nothing to do....
+
+            # Data may be given as a list or as a generator, in which case we
+            # peek at the first entry to see if there is anything to do.
+            if hasattr(data, '__len__'):
+                logger.info("Received request to %s %d entries into %s."
+                            % (meth.__name__, len(data), tbl_name))
+                if len(data) == 0:
+                    return get_null_return()  # Nothing to do....
+            else:
+                logger.info("Received request to %s a stream of entries "
+                            "into %s." % (meth.__name__, tbl_name))
+                data = iter(data)
+                try:
+                    first = next(data)
+                except StopIteration:
+                    return get_null_return()  # Nothing to do....
+                data = chain([first], data)
 
             res = meth(obj, tbl_name, data, cols, commit, *args, **kwargs)
 
@@ -155,6 +179,76 @@ class IndraTableError(IndraDbException):
         super(IndraTableError, self).__init__(self, msg)
 
 
+def _iter_readonly_names():
+    """Iterate over the readonly table names, in the order they are built."""
+    for i, view in enumerate(CREATE_ORDER):
+        yield str(i), view
+    for view in CREATE_UNORDERED:
+        yield '-', view
+
+
+def _run_in_dependency_order(tasks, deps, run, jobs):
+    """Run tasks in a pool of threads, each once its dependencies are done.
+
+    Parameters
+    ----------
+    tasks : list[tuple]
+        The (label, name) of each task, in the order they should be started
+        when several are ready.
+    deps : dict
+        The set of names of the tasks each named task depends on.
+    run : callable
+        A function called with the label and name of each task.
+    jobs : int
+        The number of tasks to run at the same time.
+
+    If any task fails, no more tasks are started, and the error is raised
+    once those already started have finished. An IndraDbException is raised
+    if the remaining tasks depend on each other.
+    """
+    waiting = list(tasks)
+    running = {}
+    done_names = set()
+    with ThreadPoolExecutor(jobs) as pool:
+        while waiting or running:
+            for label, name in list(waiting):
+                if deps[name] <= done_names:
+                    waiting.remove((label, name))
+                    running[pool.submit(run, label, name)] = name
+            if not running:
+                raise IndraDbException("Tasks %s depend on each other, and "
+                                       "cannot be run."
+                                       % [name for _, name in waiting])
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                future.result()
+                done_names.add(name)
+    return
+
+
+class _SpecialTableAttr(object):
+    """Give the table of a manager whose columns are only known once built.
+
+    On the first access, the columns of all such tables of the manager are
+    loaded at once (see `SpecialColumnTable.load_many`), and each table is set
+    as a plain attribute of the instance. That attribute hides this
+    descriptor, so later access is as cheap as for any other table.
+    """
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        tables = obj._special_tables
+        SpecialColumnTable.load_many(obj.engine, list(tables.values()))
+        for name, tbl in tables.items():
+            if tbl.loaded:
+                obj.__dict__[name] = tbl
+        return tables[self.name]
+
+
 class DatabaseManager(object):
     """An object used to access INDRA's database.
 
@@ -177,6 +271,39 @@ class DatabaseManager(object):
     label : OPTIONAL[str]
         A short string to indicate the purpose of the db instance. Set as
         primary when initialized be `get_primary_db` or `get_db`.
+    pool_size : OPTIONAL[int]
+        The number of connections to keep open in the connection pool.
+    max_overflow : OPTIONAL[int]
+        The number of connections that may be opened beyond `pool_size` when
+        the pool is exhausted.
+    pool_pre_ping : OPTIONAL[bool]
+        If True, test each connection as it is taken from the pool, replacing
+        it if it has gone stale. Default is False.
+    pool_recycle : OPTIONAL[int]
+        Replace connections that have been open longer than this many seconds.
+    instrument : OPTIONAL[bool]
+        If True, record statistics on every query and copy (see
+        `enable_stats`). Default is False.
+    replica_urls : OPTIONAL[list[str]]
+        The urls of read replicas of the database. If given, plain reads
+        made through the session are spread across the replicas, while
+        writes, copies, and any reads in a transaction that has written go to
+        `url`. Replicas that fail are skipped until they pass a health check,
+        and if none are available, reads fall back to `url`.
+    replica_policy : OPTIONAL[str]
+        How a replica is chosen for each read: 'round_robin' (default) or
+        'least_loaded', the replica with the fewest connections in use.
+    replica_check_interval : OPTIONAL[float]
+        The number of seconds before a failed replica is checked again.
+        Default is 30.
+
+    Unless given, the pool options take the sqlalchemy defaults, and apply to
+    the replicas as well.
+
+    The `session` attribute and the connection used for copies are kept
+    separately for each thread, so a single instance may be shared between
+    threads. For a short-lived unit of work, `session_scope` gives a session
+    that is committed (or rolled back) and closed when the work is done.
 
     Example
     -------
@@ -193,13 +320,126 @@ class DatabaseManager(object):
     For more sophisticated examples, several use cases can be found in
     `indra.tests.test_db`.
     """
-    def __init__(self, url, label=None):
+    def __init__(self, url, label=None, pool_size=None, max_overflow=None,
+                 pool_pre_ping=False, pool_recycle=None, instrument=False,
+                 replica_urls=None, replica_policy='round_robin',
+                 replica_check_interval=30):
         self.url = make_url(url)
-        self.session = None
         self.Base = declarative_base()
         self.label = label
-        self.engine = create_engine(self.url)
-        self._conn = None
+
+        engine_kwargs = {'pool_pre_ping': pool_pre_ping}
+        if pool_size is not None:
+            engine_kwargs['pool_size'] = pool_size
+        if max_overflow is not None:
+            engine_kwargs['max_overflow'] = max_overflow
+        if pool_recycle is not None:
+            engine_kwargs['pool_recycle'] = pool_recycle
+        self.engine = create_engine(self.url, **engine_kwargs)
+
+        self.replicas = None
+        if replica_urls:
+            self.replicas = ReplicaSet(
+                [create_engine(make_url(replica_url), **engine_kwargs)
+                 for replica_url in replica_urls],
+                policy=replica_policy,
+                check_interval=replica_check_interval
+            )
+        self._session_factory = sessionmaker(bind=self.engine,
+                                             class_=RoutingSession,
+                                             replicas=self.replicas)
+        self._sessions = scoped_session(self._session_factory)
+        self._thread_local = local()
+
+        self._stats = None
+        if instrument:
+            self.enable_stats()
+        return
+
+    def enable_stats(self):
+        """Start recording statistics on the queries and copies made.
+
+        Each statement executed through the engine is fingerprinted, and its
+        count, latency, and rows returned are recorded, as are the rows and
+        bytes sent by each copy, all labeled by the current `DataGatherer`
+        stage of the thread that made them. This is useful for finding N+1
+        query patterns and slow statements. Calling this more than once has
+        no further effect.
+
+        Returns
+        -------
+        QueryStats
+            The object in which the statistics are recorded, which is also
+            returned by the `stats` method.
+        """
+        if self._stats is None:
+            self._stats = QueryStats(self.label)
+            self._stats.attach(self.engine)
+            if self.replicas:
+                for engine in self.replicas.engines:
+                    self._stats.attach(engine)
+        return self._stats
+
+    def stats(self):
+        """Get the QueryStats for this database, or None if not enabled.
+
+        Use `get_json` or `get_prometheus` on the result to export the stats.
+        """
+        return self._stats
+
+    def _get_copy_manager(self, mngr_class, tbl_name, cols, conn=None,
+                          **kwargs):
+        """Make a copy manager, on this thread's connection by default."""
+        mngr = mngr_class(self._conn if conn is None else conn, tbl_name, cols,
+                          **kwargs)
+        mngr.stats = self._stats
+        return mngr
+
+    @property
+    def session(self):
+        """The session for the current thread, or None if not yet grabbed."""
+        if not self._sessions.registry.has():
+            return None
+        return self._sessions()
+
+    @property
+    def _conn(self):
+        """The raw connection used for copies by the current thread."""
+        return getattr(self._thread_local, 'conn', None)
+
+    @_conn.setter
+    def _conn(self, conn):
+        self._thread_local.conn = conn
+
+    @contextmanager
+    def session_scope(self):
+        """Get a new session, committed and closed at the end of the context.
+
+        If an exception is raised within the context, the session is rolled
+        back instead of committed, and the exception is re-raised.
+
+        Example
+        -------
+        >> with db.session_scope() as session:
+        >>     session.add(db.TextRef(pmid='1234567'))
+        """
+        session = self._session_factory()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def release_session(self):
+        """Close and forget the session of the current thread.
+
+        This should be called when a thread (for example a web worker
+        handling a request) is done with the database.
+        """
+        self._sessions.remove()
         return
 
     def _init_foreign_key_map(self, foreign_key_map):
@@ -220,7 +460,12 @@ class DatabaseManager(object):
             print("Failed to execute rollback of database upon deletion.")
 
     def create_tables(self, tbl_list=None):
-        "Create the tables for INDRA database."
+        """Create the tables for INDRA database.
+
+        Tables that already exist are left as they are, so this may be used
+        to add new tables to an existing database. A new curation_counts
+        table is filled from any existing curations.
+        """
         ordered_tables = ['text_ref', 'mesh_ref_annotations', 'text_content',
                           'reading', 'db_info', 'raw_statements', 'raw_agents',
                           'raw_mods', 'raw_muts', 'pa_statements', 'pa_agents',
@@ -246,10 +491,22 @@ class DatabaseManager(object):
                 else:
                     logger.debug("Table already existed.")
         # The rest can be started any time.
+        created = []
         for tbl_name in tbl_name_list:
             logger.debug("Creating %s..." % tbl_name)
-            self.tables[tbl_name].__table__.create(bind=self.engine)
-            logger.debug("Table created.")
+            if not self.tables[tbl_name].__table__.exists(self.engine):
+                self.tables[tbl_name].__table__.create(bind=self.engine)
+                created.append(tbl_name)
+                logger.debug("Table created.")
+            else:
+                logger.debug("Table already existed.")
+
+        # Count any curations made before the counts table existed.
+        if 'curation_counts' in created \
+                and self.tables['curation'].__table__.exists(self.engine):
+            logger.info("Counting the existing curations.")
+            self.tables['curation_counts'].rebuild(self)
+            self.commit("Failed to count the existing curations.")
         return
 
     def drop_tables(self, tbl_list=None, force=False):
@@ -310,14 +567,13 @@ class DatabaseManager(object):
             return False
 
     def grab_session(self):
-        "Get an active session with the database."
+        "Get an active session with the database for the current thread."
         if self.session is None or not self.session.is_active:
             logger.debug('Attempting to get session...')
-            DBSession = sessionmaker(bind=self.engine)
-            logger.debug('Got session.')
-            self.session = DBSession()
-            if self.session is None:
+            self._sessions.remove()
+            if self._sessions() is None:
                 raise IndraDbException("Failed to grab session.")
+            logger.debug('Got session.')
 
     def get_tables(self):
         "Get a list of available tables."
@@ -477,35 +733,136 @@ class DatabaseManager(object):
                     (inputs, table.__tablename__))
         return self.get_values([new_entry], ret_info)[0]
 
-    def insert_many(self, table, input_data_list, ret_info=None, cols=None):
-        "Insert many records into the table given by table_name."
+    def insert_many(self, table, input_data_list, ret_info=None, cols=None,
+                    batch_size=1000):
+        """Insert many records into the table given by table_name.
+
+        Rather than building an ORM object for each record, the records are
+        inserted with multi-row INSERT ... RETURNING statements of up to
+        `batch_size` rows, and the `ret_info` columns (by default the primary
+        key) are returned in the order of the input. This makes it practical
+        to insert many records at once where generated ids are needed; for
+        very large inserts where they are not, use `copy`.
+
+        As postgres does not promise to return rows in the order they were
+        given, each row is matched to its record by primary key. If the
+        records do not give the key, it is drawn from the key's sequence
+        beforehand; if there is no such sequence, the records are inserted
+        one at a time.
+
+        As with an ORM insert, a value of None (or no value) for a column
+        lets any default for that column apply.
+
+        Parameters
+        ----------
+        table : str or table class
+            The table into which the records are inserted.
+        input_data_list : iterable
+            The records, either as dicts keyed by column name, or as tuples
+            with values in the order given by `cols`.
+        ret_info : str or list[str]
+            The column or columns whose values are returned for each record.
+            By default, the primary key.
+        cols : tuple or list
+            The names of the columns, if the records are given as tuples.
+        batch_size : int
+            The greatest number of rows to insert in a single statement.
+
+        Returns
+        -------
+        list
+            For each input record, the value of `ret_info`, or a list of
+            values if `ret_info` is a list.
+        """
         self.grab_session()
 
         # Resolve the table instance
         if isinstance(table, str):
-            inputs = dict.fromkeys(self.get_column_names(table))
             table = self.tables[table]
-        else:
-            inputs = dict.fromkeys(self.get_column_names(table.__tablename__))
 
         # Set the default return info
         if ret_info is None:
             ret_info = inspect(table).primary_key[0].name
+        if _isiterable(ret_info):
+            ret_cols = list(ret_info)
+        else:
+            ret_cols = [ret_info]
+        sql_table = table.__table__
+        pk_cols = [col.name for col in sql_table.primary_key]
+        returning = [sql_table.c[col] for col in ret_cols + pk_cols]
+        n_ret = len(ret_cols)
 
-        # Prepare and insert the data
-        entry_list = []
-        for input_data in input_data_list:
+        def as_key_type(col_name, value):
+            try:
+                return sql_table.c[col_name].type.python_type(value)
+            except NotImplementedError:
+                return value
+
+        seq_name = None
+        if len(pk_cols) == 1:
+            seq_name = self.session.execute(
+                'SELECT pg_get_serial_sequence(:tbl, :col)',
+                {'tbl': table.full_name(force_schema=True), 'col': pk_cols[0]}
+            ).scalar()
+
+        # Group the records by the columns given a value, so each group may
+        # be inserted with a single statement, remembering the input order.
+        input_data_list = list(input_data_list)
+        groups = {}
+        for idx, input_data in enumerate(input_data_list):
             if cols:
-                input_dict = zip(cols, input_data)
-            else:
-                input_dict = input_data
-            inputs.update(input_dict)
-            entry_list.append(table(**inputs))
-            inputs = inputs.fromkeys(inputs)  # Clear the values of the dict.
-        self.session.add_all(entry_list)
-        self.commit("Excepted while trying to insert:\n%s,\ninto %s" %
-                    (input_data_list, table.__tablename__))
-        return self.get_values(entry_list, ret_info)
+                input_data = zip(cols, input_data)
+            record = {k: v for k, v in dict(input_data).items()
+                      if v is not None}
+            groups.setdefault(tuple(sorted(record)), []).append((idx, record))
+
+        results = [None]*len(input_data_list)
+        try:
+            for idx_records in groups.values():
+                for batch in batch_iter(idx_records, batch_size,
+                                        return_func=list):
+                    indices, records = zip(*batch)
+                    records = [dict(record) for record in records]
+                    if not all(col in records[0] for col in pk_cols):
+                        if seq_name is None:
+                            # Nothing can tie the rows to the records, so
+                            # insert them one at a time.
+                            for idx, record in batch:
+                                stmt = sql_table.insert().values(record)\
+                                    .returning(*returning)
+                                row = self.session.execute(stmt).fetchone()
+                                results[idx] = row[:n_ret]
+                            continue
+                        new_ids = self.session.execute(
+                            'SELECT nextval(:seq) '
+                            'FROM generate_series(1, :n)',
+                            {'seq': seq_name, 'n': len(records)}
+                        ).fetchall()
+                        for record, (new_id,) in zip(records, new_ids):
+                            record[pk_cols[0]] = new_id
+
+                    idx_by_key = {
+                        tuple(as_key_type(col, record[col])
+                              for col in pk_cols): idx
+                        for idx, record in zip(indices, records)
+                    }
+                    rows = self.session.execute(
+                        sql_table.insert().values(records)
+                        .returning(*returning)
+                    ).fetchall()
+                    for row in rows:
+                        results[idx_by_key[tuple(row[n_ret:])]] = row[:n_ret]
+        except Exception:
+            self.session.rollback()
+            logger.error("Excepted while trying to insert %d records into %s."
+                         % (len(input_data_list), table.__tablename__))
+            raise
+        self.commit("Excepted while trying to insert %d records into %s." %
+                    (len(input_data_list), table.__tablename__))
+
+        if _isiterable(ret_info):
+            return [list(row) for row in results]
+        return [row[0] for row in results]
 
     def delete_all(self, entry_list):
         "Remove the given records from the given table."
@@ -516,6 +873,66 @@ class DatabaseManager(object):
                     len(entry_list))
         return
 
+    def delete_by_id_set(self, ids, targets, commit=True):
+        """Delete the rows of several tables that refer to a set of ids.
+
+        The ids are copied into a temporary table, and each target is then
+        cleared with a single DELETE ... USING join against it, in the order
+        given, so that rows which refer to others may be deleted first. This
+        is much faster than deleting rows one by one, or with long IN lists,
+        and all the deletions happen in one transaction (on the copy
+        connection, see `get_copy_cursor`).
+
+        Parameters
+        ----------
+        ids : iterable
+            The ids, which must all be of the type of the first target column.
+        targets : list[tuple]
+            A list of (table name, column name) pairs. From each table, every
+            row whose column value is in `ids` is deleted.
+        commit : bool
+            If True (default), commit the deletions. Otherwise they may be
+            committed later with `commit_copy`.
+
+        Returns
+        -------
+        counts : OrderedDict
+            The number of rows deleted from each table, keyed by table name.
+        """
+        buf = StringIO(''.join('%s\n' % id_val for id_val in ids))
+        counts = OrderedDict((tbl_name, 0) for tbl_name, _ in targets)
+        if not buf.getvalue():
+            return counts
+
+        tbl_name, col_name = targets[0]
+        id_type = self.tables[tbl_name].__table__.c[col_name].type\
+            .compile(dialect=self.engine.dialect)
+        tmp_name = 'tmp_del_ids_%d' % abs(self.make_copy_batch_id())
+
+        cur = self.get_copy_cursor()
+        try:
+            cur.execute('CREATE TEMP TABLE "%s" (id %s PRIMARY KEY) '
+                        'ON COMMIT DROP' % (tmp_name, id_type))
+            cur.copy_expert('COPY "%s" (id) FROM STDIN' % tmp_name, buf)
+            cur.execute('ANALYZE "%s"' % tmp_name)
+            for tbl_name, col_name in targets:
+                cur.execute('DELETE FROM "{tbl}" USING "{tmp}" '
+                            'WHERE "{tbl}"."{col}" = "{tmp}".id'
+                            .format(tbl=tbl_name, col=col_name, tmp=tmp_name))
+                counts[tbl_name] += cur.rowcount
+                logger.info("Deleted %d rows from %s."
+                            % (cur.rowcount, tbl_name))
+            if not commit:
+                cur.execute('DROP TABLE "%s"' % tmp_name)
+        except Exception:
+            self._conn.rollback()
+            self._conn = None
+            raise
+        if commit:
+            self.commit_copy('Failed to commit deletion from %s.'
+                             % ', '.join(counts.keys()))
+        return counts
+
     def get_copy_cursor(self):
         """Execute SQL queries in the context of a copy operation."""
         # Prep the connection.
@@ -534,35 +951,49 @@ class DatabaseManager(object):
         return random.randint(-2**30, 2**30)
 
     def _prep_copy(self, tbl_name, data, cols):
+        """Get the columns, and a generator of the data formatted for copy.
 
+        The data is formatted as it is consumed, so it is never held in
+        memory all at once.
+        """
         # If cols is not specified, use all the cols in the table, else check
         # to make sure the names are valid.
         if cols is None:
-            cols = self.get_column_names(tbl_name)
+            cols = tuple(self.get_column_names(tbl_name))
         else:
             db_cols = self.get_column_names(tbl_name)
             assert all([col in db_cols for col in cols]), \
                 "Do not recognize one of the columns in %s for table %s." % \
                 (cols, tbl_name)
+            cols = tuple(cols)
 
         # Check for automatic timestamps which won't be applied by the
         # database when using copy, and manually insert them.
         auto_timestamp_type = type(func.now())
+        timestamps = ()
         for col in self.get_column_objects(tbl_name):
             if col.default is not None:
                 if isinstance(col.default.arg, auto_timestamp_type) \
                         and col.name not in cols:
                     logger.info("Applying timestamps to %s." % col.name)
-                    now = datetime.utcnow()
+                    timestamps += (datetime.utcnow(),)
                     cols += (col.name,)
-                    data = [datum + (now,) for datum in data]
 
-        # Format the data for the copy.
-        data_bts = []
-        n_cols = len(cols)
+        # Prep the connection.
+        if self._conn is None:
+            self._conn = self.engine.raw_connection()
+            self._conn.rollback()
+
+        return cols, self._iter_copy_bytes(data, len(cols), timestamps)
+
+    @staticmethod
+    def _iter_copy_bytes(data, n_cols, timestamps=()):
+        """Format each entry of the data for copy, appending any timestamps."""
         for entry in data:
-            # Make sure that the number of columns matches the number of columns in
-            # the data.
+            entry = tuple(entry) + timestamps
+
+            # Make sure that the number of columns matches the number of
+            # columns in the data.
             if n_cols != len(entry):
                 raise ValueError("Number of columns does not match number of "
                                  "columns in data.")
@@ -583,31 +1014,23 @@ class DatabaseManager(object):
                         "Should be str, bytes, datetime, None, or a "
                         "number." % type(element)
                     )
-            data_bts.append(tuple(new_entry))
-
-        # Prep the connection.
-        if self._conn is None:
-            self._conn = self.engine.raw_connection()
-            self._conn.rollback()
-
-        return cols, data_bts
+            yield tuple(new_entry)
 
     @_copy_method(list)
     def copy_report_lazy(self, tbl_name, data, cols=None, commit=True,
-                         constraint=None, return_cols=None, order_by=None):
-        """Copy lazily, and report what rows were skipped."""
-        cols, data_bts = self._prep_copy(tbl_name, data, cols)
+                         constraint=None, return_cols=None):
+        """Copy lazily, and report what rows were skipped.
 
-        if not order_by:
-            order_by = getattr(self.tables[tbl_name],
-                               '_default_insert_order_by')
-            if not order_by:
-                raise ValueError("%s does not have an `order_by` attribute, "
-                                 "and no `order_by` was specified." % tbl_name)
+        The skipped rows are found by comparing the copied rows with those
+        the merge inserted, so they come back in no particular order. (The
+        former `order_by` argument, which ordered the table to find them,
+        has been removed.)
+        """
+        cols, data_bts = self._prep_copy(tbl_name, data, cols)
 
-        mngr = LazyCopyManager(self._conn, tbl_name, cols,
-                               constraint=constraint)
-        return mngr.report_copy(data_bts, order_by, return_cols, BytesIO)
+        mngr = self._get_copy_manager(LazyCopyManager, tbl_name, cols,
+                                      constraint=constraint)
+        return mngr.report_copy(data_bts, return_cols)
 
     @_copy_method()
     def copy_lazy(self, tbl_name, data, cols=None, commit=True,
@@ -615,9 +1038,9 @@ class DatabaseManager(object):
         "Copy lazily, skip any rows that violate constraints."
         cols, data_bts = self._prep_copy(tbl_name, data, cols)
 
-        mngr = LazyCopyManager(self._conn, tbl_name, cols,
-                               constraint=constraint)
-        mngr.copy(data_bts, BytesIO)
+        mngr = self._get_copy_manager(LazyCopyManager, tbl_name, cols,
+                                      constraint=constraint)
+        mngr.copy(data_bts)
         return
 
     def _infer_constraint(self, tbl_name, cols):
@@ -667,37 +1090,191 @@ class DatabaseManager(object):
         if constraint is None:
             constraint = self._infer_constraint(tbl_name, cols)
 
-        mngr = PushCopyManager(self._conn, tbl_name, cols,
-                               constraint=constraint)
-        mngr.copy(data_bts, BytesIO)
+        mngr = self._get_copy_manager(PushCopyManager, tbl_name, cols,
+                                      constraint=constraint)
+        mngr.copy(data_bts)
         return
 
     @_copy_method(list)
     def copy_report_push(self, tbl_name, data, cols=None, commit=True,
-                         constraint=None, return_cols=None, order_by=None):
-        """Report on the rows skipped when pushing and copying."""
+                         constraint=None, return_cols=None):
+        """Report on the rows that were updated when pushing and copying.
+
+        As for `copy_report_lazy`, the rows come back in no particular order,
+        and the former `order_by` argument has been removed.
+        """
         cols, data_bts = self._prep_copy(tbl_name, data, cols)
 
         if constraint is None:
             constraint = self._infer_constraint(tbl_name, cols)
 
-        if not order_by:
-            order_by = self.tables[tbl_name]._default_insert_order_by
-            if not order_by:
-                raise ValueError("Table %s have no `_default_insert_order_by` "
-                                 "attribute, and no `order_by` was specified."
-                                 % tbl_name)
-
-        mngr = PushCopyManager(self._conn, tbl_name, cols,
-                               constraint=constraint)
-        return mngr.report_copy(data_bts, order_by, return_cols, BytesIO)
+        mngr = self._get_copy_manager(PushCopyManager, tbl_name, cols,
+                                      constraint=constraint)
+        return mngr.report_copy(data_bts, return_cols)
 
     @_copy_method()
     def copy(self, tbl_name, data, cols=None, commit=True):
         "Use pg_copy to copy over a large amount of data."
         cols, data_bts = self._prep_copy(tbl_name, data, cols)
-        mngr = CopyManager(self._conn, tbl_name, cols)
-        mngr.copy(data_bts, BytesIO)
+        mngr = self._get_copy_manager(CopyManager, tbl_name, cols)
+        mngr.copy(data_bts)
+        return
+
+    @_copy_method()
+    def copy_parallel(self, tbl_name, data, cols=None, commit=True,
+                      workers=4, lazy=False, push=False, constraint=None,
+                      batch_size=10000):
+        """Copy over a large amount of data using several connections.
+
+        The data is split into batches, which are copied by `workers`
+        threads, each on its own connection, into a shared unlogged staging
+        table. The staging table is then merged into the target table with a
+        single INSERT ... SELECT, which is committed along with the rest of
+        the copy transaction.
+
+        Parameters
+        ----------
+        tbl_name : str
+            The name of the table to copy into.
+        data : iterable
+            A list or generator of tuples, one per row.
+        cols : tuple
+            The columns given in each row of the data.
+        commit : bool
+            If True (default), commit the merge.
+        workers : int
+            The number of connections to copy over in parallel.
+        lazy : bool
+            If True, skip rows that violate `constraint` (or any constraint
+            if none is given), as with `copy_lazy`.
+        push : bool
+            If True, update existing rows that conflict with `constraint`
+            (which will be inferred if not given), as with `copy_push`.
+        constraint : str
+            The name of the constraint to check for lazy or push copies.
+        batch_size : int
+            The number of rows handed to a worker at a time.
+        """
+        if lazy and push:
+            raise ValueError("A copy cannot be both lazy and push.")
+        cols, data_bts = self._prep_copy(tbl_name, data, cols)
+        if push and constraint is None:
+            constraint = self._infer_constraint(tbl_name, cols)
+
+        # Create the staging table, and commit it so the workers can see it.
+        schema = self.tables[tbl_name].__table__.schema or 'public'
+        stage_name = '%s_stage_%d' % (tbl_name, abs(self.make_copy_batch_id()))
+        col_str = '"' + '", "'.join(cols) + '"'
+        drop_sql = ('DROP TABLE IF EXISTS "{schema}"."{stage}";'
+                    .format(schema=schema, stage=stage_name))
+        stage_conn = self.engine.raw_connection()
+        merged = False
+        try:
+            cursor = stage_conn.cursor()
+            cursor.execute('CREATE UNLOGGED TABLE "{schema}"."{stage}" AS '
+                           'SELECT {cols} FROM "{schema}"."{table}" '
+                           'WITH NO DATA;'
+                           .format(schema=schema, stage=stage_name,
+                                   cols=col_str, table=tbl_name))
+            stage_conn.commit()
+
+            self._copy_to_stage(schema, stage_name, cols, data_bts, workers,
+                                batch_size)
+
+            # Merge the staged rows into the target table.
+            merge_sql = ('INSERT INTO "{schema}"."{table}" ({cols})\n'
+                         'SELECT {cols} FROM "{schema}"."{stage}"'
+                         .format(schema=schema, table=tbl_name, cols=col_str,
+                                 stage=stage_name))
+            if lazy:
+                merge_sql += '\nON CONFLICT '
+                if constraint:
+                    merge_sql += 'ON CONSTRAINT "%s" ' % constraint
+                merge_sql += 'DO NOTHING'
+            elif push:
+                update = ', '.join('{0} = EXCLUDED.{0}'.format(c)
+                                   for c in cols)
+                merge_sql += ('\nON CONFLICT ON CONSTRAINT "%s" DO UPDATE '
+                              'SET %s' % (constraint, update))
+            logger.debug(merge_sql)
+            cursor = self.get_copy_cursor()
+            cursor.execute(merge_sql + ';')
+
+            # The merge holds a lock on the staging table until it commits,
+            # so the table must be dropped in the same transaction.
+            cursor.execute(drop_sql)
+            merged = True
+        except Exception:
+            if self._conn is not None:
+                self._conn.rollback()
+                self._conn = None
+            raise
+        finally:
+            try:
+                if not merged:
+                    stage_conn.rollback()
+                    stage_conn.cursor().execute(drop_sql)
+                    stage_conn.commit()
+            except Exception as e:
+                logger.warning("Failed to drop staging table %s: %s"
+                               % (stage_name, e))
+            finally:
+                stage_conn.close()
+        return
+
+    def _copy_to_stage(self, schema, stage_name, cols, data_bts, workers,
+                       batch_size):
+        """Copy the data into a staging table over several connections."""
+        batches = Queue(maxsize=2*workers)
+        errors = []
+
+        def iter_rows(done):
+            while True:
+                batch = batches.get()
+                if batch is None:
+                    done.append(True)
+                    return
+                yield from batch
+
+        def work():
+            done = []
+            conn = self.engine.raw_connection()
+            try:
+                mngr = self._get_copy_manager(
+                    CopyManager, '%s.%s' % (schema, stage_name), cols,
+                    conn=conn
+                )
+                mngr.copy(iter_rows(done))
+                conn.commit()
+            except Exception as e:
+                logger.exception(e)
+                errors.append(e)
+                conn.rollback()
+
+                # Keep draining the queue so the producer doesn't block.
+                if not done:
+                    for _ in iter_rows(done):
+                        pass
+            finally:
+                conn.close()
+
+        threads = [Thread(target=work) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            for batch in batch_iter(data_bts, batch_size):
+                if errors:
+                    break
+                batches.put(list(batch))
+        finally:
+            for _ in threads:
+                batches.put(None)
+            for thread in threads:
+                thread.join()
+
+        if errors:
+            raise IndraDbException("Failed to copy into %s: %s"
+                                   % (stage_name, errors[0]))
         return
 
     def filter_query(self, tbls, *args):
@@ -824,6 +1401,83 @@ class DatabaseManager(object):
             if i != skip_idx:
                 yield i, batch
 
+    def select_all_keyset(self, batch_size, tbls, *args, key, after=None,
+                          skip_range=None):
+        """Load the results of a query in batches, paging on a unique key.
+
+        Unlike `select_all_batched`, which streams one large ordered query,
+        each batch here is a separate query of the form
+
+            WHERE key > :last_key ORDER BY key LIMIT :batch_size
+
+        so every batch is a short index range scan, the iteration may start
+        part way through the table (`after`), and a range of keys may be
+        excluded on the server (`skip_range`) rather than being fetched and
+        then discarded. This makes repeated passes over a table, as done in
+        preassembly, much cheaper.
+
+        No named (server-side) cursor is used. A named cursor holds one
+        query, and its open transaction, for the whole iteration, whereas
+        each keyset batch is a new, short range scan that is fetched in full
+        leaves nothing open between batches. Callers may therefore nest
+        iterations, or make other queries on the same session, between
+        batches, as preassembly does.
+
+        Parameters
+        ----------
+        batch_size : int
+            The maximum number of rows in each batch.
+        tbls, *args
+            The tables or columns to select, and any filter clauses, as in
+            `select_all`.
+        key : column attribute
+            A unique, indexed column on which to order and page, for example
+            `db.PAStatements.mk_hash`.
+        after : value or None
+            If given, only rows with a key strictly greater than this value
+            are returned.
+        skip_range : tuple or None
+            If given, a (min, max) pair of keys. Rows with keys in that range,
+            inclusive, are excluded.
+
+        Yields
+        ------
+        i, batch, key_range
+            The index of the batch, the list of results (shaped as in
+            `select_all`), and the (min, max) keys of the batch. The max may be
+            used as `after` to resume, and the pair as another `skip_range`.
+        """
+        single_entity = not isinstance(tbls, (list, tuple)) \
+            and not isinstance(tbls, InstrumentedAttribute)
+        if not isinstance(tbls, (list, tuple)):
+            tbls = [tbls]
+        tbls = [self.tables[tbl] if isinstance(tbl, str) else tbl
+                for tbl in tbls]
+        clauses = list(args)
+        if skip_range is not None:
+            lo, hi = skip_range
+            clauses.append(or_(key < lo, key > hi))
+
+        last_key = after
+        i = 0
+        while True:
+            q = self.filter_query([key] + list(tbls), *clauses)
+            if last_key is not None:
+                q = q.filter(key > last_key)
+            rows = q.order_by(key).limit(batch_size).all()
+            if not rows:
+                return
+            last_key = rows[-1][0]
+            key_range = (rows[0][0], last_key)
+            if single_entity:
+                batch = [row[1] for row in rows]
+            else:
+                batch = [tuple(row[1:]) for row in rows]
+            yield i, batch, key_range
+            if len(rows) < batch_size:
+                return
+            i += 1
+
     def select_sample_from_table(self, number, table, *args, **kwargs):
         """Select a number of random samples from the given table.
 
@@ -886,8 +1540,20 @@ class DatabaseManager(object):
                 '-w',  # Don't prompt for a password, forces use of env.
                 '-d', self.url.database]
 
-    def pg_dump(self, dump_file, **options):
-        """Use the pg_dump command to dump part of the database onto s3.
+    @staticmethod
+    def _resolve_dump_location(dump_file):
+        """Get an S3Path, or a local path, from the given dump location."""
+        if isinstance(dump_file, S3Path):
+            return dump_file
+        if isinstance(dump_file, str):
+            if dump_file.startswith('s3://'):
+                return S3Path.from_string(dump_file)
+            return dump_file
+        raise ValueError("Argument `dump_file` must be an S3Path object, or a "
+                         "string s3 or local path, not %s." % type(dump_file))
+
+    def pg_dump(self, dump_file, jobs=None, **options):
+        """Use the pg_dump command to dump part of the database.
 
         The `pg_dump` tool must be installed, and must be a compatible version
         with the database(s) being used.
@@ -900,20 +1566,29 @@ class DatabaseManager(object):
         most likely specification you will want to use is `--table` or
         `--schema`, specifying either a particular table or schema to dump.
 
+        If `jobs` is given, the dump is made in the directory format with that
+        many parallel jobs, and a manifest of the checksums of its files is
+        written with it. For an s3 location, the dump is made in a temporary
+        local directory, and its files are then uploaded in parallel multipart
+        chunks under the s3 path, which acts as a prefix. Otherwise, a single
+        file in the custom format is written, and for s3 it is piped through
+        this machine.
+
         Parameters
         ----------
         dump_file : S3Path or str
-            The location on s3 where the content should be dumped.
+            The location where the content should be dumped: an s3 path, or a
+            local path.
+        jobs : int or None
+            The number of parallel jobs to use for a directory-format dump.
+            Default is None, meaning a single-file custom-format dump.
         """
-        if isinstance(dump_file, str):
-            dump_file = S3Path.from_string(dump_file)
-        elif dump_file is not None and not isinstance(dump_file, S3Path):
-            raise ValueError("Argument `dump_file` must be appropriately "
-                             "formatted string or S3Path object, not %s."
-                             % type(dump_file))
+        dump_file = self._resolve_dump_location(dump_file)
 
         from subprocess import check_call
-        from os import environ
+        from tempfile import TemporaryDirectory
+        from os import environ, path
+        from indra_db.util.dump_files import write_checksums, upload_dump_dir
 
         # Make sure the session is fresh and any previous session are done.
         self.session.close()
@@ -923,13 +1598,34 @@ class DatabaseManager(object):
         my_env = environ.copy()
         my_env['PGPASSWORD'] = self.url.password
 
-        # Dump the database onto s3, piping through this machine (errors if
-        # anything went wrong).
         option_list = [f'--{opt}' if isinstance(val, bool) and val
                        else f'--{opt}={val}' for opt, val in options.items()]
-        cmd = ' '.join(["pg_dump", *self._form_pg_args(), *option_list, '-Fc',
-                        '|', 'aws', 's3', 'cp', '-', dump_file.to_string()])
-        check_call(cmd, shell=True, env=my_env)
+        base_cmd = ["pg_dump", *self._form_pg_args(), *option_list]
+
+        if jobs is None:
+            if isinstance(dump_file, S3Path):
+                # Dump the database onto s3, piping through this machine
+                # (errors if anything went wrong).
+                cmd = ' '.join(base_cmd + ['-Fc', '|', 'aws', 's3', 'cp', '-',
+                                           dump_file.to_string()])
+                check_call(cmd, shell=True, env=my_env)
+            else:
+                check_call(base_cmd + ['-Fc', '-f', dump_file], env=my_env)
+            return dump_file
+
+        def dump_to_dir(dump_dir):
+            logger.info("Dumping to %s with %d jobs." % (dump_dir, jobs))
+            check_call(base_cmd + ['-Fd', '-j', str(jobs), '-f', dump_dir],
+                       env=my_env)
+            write_checksums(dump_dir, jobs)
+
+        if isinstance(dump_file, S3Path):
+            with TemporaryDirectory() as tmp_dir:
+                dump_dir = path.join(tmp_dir, 'dump')
+                dump_to_dir(dump_dir)
+                upload_dump_dir(dump_dir, dump_file, jobs)
+        else:
+            dump_to_dir(dump_file)
         return dump_file
 
     def vacuum(self, analyze=True):
@@ -939,17 +1635,30 @@ class DatabaseManager(object):
         cursor.execute('VACUUM' + (' ANALYZE;' if analyze else ''))
         return
 
-    def pg_restore(self, dump_file, **options):
-        """Load content into the database from a dump file on s3."""
-        if isinstance(dump_file, str):
-            dump_file = S3Path.from_string(dump_file)
-        elif dump_file is not None and not isinstance(dump_file, S3Path):
-            raise ValueError("Argument `dump_file` must be appropriately "
-                             "formatted string or S3Path object, not %s."
-                             % type(dump_file))
+    def pg_restore(self, dump_file, jobs=None, **options):
+        """Load content into the database from a dump.
+
+        The dump may be on s3 or local, and may be a single custom-format
+        file, or a directory-format dump (see `pg_dump`). A directory dump on
+        s3 is downloaded in parallel multipart chunks. The checksums of a
+        directory dump are verified before anything is restored.
+
+        Parameters
+        ----------
+        dump_file : S3Path or str
+            The location of the dump: an s3 path, or a local path.
+        jobs : int or None
+            The number of parallel jobs to use in the restore. This does not
+            apply to a single-file dump on s3, which is piped through this
+            machine. Default is None, meaning a single job.
+        """
+        dump_file = self._resolve_dump_location(dump_file)
 
         from subprocess import run
-        from os import environ
+        from tempfile import TemporaryDirectory
+        from os import environ, path
+        from indra_db.util.dump_files import verify_checksums, \
+            download_dump_dir, is_s3_dump_dir
 
         self.session.close()
         self.grab_session()
@@ -958,14 +1667,31 @@ class DatabaseManager(object):
         my_env = environ.copy()
         my_env['PGPASSWORD'] = self.url.password
 
-        # Pipe the database dump from s3 through this machine into the database
-        logger.info("Dumping into the database.")
         option_list = [f'--{opt}' if isinstance(val, bool) and val
                        else f'--{opt}={val}' for opt, val in options.items()]
-        run(' '.join(['aws', 's3', 'cp', dump_file.to_string(), '-', '|',
-                      'pg_restore', *self._form_pg_args(), *option_list,
-                      '--no-owner']),
-            env=my_env, shell=True, check=True)
+        base_cmd = ['pg_restore', *self._form_pg_args(), *option_list,
+                    '--no-owner']
+        jobs_args = [] if jobs is None else ['-j', str(jobs)]
+        n_workers = jobs or 4
+
+        logger.info("Dumping into the database.")
+        if isinstance(dump_file, S3Path):
+            if is_s3_dump_dir(dump_file):
+                with TemporaryDirectory() as tmp_dir:
+                    dump_dir = path.join(tmp_dir, 'dump')
+                    download_dump_dir(dump_file, dump_dir, n_workers)
+                    run(base_cmd + jobs_args + [dump_dir], env=my_env,
+                        check=True)
+            else:
+                # Pipe the database dump from s3 through this machine into the
+                # database.
+                run(' '.join(['aws', 's3', 'cp', dump_file.to_string(), '-',
+                              '|', *base_cmd]),
+                    env=my_env, shell=True, check=True)
+        else:
+            if path.isdir(dump_file):
+                verify_checksums(dump_file, n_workers)
+            run(base_cmd + jobs_args + [dump_file], env=my_env, check=True)
         self.session.close()
         self.grab_session()
         return dump_file
@@ -973,34 +1699,28 @@ class DatabaseManager(object):
 
 class PrincipalDatabaseManager(DatabaseManager):
     """This class represents the methods special to the principal database."""
-    def __init__(self, host, label=None):
-        super(self.__class__, self).__init__(host, label)
+    def __init__(self, host, label=None, **pool_kwargs):
+        super(self.__class__, self).__init__(host, label, **pool_kwargs)
 
         self.tables = principal_schema.get_schema(self.Base)
         self.readonly = readonly_schema.get_schema(self.Base)
 
+        self._special_tables = {}
         for tbl in (t for d in [self.tables, self.readonly]
                     for t in d.values()):
-            if tbl.__name__ == 'PaStmtSrc':
-                self.__PaStmtSrc = tbl
-            elif tbl.__name__ == 'SourceMeta':
-                self.__SourceMeta = tbl
+            if issubclass(tbl, SpecialColumnTable):
+                self._special_tables[tbl.__name__] = tbl
             else:
                 setattr(self, tbl.__name__, tbl)
 
         self._init_foreign_key_map(principal_schema.foreign_key_map)
         return
 
-    def __getattribute__(self, item):
-        if item == 'PaStmtSrc':
-            self.__PaStmtSrc.load_cols(self.engine)
-            return self.__PaStmtSrc
-        elif item == 'SourceMeta':
-            self.__SourceMeta.load_cols(self.engine)
-            return self.__SourceMeta
-        return super(DatabaseManager, self).__getattribute__(item)
+    PaStmtSrc = _SpecialTableAttr()
+    SourceMeta = _SpecialTableAttr()
 
-    def generate_readonly(self, ro_list=None, allow_continue=True):
+    def generate_readonly(self, ro_list=None, allow_continue=True,
+                          incremental=False, jobs=None, index_jobs=None):
         """Manage the materialized views.
 
         Parameters
@@ -1011,7 +1731,32 @@ class PrincipalDatabaseManager(DatabaseManager):
         allow_continue : bool
             If True (default), continue to build the schema if it already
             exists. If False, give up if the schema already exists.
+        incremental : bool
+            If True, and the schema has been built in full before, only
+            refresh the rows of the statements that have changed since (see
+            `refresh_readonly`). Otherwise the schema is built in full. Default
+            is False.
+        jobs : int or None
+            The number of tables to build at the same time, each on its own
+            connection. A table is built once all the tables it depends on
+            are built (see `_depends_on` in the readonly schema). By default
+            the tables are built one at a time, in order. An incremental
+            refresh is always made one table at a time.
+        index_jobs : int or None
+            The number of indices to build at the same time, in all, on
+            connections of their own (see `IndraDBTable.build_indices`). By
+            default they are built one at a time.
         """
+        if incremental:
+            if self._get_readonly_build_info() is not None:
+                self.refresh_readonly(ro_list)
+                return
+            logger.warning("There is no record of a full build of the "
+                           "readonly schema, so it will be built in full.")
+
+        # Note the state of the principal tables before the build begins, so
+        # that anything added during the build is refreshed later.
+        marks = self._get_readonly_marks()
         if 'readonly' in self.get_schemas():
             if allow_continue:
                 logger.warning("Schema already exists. State could be "
@@ -1025,25 +1770,231 @@ class PrincipalDatabaseManager(DatabaseManager):
             self.create_schema('readonly')
 
         # Create each of the readonly view tables (in order, where necessary).
-        def iter_names():
-            for i, view in enumerate(CREATE_ORDER):
-                yield str(i), view
-            for view in CREATE_UNORDERED:
-                yield '-', view
-
-        for i, ro_name in iter_names():
-            if ro_list is not None and ro_name not in ro_list:
-                continue
+        to_build = [(i, ro_name) for i, ro_name in _iter_readonly_names()
+                    if ro_list is None or ro_name in ro_list]
+        index_limit = None
+        if index_jobs is not None and index_jobs > 1:
+            index_limit = BoundedSemaphore(index_jobs)
+        if jobs is not None and jobs > 1:
+            self._build_readonly_parallel(to_build, jobs, index_jobs,
+                                          index_limit)
+        else:
+            for i, ro_name in to_build:
+                self._build_readonly_table(i, ro_name, index_jobs,
+                                           index_limit)
 
-            ro_tbl = self.readonly[ro_name]
+        if ro_list is None:
+            conn = self.engine.raw_connection()
+            try:
+                self._set_readonly_build_info(conn.cursor(), marks)
+                conn.commit()
+            finally:
+                conn.close()
+        return
 
-            logger.info('[%s] Creating %s readonly table...' % (i, ro_name))
-            ro_tbl.create(self)
-            ro_tbl.build_indices(self)
+    def _build_readonly_table(self, i, ro_name, index_jobs=None,
+                              index_limit=None):
+        ro_tbl = self.readonly[ro_name]
+        logger.info('[%s] Creating %s readonly table...' % (i, ro_name))
+        ro_tbl.create(self)
+        timings = ro_tbl.build_indices(self, jobs=index_jobs,
+                                       limit=index_limit)
+        if timings:
+            logger.info("[%s] Built %d indices of %s, taking %.1f seconds "
+                        "in all (slowest: %s)."
+                        % (i, len(timings), ro_name, sum(timings.values()),
+                           max(timings, key=timings.get)))
+        return timings
+
+    def _build_readonly_parallel(self, to_build, jobs, index_jobs=None,
+                                 index_limit=None):
+        """Build the readonly tables as soon as their dependencies are built.
+
+        Dependencies that are not to be built are assumed to exist already.
+        If any table fails, no more tables are started, and the error is
+        raised once those already started have finished.
+
+        Each running build may hold two connections from the pool (that of
+        its session, and a raw connection), so `jobs` is reduced if the pool
+        is too small to serve them all.
+        """
+        pool = self.engine.pool
+        if isinstance(pool, QueuePool) and pool._max_overflow >= 0:
+            # Leave one connection for the calling thread.
+            max_jobs = max(1, (pool.size() + pool._max_overflow - 1) // 2)
+            if jobs > max_jobs:
+                logger.warning("The connection pool can only serve %d "
+                               "readonly table builds at once, not %d. Give "
+                               "the manager a larger pool_size to build "
+                               "more." % (max_jobs, jobs))
+                jobs = max_jobs
+
+        names = {ro_name for _, ro_name in to_build}
+        deps = {ro_name: set(self.readonly[ro_name]._depends_on) & names
+                for ro_name in names}
+
+        def build(i, ro_name):
+            try:
+                start = datetime.utcnow()
+                self._build_readonly_table(i, ro_name, index_jobs,
+                                           index_limit)
+                logger.info("[%s] Built %s in %s."
+                            % (i, ro_name, datetime.utcnow() - start))
+            finally:
+                self.release_session()
+
+        _run_in_dependency_order(to_build, deps, build, jobs)
         return
 
-    def dump_readonly(self, dump_file=None):
-        """Dump the readonly schema to s3."""
+    def refresh_readonly(self, ro_list=None):
+        """Bring the readonly tables up to date with the principal tables.
+
+        The statements that have changed since the readonly schema was last
+        built or refreshed are those linked to raw statements since then, and
+        those created by the preassembly updates run since then. In each
+        readonly table, in order, the rows for those statements (or for their
+        raw statements or readings) are deleted and rebuilt from the current
+        content, so that their evidence counts and other metadata are also
+        brought up to date. All the changes are made in one transaction.
+
+        Content removed from the principal tables is not removed from the
+        readonly tables; the schema should be built in full after that.
+
+        Parameters
+        ----------
+        ro_list : list or None
+            Default None. A list of readonly table names or None. If None,
+            all defined readonly tables will be refreshed.
+
+        Returns
+        -------
+        counts : OrderedDict
+            The numbers of rows deleted and inserted, as a tuple, keyed by
+            the name of each readonly table refreshed.
+        """
+        build_info = self._get_readonly_build_info()
+        if build_info is None:
+            raise IndraDbException("There is no record of a full build of "
+                                   "the readonly schema to refresh.")
+        marks = self._get_readonly_marks()
+
+        counts = OrderedDict()
+        conn = self.engine.raw_connection()
+        try:
+            cur = conn.cursor()
+            keys = self._get_readonly_refresh_keys(cur, build_info)
+            logger.info("Refreshing the readonly tables for %d statements, "
+                        "%d raw statements, and %d readings."
+                        % (len(keys['mk_hash']), len(keys['sid']),
+                           len(keys['rid'])))
+
+            # Copy the keys into temporary tables rather than writing them
+            # into the SQL of every table. Each is given to the queries as a
+            # scalar sub-query for an array, which postgres evaluates once,
+            # and can still push down into the definitions as a constant.
+            key_arrays = {}
+            for key, vals in keys.items():
+                tmp_name = 'tmp_refresh_%s' % key
+                cur.execute('CREATE TEMP TABLE "%s" (id bigint PRIMARY KEY) '
+                            'ON COMMIT DROP' % tmp_name)
+                cur.copy_expert('COPY "%s" (id) FROM STDIN' % tmp_name,
+                                StringIO(''.join('%d\n' % v for v in vals)))
+                key_arrays[key] = '(SELECT array_agg(id) FROM "%s")' % tmp_name
+            for i, ro_name in _iter_readonly_names():
+                if ro_list is not None and ro_name not in ro_list:
+                    continue
+
+                ro_tbl = self.readonly[ro_name]
+                if not keys[ro_tbl._refresh_key]:
+                    continue
+
+                logger.info('[%s] Refreshing %s readonly table...'
+                            % (i, ro_name))
+                n_deleted, n_inserted = \
+                    ro_tbl.refresh(self, cur, key_arrays[ro_tbl._refresh_key])
+                logger.info("Deleted %d and inserted %d rows of %s."
+                            % (n_deleted, n_inserted, ro_name))
+                counts[ro_name] = (n_deleted, n_inserted)
+            if ro_list is None:
+                self._set_readonly_build_info(cur, marks)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        return counts
+
+    def _get_readonly_marks(self):
+        """Get the state of the principal tables that the readonly reflects."""
+        self.grab_session()
+        last_update = self.session.query(
+            func.max(self.PreassemblyUpdates.run_datetime)
+        ).scalar()
+        max_link_id = self.session.query(func.max(self.RawUniqueLinks.id))\
+            .scalar()
+        return {'last_update': last_update.isoformat() if last_update
+                else None,
+                'max_link_id': max_link_id or 0}
+
+    def _get_readonly_build_info(self):
+        """Get the marks recorded by the last full build, or None."""
+        if 'readonly' not in self.get_schemas():
+            return None
+        with self.engine.connect() as conn:
+            comment = conn.execute(
+                "SELECT obj_description(oid, 'pg_namespace') "
+                "FROM pg_namespace WHERE nspname = 'readonly'"
+            ).scalar()
+        try:
+            return json.loads(comment)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _set_readonly_build_info(cursor, marks):
+        cursor.execute('COMMENT ON SCHEMA readonly IS %s',
+                       (json.dumps(marks),))
+
+    @staticmethod
+    def _get_readonly_refresh_keys(cursor, build_info):
+        """Get the hashes, raw statement ids, and reading ids to refresh."""
+        cursor.execute('SELECT raw_stmt_id, pa_stmt_mk_hash '
+                       'FROM raw_unique_links WHERE id > %s',
+                       (build_info['max_link_id'],))
+        sids = set()
+        mk_hashes = set()
+        for sid, mk_hash in cursor.fetchall():
+            sids.add(sid)
+            mk_hashes.add(mk_hash)
+
+        # Get the statements created by any updates since the last build.
+        if build_info['last_update'] is None:
+            cursor.execute('SELECT min(run_datetime) FROM preassembly_updates')
+        else:
+            cursor.execute('SELECT min(run_datetime) FROM preassembly_updates '
+                           'WHERE run_datetime > %s',
+                           (build_info['last_update'],))
+        since, = cursor.fetchone()
+        if since is not None:
+            cursor.execute('SELECT mk_hash FROM pa_statements '
+                           'WHERE create_date >= %s', (since,))
+            mk_hashes |= {mk_hash for mk_hash, in cursor.fetchall()}
+
+        rids = set()
+        if sids:
+            cursor.execute('SELECT DISTINCT reading_id FROM raw_statements '
+                           'WHERE id = ANY(%s) AND reading_id IS NOT NULL',
+                           (list(sids),))
+            rids = {rid for rid, in cursor.fetchall()}
+        return {'mk_hash': mk_hashes, 'sid': sids, 'rid': rids}
+
+    def dump_readonly(self, dump_file=None, jobs=None):
+        """Dump the readonly schema to s3, or to a local path.
+
+        If `jobs` is given, a directory-format dump is made with that many
+        parallel jobs (see `pg_dump`).
+        """
 
         # Form the name of the s3 file, if not given.
         if dump_file is None:
@@ -1051,7 +2002,7 @@ class PrincipalDatabaseManager(DatabaseManager):
             now_str = datetime.utcnow().strftime('%Y-%m-%d-%H-%M-%S')
             dump_loc = get_s3_dump()
             dump_file = dump_loc.get_element_path('readonly-%s.dump' % now_str)
-        return self.pg_dump(dump_file, schema='readonly')
+        return self.pg_dump(dump_file, jobs=jobs, schema='readonly')
 
     @staticmethod
     def get_latest_dump_file():
@@ -1109,29 +2060,26 @@ class S3DumpTimeAmbiguityError(Exception):
 class ReadonlyDatabaseManager(DatabaseManager):
     """This class represents the readonly database."""
 
-    def __init__(self, host, label=None):
-        super(self.__class__, self).__init__(host, label)
+    def __init__(self, host, label=None, **pool_kwargs):
+        super(self.__class__, self).__init__(host, label, **pool_kwargs)
 
         self.tables = readonly_schema.get_schema(self.Base)
+        self._special_tables = {}
         for tbl in self.tables.values():
-            if tbl.__name__ == 'PaStmtSrc':
-                self.__PaStmtSrc = tbl
-            elif tbl.__name__ == 'SourceMeta':
-                self.__SourceMeta = tbl
+            if issubclass(tbl, SpecialColumnTable):
+                self._special_tables[tbl.__name__] = tbl
             else:
                 setattr(self, tbl.__name__, tbl)
 
-    def __getattribute__(self, item):
-        if item == 'PaStmtSrc':
-            self.__PaStmtSrc.load_cols(self.engine)
-            return self.__PaStmtSrc
-        elif item == 'SourceMeta':
-            self.__SourceMeta.load_cols(self.engine)
-            return self.__SourceMeta
-        return super(DatabaseManager, self).__getattribute__(item)
+    PaStmtSrc = _SpecialTableAttr()
+    SourceMeta = _SpecialTableAttr()
 
-    def load_dump(self, dump_file, force_clear=True):
-        """Load from a dump of the readonly schema on s3."""
+    def load_dump(self, dump_file, force_clear=True, jobs=None):
+        """Load from a dump of the readonly schema on s3, or a local path.
+
+        If `jobs` is given, the restore uses that many parallel jobs (see
+        `pg_restore`).
+        """
 
         # Make sure the database is clear.
         if 'readonly' in self.get_schemas():
@@ -1143,7 +2091,7 @@ class ReadonlyDatabaseManager(DatabaseManager):
                                        "is False.")
 
         # Do the restore
-        self.pg_restore(dump_file)
+        self.pg_restore(dump_file, jobs=jobs)
 
         # Run Vacuuming
         logger.info("Running vacuuming.")
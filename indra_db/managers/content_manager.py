@@ -24,7 +24,7 @@ from indra.literature import pubmed_client
 from indra.literature.pmc_client import id_lookup
 from indra.util import UnicodeXMLTreeBuilder as UTB
 
-from indra_db.util import get_primary_db, get_db
+from indra_db.util import get_primary_db, get_db, in_values
 from indra_db.databases import texttypes, formats
 from indra_db.databases import sql_expressions as sql_exp
 from indra_db.util.data_gatherer import DataGatherer, DGContext
@@ -621,7 +621,7 @@ class Pubmed(_NihManager):
         if not carefully:
             existing_pmids = set(db.get_values(db.select_all(
                 db.TextRef,
-                db.TextRef.pmid.in_(valid_pmids)
+                in_values(db.TextRef.pmid, valid_pmids)
                 ), 'pmid'))
             logger.info(
                 "%d valid PMIDs already in text_refs." % len(existing_pmids)
@@ -667,7 +667,8 @@ class Pubmed(_NihManager):
                           carefully=False):
 
         # Build a dict mapping PMIDs to text_ref IDs
-        tr_qry = db.filter_query(db.TextRef, db.TextRef.pmid.in_(valid_pmids))
+        tr_qry = db.filter_query(db.TextRef,
+                                 in_values(db.TextRef.pmid, valid_pmids))
         tref_list = tr_qry.all()
         if not carefully:
             # This doesn't check if there are any existing refs.
@@ -11,6 +11,7 @@ from indra_db.belief import get_belief
 from indra_db.config import CONFIG
 from indra_db.config import get_s3_dump
 from indra_db.util import get_db, get_ro, S3Path
+from indra_db.util.dump_files import CHECKSUM_FILE
 from indra_db.util.dump_sif import dump_sif, get_source_counts
 
 
@@ -223,16 +224,45 @@ class Readonly(Dumper):
     name = 'readonly'
     fmt = 'dump'
 
+    def __init__(self, db_label='primary', jobs=None, incremental=False,
+                 **kwargs):
+        self.jobs = jobs
+        self.incremental = incremental
+        super(Readonly, self).__init__(db_label, **kwargs)
+
+    @classmethod
+    def from_list(cls, s3_path_list):
+        # A directory-format dump is a prefix with many files under it. It is
+        # only complete once its manifest of checksums, which is uploaded
+        # last, is there, so a partial upload is not taken for a dump.
+        suffix = '%s.%s' % (cls.name, cls.fmt)
+        manifest_suffix = '%s/%s' % (suffix, CHECKSUM_FILE)
+        for p in s3_path_list:
+            if not cls.is_dump_path(p):
+                continue
+            if p.key.endswith(suffix):
+                return p
+            if p.key.endswith(manifest_suffix):
+                return S3Path(p.bucket,
+                              p.key[:-len(manifest_suffix) + len(suffix)])
+        return None
+
     def dump(self, continuing=False):
-        principal_db = get_db(self.db_label)
+        # Each table built in parallel may hold two pooled connections.
+        pool_kwargs = {}
+        if self.jobs is not None and self.jobs > 1:
+            pool_kwargs = {'pool_size': 2 * self.jobs + 1}
+        principal_db = get_db(self.db_label, **pool_kwargs)
 
         logger.info("%s - Generating readonly schema (est. a long time)"
                     % datetime.now())
-        principal_db.generate_readonly(allow_continue=continuing)
+        principal_db.generate_readonly(allow_continue=continuing,
+                                       incremental=self.incremental,
+                                       jobs=self.jobs)
 
         logger.info("%s - Beginning dump of database (est. 1 + epsilon hours)"
                     % datetime.now())
-        principal_db.dump_readonly(self.get_s3_path())
+        principal_db.dump_readonly(self.get_s3_path(), jobs=self.jobs)
         return
 
 
@@ -252,14 +282,14 @@ class StatementHashMeshId(Dumper):
         s3.put_object(Body=pickle.dumps(q.all()), **self.get_s3_path().kw())
 
 
-def load_readonly_dump(db_label, ro_label, dump_file):
+def load_readonly_dump(db_label, ro_label, dump_file, jobs=None):
     principal_db = get_db(db_label)
     readonly_db = get_ro(ro_label)
     logger.info("Using dump_file = \"%s\"." % dump_file)
     logger.info("%s - Beginning upload of content (est. ~30 minutes)"
                 % datetime.now())
     with ReadonlyTransferEnv(principal_db, readonly_db):
-        readonly_db.load_dump(dump_file)
+        readonly_db.load_dump(dump_file, jobs=jobs)
 
 
 def uncamel(word):
@@ -358,6 +388,26 @@ def parse_args():
               'readonly database.')
     )
 
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        help=('The number of parallel jobs to use when building, dumping, and '
+              'loading the readonly schema. If given, independent readonly '
+              'tables are built at the same time, and the dump is made in the '
+              'directory format, and transferred to and from s3 in parallel. '
+              'By default tables are built one at a time, and a single-file '
+              'dump is piped through this machine.')
+    )
+
+    parser.add_argument(
+        '-i', '--incremental',
+        action='store_true',
+        help=('Refresh only the parts of an existing readonly schema that '
+              'have changed since it was built, rather than building it anew. '
+              'The schema is kept on the principal database afterwards, for '
+              'the next refresh.')
+    )
+
     args = parser.parse_args()
     return args
 
@@ -375,7 +425,8 @@ def main():
         ro_dumper = Readonly.from_list(starter.manifest)
         if not args.allow_continue or not ro_dumper:
             logger.info("Generating readonly schema (est. a long time)")
-            ro_dumper = Readonly(date_stamp=starter.date_stamp)
+            ro_dumper = Readonly(date_stamp=starter.date_stamp,
+                                 jobs=args.jobs, incremental=args.incremental)
             ro_dumper.dump(continuing=args.allow_continue)
         else:
             logger.info("Readonly dump exists, skipping.")
@@ -425,9 +476,10 @@ def main():
     dump_file = ro_dumper.get_s3_path()
 
     if not args.dump_only:
-        load_readonly_dump(args.database, args.readonly, dump_file)
+        load_readonly_dump(args.database, args.readonly, dump_file,
+                           jobs=args.jobs)
 
-    if not args.load_only:
+    if not args.load_only and not args.incremental:
         # This database no longer needs this schema (this only executes if
         # the check_call does not error).
         principal_db.session.close()
@@ -19,7 +19,7 @@ from indra.ontology.bio import bio_ontology
 
 from indra_db.util.data_gatherer import DataGatherer, DGContext
 from indra_db.util import insert_pa_stmts, distill_stmts, get_db, \
-    extract_agent_data, insert_pa_agents, hash_pa_agents
+    extract_agent_data, insert_pa_agents, hash_pa_agents, in_values
 
 site_logger.setLevel(logging.INFO)
 grounding_logger.setLevel(logging.WARNING)
@@ -96,7 +96,8 @@ class PreassemblyManager(object):
             subres = (db.filter_query([db.RawStatements.id,
                                        db.RawStatements.json,
                                        db.TextRef],
-                                      db.RawStatements.id.in_(stmt_id_batch))
+                                      in_values(db.RawStatements.id,
+                                                stmt_id_batch))
                         .outerjoin(db.Reading)
                         .outerjoin(db.TextContent)
                         .outerjoin(db.TextRef)
@@ -269,22 +270,23 @@ class PreassemblyManager(object):
 
         # Now get the support links between all batches.
         support_links = set()
-        outer_iter = db.select_all_batched(self.batch_size,
-                                           db.PAStatements.json,
-                                           order_by=db.PAStatements.mk_hash)
-        for outer_idx, outer_batch_jsons in outer_iter:
+        outer_iter = db.select_all_keyset(self.batch_size,
+                                          db.PAStatements.json,
+                                          key=db.PAStatements.mk_hash)
+        for outer_idx, outer_batch_jsons, outer_range in outer_iter:
             outer_batch = [_stmt_from_json(sj) for sj, in outer_batch_jsons]
             # Get internal support links
             self._log('Getting internal support links outer batch %d.'
                       % outer_idx)
             some_support_links = self._get_support_links(outer_batch)
 
-            # Get links with all other batches
-            inner_iter = db.select_all_batched(self.batch_size,
-                                               db.PAStatements.json,
-                                               order_by=db.PAStatements.mk_hash,
-                                               skip_idx=outer_idx)
-            for inner_idx, inner_batch_jsons in inner_iter:
+            # Get links with all other batches, leaving out the outer batch's
+            # range of hashes in the database rather than fetching it.
+            inner_iter = db.select_all_keyset(self.batch_size,
+                                              db.PAStatements.json,
+                                              key=db.PAStatements.mk_hash,
+                                              skip_range=outer_range)
+            for inner_idx, inner_batch_jsons, _ in inner_iter:
                 inner_batch = [_stmt_from_json(sj) for sj, in inner_batch_jsons]
                 split_idx = len(inner_batch)
                 full_list = inner_batch + outer_batch
@@ -436,9 +438,9 @@ class PreassemblyManager(object):
                          db.PAStatements.json,
                          db.PAStatements.create_date >= start_date,
                          db.PAStatements.create_date <= end_date)
-        npa_json_iter = db.select_all_batched(*batching_args,
-                                              order_by=db.PAStatements.mk_hash)
-        for outer_idx, npa_json_batch in npa_json_iter:
+        npa_json_iter = db.select_all_keyset(*batching_args,
+                                             key=db.PAStatements.mk_hash)
+        for outer_idx, npa_json_batch, outer_range in npa_json_iter:
             # Create the statements from the jsons.
             npa_batch = []
             for s_json, in npa_json_batch:
@@ -452,12 +454,12 @@ class PreassemblyManager(object):
 
             try:
                 # Compare against the other new batch statements.
-                other_npa_json_iter = db.select_all_batched(
+                other_npa_json_iter = db.select_all_keyset(
                     *batching_args,
-                    order_by=db.PAStatements.mk_hash,
-                    skip_idx=outer_idx
+                    key=db.PAStatements.mk_hash,
+                    skip_range=outer_range
                 )
-                for inner_idx, other_npa_json_batch in other_npa_json_iter:
+                for inner_idx, other_npa_json_batch, _ in other_npa_json_iter:
                     other_npa_batch = [_stmt_from_json(s_json)
                                        for s_json, in other_npa_json_batch]
                     split_idx = len(npa_batch)
@@ -468,12 +470,13 @@ class PreassemblyManager(object):
                         self._get_support_links(full_list, split_idx=split_idx)
 
                 # Compare against the existing statements.
-                opa_json_iter = db.select_all_batched(
+                opa_json_iter = db.select_all_keyset(
                     self.batch_size,
                     db.PAStatements.json,
-                    db.PAStatements.create_date < start_date
+                    db.PAStatements.create_date < start_date,
+                    key=db.PAStatements.mk_hash
                 )
-                for opa_idx, opa_json_batch in opa_json_iter:
+                for opa_idx, opa_json_batch, _ in opa_json_iter:
                     opa_batch = [_stmt_from_json(s_json)
                                  for s_json, in opa_json_batch]
                     split_idx = len(npa_batch)
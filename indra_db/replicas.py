@@ -0,0 +1,200 @@
+"""Route the reads of a DatabaseManager across read replicas.
+
+A `ReplicaSet` holds an engine for each replica, keeps track of which are
+healthy, and chooses one for each read, either in turn ('round_robin') or by
+the fewest connections in use ('least_loaded'). A replica that fails to
+connect, or drops its connection, is set aside, and checked again once
+`check_interval` seconds have passed. If no replica is healthy, reads go to
+the primary.
+
+A `RoutingSession` uses the replica set for plain reads. All the reads of a
+transaction go to the same replica, so they share one snapshot and one
+connection. Writes, locking reads, raw SQL other than a SELECT, and any read
+in a transaction that has already written go to the primary, so a
+transaction always sees its own writes. Once it is committed, though, its
+writes may not yet have reached the replicas. Copies use a raw connection to
+the primary, and so are never routed.
+"""
+
+__all__ = ['ReplicaSet', 'RoutingSession']
+
+import logging
+from threading import Lock
+from time import monotonic
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import Select, TextClause
+
+logger = logging.getLogger(__name__)
+
+
+class _Replica(object):
+    def __init__(self, engine):
+        self.engine = engine
+        self.healthy = True
+        self.failed_at = None
+
+    def load(self):
+        checkedout = getattr(self.engine.pool, 'checkedout', None)
+        return checkedout() if checkedout is not None else 0
+
+
+class ReplicaSet(object):
+    """A set of read replicas, with health checks and failover.
+
+    Parameters
+    ----------
+    engines : list
+        The sqlalchemy engines of the replicas.
+    policy : str
+        How to choose a replica: 'round_robin' (default) or 'least_loaded'.
+    check_interval : float
+        The number of seconds to wait before checking again whether a failed
+        replica has recovered. Default is 30.
+    """
+    policies = {'round_robin', 'least_loaded'}
+
+    def __init__(self, engines, policy='round_robin', check_interval=30):
+        if policy not in self.policies:
+            raise ValueError("Unknown replica policy %s, expected one of %s."
+                             % (policy, self.policies))
+        self.policy = policy
+        self.check_interval = check_interval
+        self._replicas = [_Replica(engine) for engine in engines]
+        self._lock = Lock()
+        self._next = 0
+        for replica in self._replicas:
+            self._listen_for_failures(replica)
+
+    def __len__(self):
+        return len(self._replicas)
+
+    @property
+    def engines(self):
+        return [replica.engine for replica in self._replicas]
+
+    def _listen_for_failures(self, replica):
+        def on_error(context):
+            if context.connection is None or context.is_disconnect:
+                self.mark_failed(replica)
+
+        event.listen(replica.engine, 'handle_error', on_error)
+
+    def mark_failed(self, replica):
+        with self._lock:
+            if replica.healthy:
+                logger.warning("Replica %s failed; routing reads elsewhere."
+                               % replica.engine.url)
+            replica.healthy = False
+            replica.failed_at = monotonic()
+
+    def check(self, replica):
+        """Check whether a replica can serve queries, and record the result."""
+        try:
+            with replica.engine.connect() as conn:
+                conn.execute(text('SELECT 1'))
+        except Exception as e:
+            logger.debug("Health check of %s failed: %s"
+                         % (replica.engine.url, e))
+            self.mark_failed(replica)
+            return False
+        with self._lock:
+            if not replica.healthy:
+                logger.info("Replica %s has recovered." % replica.engine.url)
+            replica.healthy = True
+            replica.failed_at = None
+        return True
+
+    def check_all(self):
+        """Check every replica, returning the number that are healthy."""
+        return sum(self.check(replica) for replica in self._replicas)
+
+    def _get_healthy(self):
+        now = monotonic()
+        due = []
+        with self._lock:
+            healthy = [r for r in self._replicas if r.healthy]
+            for r in self._replicas:
+                if not r.healthy and now - r.failed_at > self.check_interval:
+                    # Don't check again until the interval has passed anew.
+                    r.failed_at = now
+                    due.append(r)
+        healthy += [r for r in due if self.check(r)]
+        return healthy
+
+    def choose(self):
+        """Get the engine of a healthy replica, or None if there are none."""
+        healthy = self._get_healthy()
+        if not healthy:
+            return None
+        if self.policy == 'least_loaded':
+            return min(healthy, key=lambda r: r.load()).engine
+        with self._lock:
+            replica = healthy[self._next % len(healthy)]
+            self._next += 1
+        return replica.engine
+
+
+class RoutingSession(Session):
+    """A session that sends plain reads to a replica, and all else to primary.
+
+    Parameters
+    ----------
+    replicas : ReplicaSet or None
+        The replicas to use for reads. If None, everything goes to the bound
+        (primary) engine.
+    """
+    def __init__(self, replicas=None, **kwargs):
+        super(RoutingSession, self).__init__(**kwargs)
+        self.replicas = replicas
+        self._has_written = False
+        self._replica = None
+
+    def _is_write(self, clause):
+        if self._flushing:
+            return True
+        if clause is None:
+            # Nothing is known of the statement, as when a connection is
+            # asked for with `Session.connection()`, so treat it as a read.
+            return False
+        if isinstance(clause, Select):
+            return clause._for_update_arg is not None
+        if isinstance(clause, TextClause):
+            return not clause.text.lstrip().upper().startswith('SELECT')
+        return True
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.replicas and not self._has_written:
+            if self._is_write(clause):
+                # Stay on the primary until the end of the transaction.
+                self._has_written = True
+            else:
+                # Use one replica for the whole transaction.
+                if self._replica is None:
+                    self._replica = self.replicas.choose()
+                if self._replica is not None:
+                    return self._replica
+        return super(RoutingSession, self).get_bind(mapper, clause, **kwargs)
+
+    def _reset_routing(self):
+        self._has_written = False
+        self._replica = None
+
+    def commit(self):
+        try:
+            super(RoutingSession, self).commit()
+        finally:
+            self._reset_routing()
+
+    def rollback(self):
+        try:
+            super(RoutingSession, self).rollback()
+        finally:
+            self._reset_routing()
+
+    def close(self):
+        try:
+            super(RoutingSession, self).close()
+        finally:
+            self._reset_routing()
@@ -1,7 +1,14 @@
+import json
 import logging
+from time import perf_counter
+from threading import Lock
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 from psycopg2.errors import DuplicateTable
-from sqlalchemy import inspect, Column, BigInteger
+from sqlalchemy import create_engine, inspect, text, Column, BigInteger
 from sqlalchemy.exc import NoSuchTableError
+from sqlalchemy.pool import NullPool
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +20,7 @@ class IndraDBTable(object):
     _default_insert_order_by = 'id'
 
     @classmethod
-    def create_index(cls, db, index, commit=True):
+    def create_index(cls, db, index, commit=True, settings=None, engine=None):
         inp_data = {'idx_name': index.name,
                     'full_name': cls.full_name(force_schema=True),
                     'idx_def': index.definition}
@@ -21,23 +28,104 @@ class IndraDBTable(object):
                "USING {idx_def} TABLESPACE pg_default;".format(**inp_data))
         if commit:
             try:
-                cls.execute(db, sql)
+                cls.execute(db, sql, settings, engine)
             except DuplicateTable:
                 logger.info("%s exists, skipping." % index.name)
         return sql
 
     @classmethod
-    def build_indices(cls, db):
-        for index in cls._indices:
-            logger.info("Building index: %s" % index.name)
-            cls.create_index(db, index)
+    def build_indices(cls, db, jobs=None, maintenance_work_mem=None,
+                      parallel_workers=None, limit=None):
+        """Build the indices of this table, and get the time each one took.
+
+        Each index is built on its own connection, made for the purpose
+        rather than taken from the manager's pool, as a build may take hours.
+        If given, maintenance_work_mem and max_parallel_maintenance_workers
+        (on postgres 11 and above) are set for the transaction that builds
+        each index. Note that every build running at once may use that much
+        memory.
+
+        Parameters
+        ----------
+        db : DatabaseManager
+            The database on which to build the indices.
+        jobs : int or None
+            The number of indices to build at the same time. By default they
+            are built one at a time.
+        maintenance_work_mem : str or None
+            The memory each index build may use, e.g. '1GB'. By default, the
+            server's setting is used.
+        parallel_workers : int or None
+            The number of parallel workers each index build may use. By
+            default, the server's setting is used.
+        limit : threading.Semaphore or None
+            A semaphore, shared with the index builds of other tables, that
+            must be held while building each index. This caps the number of
+            indices built at once across several tables.
+
+        Returns
+        -------
+        timings : OrderedDict
+            The number of seconds taken to build each index, keyed by name.
+        """
+        if not cls._indices:
+            return OrderedDict()
+
+        engine = create_engine(db.engine.url, poolclass=NullPool)
+        try:
+            settings = {}
+            if maintenance_work_mem is not None:
+                settings['maintenance_work_mem'] = maintenance_work_mem
+            if parallel_workers is not None:
+                engine.connect().close()
+                if engine.dialect.server_version_info >= (11,):
+                    settings['max_parallel_maintenance_workers'] = \
+                        str(parallel_workers)
+
+            def build(index):
+                if limit is not None:
+                    limit.acquire()
+                try:
+                    logger.info("Building index: %s" % index.name)
+                    start = perf_counter()
+                    cls.create_index(db, index, settings=settings,
+                                     engine=engine)
+                    duration = perf_counter() - start
+                finally:
+                    if limit is not None:
+                        limit.release()
+                logger.info("Built index %s in %.1f seconds."
+                            % (index.name, duration))
+                return duration
+
+            if jobs is not None and jobs > 1:
+                with ThreadPoolExecutor(jobs) as pool:
+                    durations = list(pool.map(build, cls._indices))
+            else:
+                durations = [build(index) for index in cls._indices]
+        finally:
+            engine.dispose()
+        return OrderedDict((index.name, duration) for index, duration
+                           in zip(cls._indices, durations))
 
     @staticmethod
-    def execute(db, sql):
-        conn = db.engine.raw_connection()
-        cursor = conn.cursor()
-        cursor.execute(sql)
-        conn.commit()
+    def execute(db, sql, settings=None, engine=None):
+        """Execute and commit some SQL on a raw connection.
+
+        The connection is taken from `engine` if given, or else from the
+        engine of `db`. Any `settings` are set for the transaction only, so
+        they do not outlive it on a pooled connection.
+        """
+        conn = (db.engine if engine is None else engine).raw_connection()
+        try:
+            cursor = conn.cursor()
+            for name, value in (settings or {}).items():
+                cursor.execute('SELECT set_config(%s, %s, true)',
+                               (name, value))
+            cursor.execute(sql)
+            conn.commit()
+        finally:
+            conn.close()
         return
 
     @classmethod
@@ -114,6 +202,14 @@ class ReadonlyTable(IndraDBTable):
     # which entries were inserted. They were inserted all at once.
     _default_insert_order_by = NotImplemented
 
+    # The names of the readonly tables this table is built from, which must
+    # be built before it.
+    _depends_on = []
+
+    # The column by which rows are replaced in an incremental refresh: one of
+    # 'mk_hash', 'sid' (a raw statement id), or 'rid' (a reading id).
+    _refresh_key = 'mk_hash'
+
     @classmethod
     def create(cls, db, commit=True):
         sql = cls.__create_table_fmt__ \
@@ -127,8 +223,69 @@ class ReadonlyTable(IndraDBTable):
     def get_definition(cls):
         return cls.__definition__
 
+    @classmethod
+    def get_refresh_definition(cls, db, cursor, keys_sql):
+        """Get the definition of only those rows with the given keys.
+
+        `keys_sql` is a SQL expression for an array of the values of the
+        `_refresh_key` column, such as a scalar sub-query.
+        By default the condition is applied to the full definition, which
+        postgres pushes down into the underlying tables; tables where it
+        cannot do so should apply the condition themselves.
+        """
+        return ('SELECT * FROM (%s) AS new WHERE new.%s = ANY(%s)'
+                % (cls.get_definition(), cls._refresh_key, keys_sql))
+
+    @classmethod
+    def _get_table_columns(cls, cursor):
+        cursor.execute("SELECT column_name FROM information_schema.columns "
+                       "WHERE table_schema = %s AND table_name = %s "
+                       "ORDER BY ordinal_position",
+                       (cls.__table_args__.get('schema', 'public'),
+                        cls.__tablename__))
+        return [col for col, in cursor.fetchall()]
+
+    @classmethod
+    def refresh(cls, db, cursor, keys_sql):
+        """Replace the rows with the given keys with their current values.
+
+        The deletion and insertion are executed with the given cursor, and
+        are not committed. The numbers of rows deleted and inserted are
+        returned.
+        """
+        full_name = cls.full_name(force_schema=True)
+        cursor.execute('DELETE FROM %s WHERE %s = ANY(%s)'
+                       % (full_name, cls._refresh_key, keys_sql))
+        n_deleted = cursor.rowcount
+
+        # Name the columns, as their order may differ from the definition.
+        cols = ', '.join('"%s"' % col for col in cls._get_table_columns(cursor))
+        cursor.execute('INSERT INTO %s (%s) SELECT %s FROM (%s) AS new'
+                       % (full_name, cols, cols,
+                          cls.get_refresh_definition(db, cursor, keys_sql)))
+        return n_deleted, cursor.rowcount
+
 
 class SpecialColumnTable(ReadonlyTable):
+    """A readonly table with columns that are only known once it is built.
+
+    When such a table is created, the names of its columns are saved as a
+    json comment on the table, so they travel with any dump of the schema.
+    They can then be loaded for several tables with a single query (see
+    `load_many`), rather than by reflecting each table.
+    """
+    # The columns of each table, keyed by database url, schema, and table
+    # name, shared by every instance of the table class in this process.
+    _reflected_cols = {}
+    _load_lock = Lock()
+
+    @classmethod
+    def _get_schema(cls):
+        return cls.__table_args__.get('schema', 'public')
+
+    @classmethod
+    def _get_cache_key(cls, engine):
+        return str(engine.url), cls._get_schema(), cls.__tablename__
 
     @classmethod
     def create(cls, db, commit=True):
@@ -138,30 +295,101 @@ class SpecialColumnTable(ReadonlyTable):
                cls.__definition__)
         if commit:
             cls.execute(db, sql)
+            cols = cls._save_cols(db)
+            cls.loaded = False
+            cls.load_cols(db.engine, cols)
         cls.loaded = True
         return sql
 
     @classmethod
-    def load_cols(cls, engine, cols=None):
-        if cls.loaded:
-            return
+    def _save_cols(cls, db):
+        """Record the columns of the new table in a comment on the table."""
+        cols = [{'name': col['name']} for col in
+                inspect(db.engine).get_columns(cls.__tablename__,
+                                               schema=cls._get_schema())]
+        conn = db.engine.raw_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('COMMENT ON TABLE %s IS %%s'
+                           % cls.full_name(force_schema=True),
+                           (json.dumps({'columns': [c['name']
+                                                    for c in cols]}),))
+            conn.commit()
+        finally:
+            conn.close()
+        SpecialColumnTable._reflected_cols[cls._get_cache_key(db.engine)] = \
+            cols
+        return cols
 
-        if cols is None:
-            try:
-                schema = cls.__table_args__.get('schema', 'public')
-                cols = inspect(engine).get_columns(cls.__tablename__,
-                                                   schema=schema)
-            except NoSuchTableError:
-                return
+    @classmethod
+    def load_many(cls, engine, tables):
+        """Load the columns of several tables, with at most one query.
+
+        The columns are read from the comments saved on the tables when they
+        were created. Tables without such a comment, for example from a dump
+        made before the comments were added, are reflected instead.
+        """
+        tables = [tbl for tbl in tables if not tbl.loaded]
+        if not tables:
+            return
 
-        existing_cols = {col.name for col in cls.__table__.columns}
-        for col in cols:
-            if col['name'] in existing_cols:
-                continue
+        to_query = [tbl for tbl in tables
+                    if tbl._get_cache_key(engine) not in cls._reflected_cols]
+        if to_query:
+            comments = {}
+            sql = text("SELECT c.relname, obj_description(c.oid, 'pg_class') "
+                       "FROM pg_class c "
+                       "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                       "WHERE n.nspname = :schema "
+                       "  AND c.relname = ANY(:names)")
+            with engine.connect() as conn:
+                for schema in {tbl._get_schema() for tbl in to_query}:
+                    names = [tbl.__tablename__ for tbl in to_query
+                             if tbl._get_schema() == schema]
+                    for name, comment in conn.execute(sql, schema=schema,
+                                                      names=names):
+                        comments[(schema, name)] = comment
+
+            for tbl in to_query:
+                comment = comments.get((tbl._get_schema(), tbl.__tablename__))
+                try:
+                    col_names = json.loads(comment)['columns']
+                except (TypeError, ValueError, KeyError):
+                    continue
+                cls._reflected_cols[tbl._get_cache_key(engine)] = \
+                    [{'name': name} for name in col_names]
+
+        for tbl in tables:
+            tbl.load_cols(engine)
+        return
 
-            setattr(cls, col['name'], Column(BigInteger))
+    @classmethod
+    def load_cols(cls, engine, cols=None):
+        with SpecialColumnTable._load_lock:
+            if cls.loaded:
+                return
 
-        cls.loaded = True
+            if cols is None:
+                key = cls._get_cache_key(engine)
+                cols = SpecialColumnTable._reflected_cols.get(key)
+                if cols is None:
+                    try:
+                        cols = inspect(engine).get_columns(
+                            cls.__tablename__,
+                            schema=cls._get_schema()
+                        )
+                    except NoSuchTableError:
+                        return
+                    SpecialColumnTable._reflected_cols[key] = cols
+
+            existing_cols = {col.name for col in cls.__table__.columns}
+            for col in cols:
+                if col['name'] in existing_cols:
+                    continue
+
+                setattr(cls, col['name'], Column(BigInteger))
+
+            cls.loaded = True
         return
 
 
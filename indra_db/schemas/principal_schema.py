@@ -594,4 +594,40 @@ def get_schema(Base):
 
     table_dict[Curation.__tablename__] = Curation
 
+    class CurationCounts(Base, IndraDBTable):
+        """Running totals of curations for each (pa_hash, source_hash).
+
+        Curations of an entire statement (with no source_hash) are counted
+        under a source_hash of 0.
+        """
+        __tablename__ = 'curation_counts'
+        _always_disp = ['pa_hash', 'source_hash', 'num_curations']
+        id = Column(Integer, primary_key=True)
+        pa_hash = Column(BigInteger, nullable=False)
+        source_hash = Column(BigInteger, nullable=False, default=0)
+        num_curations = Column(Integer, nullable=False, default=0)
+        __table_args__ = (
+            UniqueConstraint('pa_hash', 'source_hash',
+                             name='curation_count_uniqueness'),
+        )
+
+        @classmethod
+        def rebuild(cls, db):
+            """Recompute the counts from the curation table, in the session.
+
+            The changes are not committed.
+            """
+            db.grab_session()
+            db.session.execute('DELETE FROM curation_counts;')
+            db.session.execute(
+                'INSERT INTO curation_counts '
+                '(pa_hash, source_hash, num_curations)\n'
+                'SELECT pa_hash, coalesce(source_hash, 0), count(id)\n'
+                'FROM curation\n'
+                'WHERE pa_hash IS NOT NULL\n'
+                'GROUP BY pa_hash, coalesce(source_hash, 0);'
+            )
+            return
+    table_dict[CurationCounts.__tablename__] = CurationCounts
+
     return table_dict
@@ -1,12 +1,14 @@
 __all__ = ['get_schema']
 
+import json
 import logging
+from os import environ, path
 
 from sqlalchemy import Column, Integer, String, BigInteger, Boolean,\
     SmallInteger
 from sqlalchemy.dialects.postgresql import BYTEA, JSON
 
-from indra.statements import get_all_descendants, Statement
+from indra_db.exceptions import IndraDbException
 
 from .mixins import ReadonlyTable, NamespaceLookup, SpecialColumnTable
 from .indexes import *
@@ -56,29 +58,75 @@ class StringIntMapping(object):
 
 
 class StatementTypeMapping(StringIntMapping):
+    """The mapping of Statement types to the integers used in the tables.
+
+    The mapping is built on first use. If the INDRA_DB_TYPE_MAP environment
+    variable names a file written by `dump`, the mapping is read from there,
+    otherwise it is found by walking the Statement classes in INDRA, which
+    requires importing `indra.statements`.
+    """
     arg = 'type'
 
     def __init__(self):
-        all_stmt_classes = get_all_descendants(Statement)
-        stmt_class_names = [sc.__name__ for sc in all_stmt_classes]
-        stmt_class_names.sort()
-
-        self._int_to_str = {}
-        self._str_to_int = {}
+        self.__int_to_str = None
+        self.__str_to_int = None
+
+    @property
+    def _int_to_str(self):
+        if self.__int_to_str is None:
+            self.__load()
+        return self.__int_to_str
+
+    @property
+    def _str_to_int(self):
+        if self.__str_to_int is None:
+            self.__load()
+        return self.__str_to_int
+
+    def __load(self):
+        map_file = environ.get('INDRA_DB_TYPE_MAP')
+        if map_file and path.exists(map_file):
+            with open(map_file, 'r') as f:
+                stmt_class_names = json.load(f)
+        else:
+            from indra.statements import get_all_descendants, Statement
+            all_stmt_classes = get_all_descendants(Statement)
+            stmt_class_names = [sc.__name__ for sc in all_stmt_classes]
+            stmt_class_names.sort()
+
+        int_to_str = {}
+        str_to_int = {}
         for stmt_type_num, stmt_type in enumerate(stmt_class_names):
-            self._int_to_str[stmt_type_num] = stmt_type
-            self._str_to_int[stmt_type] = stmt_type_num
+            int_to_str[stmt_type_num] = stmt_type
+            str_to_int[stmt_type] = stmt_type_num
+        self.__int_to_str = int_to_str
+        self.__str_to_int = str_to_int
+
+    def dump(self, map_file):
+        """Write the mapping to a file that can be named by INDRA_DB_TYPE_MAP.
+        """
+        stmt_class_names = [self._int_to_str[n]
+                            for n in range(len(self._int_to_str))]
+        with open(map_file, 'w') as f:
+            json.dump(stmt_class_names, f)
+        return
 
 
 ro_type_map = StatementTypeMapping()
 
 
 class RoleMapping(StringIntMapping):
+    """The mapping of agent roles to the integers used in the tables.
+
+    The roles are fixed, so the mapping is built once, with the class, and
+    needs nothing from INDRA.
+    """
     arg = 'role'
+    _int_to_str = {-1: 'SUBJECT', 0: 'OTHER', 1: 'OBJECT'}
+    _str_to_int = {v: k for k, v in _int_to_str.items()}
 
     def __init__(self):
-        self._int_to_str = {-1: 'SUBJECT', 0: 'OTHER', 1: 'OBJECT'}
-        self._str_to_int = {v: k for k, v in self._int_to_str.items()}
+        pass
 
 
 ro_role_map = RoleMapping()
@@ -111,6 +159,9 @@ def get_schema(Base):
      14. mesh_meta
     The following can be built at any time and in any order:
         (None currently)
+    Each table also lists the tables it is built from in `_depends_on`, so
+    that tables which do not depend on each other may be built at the same
+    time (see `PrincipalDatabaseManager.generate_readonly`).
     Note that the order of views below is determined not by the above
     order but by constraints imposed by use-case.
 
@@ -128,6 +179,7 @@ def get_schema(Base):
                           'FROM readonly.fast_raw_pa_link '
                           'GROUP BY mk_hash')
         _indices = [BtreeIndex('evidence_counts_mk_hash_idx', 'mk_hash')]
+        _depends_on = ['fast_raw_pa_link']
         mk_hash = Column(BigInteger, primary_key=True)
         ev_count = Column(Integer)
     read_views[EvidenceCounts.__tablename__] = EvidenceCounts
@@ -148,6 +200,7 @@ def get_schema(Base):
                     StringIndex('rrl_manuscript_id_idx', 'manuscript_id'),
                     BtreeIndex('rrl_tcid_idx', 'tcid'),
                     BtreeIndex('rrl_trid_idx', 'trid')]
+        _refresh_key = 'rid'
         trid = Column(Integer)
         pmid = Column(String(20))
         pmcid = Column(String(20))
@@ -183,10 +236,11 @@ def get_schema(Base):
                           '  AND raw_src.sid = raw.id\n'
                           '  AND pa.type = type_map.type')
         _skip_disp = ['raw_json', 'pa_json']
-        _indices = [BtreeIndex('hash_index', 'mk_hash'),
+        _indices = [BtreeIndex('hash_index', 'mk_hash, id'),
                     BtreeIndex('frp_reading_id_idx', 'reading_id'),
                     BtreeIndex('frp_db_info_id_idx', 'db_info_id'),
                     StringIndex('frp_src_idx', 'src')]
+        _depends_on = ['raw_stmt_src']
 
         @classmethod
         def get_definition(cls):
@@ -235,6 +289,7 @@ def get_schema(Base):
         _indices = [StringIndex('pa_meta_db_name_idx', 'db_name'),
                     StringIndex('pa_meta_db_id_idx', 'db_id'),
                     BtreeIndex('pa_meta_hash_idx', 'mk_hash')]
+        _depends_on = ['pa_agent_counts', 'evidence_counts']
 
         @classmethod
         def get_definition(cls):
@@ -270,6 +325,7 @@ def get_schema(Base):
                           'WHERE db_info.id = raw_statements.db_info_id')
         _indices = [BtreeIndex('raw_stmt_src_sid_idx', 'sid'),
                     StringIndex('raw_stmt_src_src_idx', 'src')]
+        _refresh_key = 'sid'
         sid = Column(Integer, primary_key=True)
         src = Column(String)
     read_views[RawStmtSrc.__tablename__] = RawStmtSrc
@@ -279,11 +335,12 @@ def get_schema(Base):
         __table_args__ = {'schema': 'readonly'}
         __definition_fmt__ = ("SELECT * FROM crosstab("
                               "'SELECT mk_hash, src, count(id) "
-                              "  FROM readonly.fast_raw_pa_link "
+                              "  FROM readonly.fast_raw_pa_link %s"
                               "  GROUP BY (mk_hash, src)', "
                               "$$SELECT unnest('{%s}'::text[])$$"
                               " ) final_result(mk_hash bigint, %s)")
         _indices = [BtreeIndex('pa_stmt_src_mk_hash_idx', 'mk_hash')]
+        _depends_on = ['fast_raw_pa_link']
         loaded = False
 
         mk_hash = Column(BigInteger, primary_key=True)
@@ -300,16 +357,36 @@ def get_schema(Base):
             src_list = db.session.query(db.RawStmtSrc.src).distinct().all()
             logger.info("Found the following sources: %s"
                         % [src for src, in src_list])
-            entries = []
             cols = []
             for src, in src_list:
                 if not cls.loaded:
                     setattr(cls, src, Column(BigInteger))
                 cols.append(src)
-                entries.append('%s bigint' % src)
-            sql = cls.__definition_fmt__ % (', '.join(cols),
-                                            ', '.join(entries))
-            return sql
+            return cls._format_definition(cols)
+
+        @classmethod
+        def _format_definition(cls, cols, where=''):
+            entries = ['%s bigint' % src for src in cols]
+            return cls.__definition_fmt__ % (where, ', '.join(cols),
+                                             ', '.join(entries))
+
+        @classmethod
+        def get_refresh_definition(cls, db, cursor, keys_sql):
+            # The condition must go in the query given to crosstab, and the
+            # sources must be those already columns of the table.
+            cols = [col for col in cls._get_table_columns(cursor)
+                    if col != 'mk_hash']
+            cursor.execute('SELECT DISTINCT src '
+                           'FROM readonly.fast_raw_pa_link '
+                           'WHERE mk_hash = ANY(%s)' % keys_sql)
+            new_srcs = {src for src, in cursor.fetchall()} - set(cols)
+            if new_srcs:
+                raise IndraDbException("New sources %s cannot be added to "
+                                       "%s incrementally; the readonly schema "
+                                       "must be built in full."
+                                       % (sorted(new_srcs), cls.__tablename__))
+            return cls._format_definition(cols, 'WHERE mk_hash = ANY(%s)'
+                                          % keys_sql)
 
         def get_sources(self, include_none=False):
             src_dict = {}
@@ -330,6 +407,7 @@ def get_schema(Base):
         _indices = [BtreeIndex('pa_ref_link_mk_hash_idx', 'mk_hash'),
                     BtreeIndex('pa_ref_link_trid_idx', 'trid'),
                     BtreeIndex('pa_ref_link_pmid_idx', 'pmid')]
+        _depends_on = ['fast_raw_pa_link', 'reading_ref_link']
         mk_hash = Column(BigInteger, primary_key=True)
         trid = Column(Integer, primary_key=True)
         pmid = Column(String)
@@ -352,6 +430,7 @@ def get_schema(Base):
                           '  JOIN raw_statements ON reading.id = reading_id\n')
         _indices = [BtreeIndex('rsm_mesh_num_idx', 'mesh_num'),
                     BtreeIndex('rsm_sid_idx', 'sid')]
+        _refresh_key = 'sid'
 
         sid = Column(Integer, primary_key=True)
         mesh_num = Column(Integer, primary_key=True)
@@ -365,12 +444,12 @@ def get_schema(Base):
             '    SELECT mk_hash, \n'
             '           json_strip_nulls(json_build_object({all_sources})) \n'
             '           AS src_json \n'
-            '    FROM readonly.pa_stmt_src\n'
+            '    FROM readonly.pa_stmt_src{where}\n'
             '),'
             'meta AS ('
             '    SELECT distinct mk_hash, type_num, activity, is_active,\n'
             '                    ev_count, agent_count'
-            '    FROM readonly.pa_meta'
+            '    FROM readonly.pa_meta{where}'
             ')\n'
             'SELECT readonly.pa_stmt_src.*, \n'
             '       meta.ev_count, \n'
@@ -415,6 +494,7 @@ def get_schema(Base):
                     StringIndex('source_meta_activity_idx', 'activity'),
                     BtreeIndex('source_meta_type_num_idx', 'type_num'),
                     BtreeIndex('source_meta_num_srcs_idx', 'num_srcs')]
+        _depends_on = ['pa_stmt_src', 'pa_meta']
         loaded = False
 
         mk_hash = Column(BigInteger, primary_key=True)
@@ -430,7 +510,7 @@ def get_schema(Base):
         agent_count = Column(Integer)
 
         @classmethod
-        def definition(cls, db):
+        def definition(cls, db, where=''):
             db.grab_session()
             srcs = set(db.get_column_names(db.PaStmtSrc)) - {'mk_hash'}
             all_sources = ', '.join(s for src in srcs
@@ -441,8 +521,16 @@ def get_schema(Base):
                                    for src in SOURCE_GROUPS['databases'])
             sql = cls.__definition_fmt__.format(all_sources=all_sources,
                                                 reading_sources=rd_sources,
-                                                db_sources=db_sources)
+                                                db_sources=db_sources,
+                                                where=where)
             return sql
+
+        @classmethod
+        def get_refresh_definition(cls, db, cursor, keys_sql):
+            # The jsonified sources are used twice, so postgres would build
+            # them in full before applying any outer condition.
+            return cls.definition(db, '\n    WHERE mk_hash = ANY(%s)'
+                                      % keys_sql)
     read_views[SourceMeta.__tablename__] = SourceMeta
 
     class TextMeta(Base, NamespaceLookup):
@@ -452,6 +540,7 @@ def get_schema(Base):
         _indices = [StringIndex('text_meta_db_id_idx', 'db_id'),
                     BtreeIndex('text_meta_type_num_idx', 'type_num'),
                     StringIndex('text_meta_activity_idx', 'activity')]
+        _depends_on = ['pa_meta']
         ag_id = Column(Integer, primary_key=True)
         ag_num = Column(Integer)
         db_id = Column(String)
@@ -471,6 +560,7 @@ def get_schema(Base):
         _indices = [StringIndex('name_meta_db_id_idx', 'db_id'),
                     BtreeIndex('name_meta_type_num_idx', 'type_num'),
                     StringIndex('name_meta_activity_idx', 'activity')]
+        _depends_on = ['pa_meta']
         ag_id = Column(Integer, primary_key=True)
         ag_num = Column(Integer)
         db_id = Column(String)
@@ -495,6 +585,7 @@ def get_schema(Base):
                     BtreeIndex('other_meta_type_num_idx', 'type_num'),
                     StringIndex('other_meta_db_name_idx', 'db_name'),
                     StringIndex('other_meta_activity_idx', 'activity')]
+        _depends_on = ['pa_meta']
         ag_id = Column(Integer, primary_key=True)
         ag_num = Column(Integer)
         db_name = Column(String)
@@ -533,6 +624,7 @@ def get_schema(Base):
                     BtreeIndex('mesh_meta_mk_hash_idx', 'mk_hash'),
                     BtreeIndex('mesh_meta_type_num_idx', 'type_num'),
                     StringIndex('mesh_meta_activity_idx', 'activity')]
+        _depends_on = ['pa_meta', 'raw_stmt_mesh']
         mk_hash = Column(BigInteger, primary_key=True)
         mesh_num = Column(Integer, primary_key=True)
         tr_count = Column(Integer)
@@ -25,6 +25,17 @@ def test_vanilla_copy():
     assert False, "Copy of duplicate data succeeded."
 
 
+def test_generator_copy():
+    db = get_temp_db(True)
+    inps = {('%d' % i, '%d' % (i % 3)) for i in range(1000)}
+    db.copy('text_ref', (inp for inp in inps), COLS)
+    assert inps == _ref_set(db)
+
+    # An empty generator should do nothing.
+    db.copy('text_ref', (inp for inp in []), COLS)
+    assert inps == _ref_set(db)
+
+
 def test_lazy_copy():
     db = get_temp_db(True)
     inps_1 = {('a', '1'), ('b', '2')}
@@ -50,6 +61,31 @@ def test_lazy_report_copy():
     _assert_set_equal(inps_1 & inps_2, {t[:2] for t in left_out})
 
 
+def test_lazy_report_skipped_rows():
+    db = get_temp_db(True)
+    cols = ('pmid', 'pmcid', 'doi')
+    existing = {('%d' % i, 'PMC%d' % i, 'doi%d' % i) for i in range(100)}
+    db.copy('text_ref', existing, cols)
+
+    # Rows that clash with existing rows on pmid and doi are skipped, and
+    # reported as they were given, even where they differ from what is in
+    # the table. Existing rows that were not copied are not reported.
+    inps = {('%d' % i, 'new%d' % i, 'doi%d' % i) for i in range(90, 120)}
+    left_out = db.copy_report_lazy('text_ref', inps, cols,
+                                   constraint='pmid-doi')
+    expected = {('%d' % i, 'new%d' % i, 'doi%d' % i) for i in range(90, 100)}
+    _assert_set_equal(expected, set(left_out))
+    assert len(left_out) == len(expected)
+    assert len(db.select_all(db.TextRef)) == 120
+
+    # Only the requested columns are returned.
+    inps = {('%d' % i, 'newer%d' % i, 'doi%d' % i) for i in range(110, 130)}
+    left_out = db.copy_report_lazy('text_ref', inps, cols,
+                                   constraint='pmid-doi',
+                                   return_cols=('pmid',))
+    _assert_set_equal({('%d' % i,) for i in range(110, 120)}, set(left_out))
+
+
 def test_push_copy():
     db = get_temp_db(True)
     inps_1 = {('a', '1'), ('b', '2')}
@@ -83,3 +119,30 @@ def test_push_report_copy():
     new_date = db.select_one(db.TextRef.create_date,
                              db.TextRef.pmid == 'b')
     assert new_date != original_date, 'PMID b was not updated.'
+
+
+def test_parallel_copy():
+    db = get_temp_db(True)
+    inps_1 = {('%d' % i, '%d' % (i % 3)) for i in range(1000)}
+    db.copy_parallel('text_ref', (inp for inp in inps_1), COLS, workers=3,
+                     batch_size=100)
+    _assert_set_equal(inps_1, _ref_set(db))
+
+    # A lazy copy should skip the rows that are already present.
+    inps_2 = {('%d' % i, '%d' % (i % 3)) for i in range(900, 1100)}
+    db.copy_parallel('text_ref', inps_2, COLS, workers=3, batch_size=50,
+                     lazy=True)
+    _assert_set_equal(inps_1 | inps_2, _ref_set(db))
+
+    # A failed merge should raise its own error, and leave no staging table.
+    try:
+        db.copy_parallel('text_ref', inps_2, COLS, workers=3, batch_size=50)
+    except Exception as e:
+        assert 'unique' in str(e).lower(), e
+    else:
+        assert False, "Parallel copy of duplicate data succeeded."
+    _assert_set_equal(inps_1 | inps_2, _ref_set(db))
+    with db.engine.connect() as conn:
+        stages = conn.execute("SELECT tablename FROM pg_tables "
+                              "WHERE tablename LIKE 'text_ref_stage_%%'")
+        assert not stages.fetchall()
@@ -0,0 +1,39 @@
+from indra_db.tests.util import get_temp_db
+from indra_db.client.principal.curation import submit_curation, \
+    get_curation_counts, rebuild_curation_counts
+
+
+def _get_db_with_pa_stmt(mk_hash):
+    db = get_temp_db(clear=True)
+    db.insert(db.PAStatements, mk_hash=mk_hash, matches_key='test',
+              uuid='test-uuid', type='Phosphorylation', indra_version='test',
+              json=b'{}')
+    return db
+
+
+def test_curation_counts():
+    db = _get_db_with_pa_stmt(12345)
+    submit_curation(12345, 'correct', 'tester', '127.0.0.1', ev_hash=1, db=db)
+    submit_curation(12345, 'grounding', 'tester', '127.0.0.1', ev_hash=1,
+                    db=db)
+    submit_curation(12345, 'correct', 'tester', '127.0.0.1', ev_hash=2, db=db)
+    submit_curation(12345, 'correct', 'tester', '127.0.0.1', db=db)
+
+    counts = get_curation_counts([12345, 54321], db=db)
+    assert counts == {12345: {1: 2, 2: 1, None: 1}}, counts
+
+    # Rebuilding from the curation table should give the same result.
+    rebuild_curation_counts(db=db)
+    assert get_curation_counts([12345], db=db) == counts
+
+
+def test_curation_counts_backfilled_on_create():
+    db = _get_db_with_pa_stmt(12345)
+    submit_curation(12345, 'correct', 'tester', '127.0.0.1', ev_hash=1, db=db)
+    submit_curation(12345, 'correct', 'tester', '127.0.0.1', db=db)
+
+    # As for a database made before the counts table was added.
+    db.drop_tables([db.CurationCounts], force=True)
+    db.create_tables(['curation_counts'])
+    counts = get_curation_counts([12345], db=db)
+    assert counts == {12345: {1: 1, None: 1}}, counts
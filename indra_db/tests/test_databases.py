@@ -0,0 +1,56 @@
+from indra_db.tests.util import get_temp_db
+
+
+def test_select_all_keyset():
+    db = get_temp_db(clear=True)
+    db.copy('text_ref', [(str(i),) for i in range(1, 26)], ('pmid',))
+    ids = sorted(tr.id for tr in db.select_all(db.TextRef))
+
+    batches = list(db.select_all_keyset(10, db.TextRef.pmid,
+                                        key=db.TextRef.id))
+    assert [len(batch) for _, batch, _ in batches] == [10, 10, 5]
+    assert batches[0][2] == (ids[0], ids[9])
+
+    # Excluding the middle batch's keys should leave the other two batches.
+    rest = [row for _, batch, _ in
+            db.select_all_keyset(10, db.TextRef.pmid, key=db.TextRef.id,
+                                 skip_range=batches[1][2])
+            for row in batch]
+    assert len(rest) == 15
+    assert not set(rest) & set(batches[1][1])
+
+
+def test_insert_many():
+    db = get_temp_db(clear=True)
+    pmids = ['%d' % i for i in range(2500)]
+    ids = db.insert_many('text_ref', [{'pmid': pmid} for pmid in pmids])
+    assert len(ids) == len(pmids)
+    id_pmids = {tr.id: tr.pmid for tr in db.select_all(db.TextRef)}
+    assert [id_pmids[trid] for trid in ids] == pmids
+
+    # Records with different columns, given as tuples.
+    res = db.insert_many('text_ref', [('a1', None), (None, 'PMCa2')],
+                         ret_info=['pmid', 'pmcid'], cols=('pmid', 'pmcid'))
+    assert res == [['a1', None], [None, 'PMCa2']], res
+
+    # Records that give their own keys, in no particular order.
+    given = [(str(10000 - i), 'x%d' % i) for i in range(20)]
+    res = db.insert_many('text_ref', given, ret_info=['id', 'pmid'],
+                         cols=('id', 'pmid'))
+    assert res == [[int(trid), pmid] for trid, pmid in given], res
+
+
+def test_delete_by_id_set():
+    db = get_temp_db(clear=True)
+    trids = db.insert_many('text_ref', [{'pmid': str(i)} for i in range(10)])
+    db.insert_many('text_content',
+                   [{'text_ref_id': trid, 'source': 'pubmed',
+                     'format': 'text', 'text_type': 'abstract',
+                     'content': b'content'}
+                    for trid in trids[:5]])
+    counts = db.delete_by_id_set(trids[:3] + trids[8:],
+                                 [('text_content', 'text_ref_id'),
+                                  ('text_ref', 'id')])
+    assert counts == {'text_content': 3, 'text_ref': 5}, counts
+    assert db.count(db.TextContent) == 2
+    assert db.count(db.TextRef) == 5
@@ -0,0 +1,24 @@
+from indra_db.tests.util import get_temp_db
+
+
+def test_build_indices_in_parallel():
+    db = get_temp_db(clear=True)
+    timings = db.TextRef.build_indices(db, jobs=3,
+                                       maintenance_work_mem='256MB')
+    assert list(timings) == [idx.name for idx in db.TextRef._indices]
+    assert all(t >= 0 for t in timings.values())
+
+    with db.engine.connect() as conn:
+        idx_names = {name for name, in conn.execute(
+            "SELECT indexname FROM pg_indexes WHERE tablename = 'text_ref'"
+        )}
+        assert set(timings) <= idx_names
+
+        # The settings should not outlive the index builds.
+        assert conn.execute('SHOW maintenance_work_mem').scalar() != '256MB'
+
+    # Building them again should skip the existing indices.
+    assert list(db.TextRef.build_indices(db, jobs=3)) == list(timings)
+
+    # The index builds should not take connections from the pool.
+    assert db.engine.pool.checkedout() == 0
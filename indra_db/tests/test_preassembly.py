@@ -5,6 +5,7 @@ import os
 import json
 import random
 import logging
+import warnings
 from datetime import datetime
 from time import sleep
 
@@ -478,6 +479,43 @@ def test_statement_distillation_large():
 #     _check_statement_distillation(1001721)
 
 
+def test_delete_raw_statements_by_id():
+    db = get_temp_db(clear=True)
+    dbid = db.insert(db.DBInfo, db_name='test', source_api='test')
+    sids = db.insert_many('raw_statements',
+                          [{'uuid': 'uuid%d' % i, 'batch_id': 1,
+                            'mk_hash': i, 'source_hash': i,
+                            'db_info_id': dbid, 'type': 'Activation',
+                            'indra_version': 'test', 'json': b'{}'}
+                           for i in range(3)])
+    db.insert(db.DiscardedStatements, stmt_id=sids[0], reason='duplicate')
+    db.insert_many('raw_activity', [{'stmt_id': sid, 'activity': 'kinase',
+                                     'is_active': True} for sid in sids])
+
+    # By default, the discard records and activity go with the statements.
+    counts = db_util.delete_raw_statements_by_id(db, sids[:2])
+    assert counts['discarded_statements'] == 1, counts
+    assert counts['raw_activity'] == 2, counts
+    assert counts['raw_statements'] == 2, counts
+    assert db.count(db.RawStatements) == 1
+    assert db.count(db.DiscardedStatements) == 0
+    assert db.count(db.RawActivity) == 1
+
+    # Only the tables asked for are touched.
+    counts = db_util.delete_raw_statements_by_id(db, sids[2:],
+                                                 remove=['activity'])
+    assert list(counts) == ['raw_activity'], counts
+    assert db.count(db.RawActivity) == 0
+    assert db.count(db.RawStatements) == 1
+
+    # The old sync_session argument is ignored, with a warning.
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        db_util.delete_raw_statements_by_id(db, sids[2:], sync_session=False)
+    assert any(issubclass(w.category, DeprecationWarning) for w in caught)
+    assert db.count(db.RawStatements) == 0
+
+
 @attr('nonpublic')
 def test_db_lazy_insert():
     db = get_temp_db(clear=True)
@@ -631,6 +669,39 @@ def test_db_incremental_preassembly_small():
     _check_db_pa_supplement(400, 43)
 
 
+@attr('nonpublic')
+def test_incremental_readonly_refresh():
+    pa_manager = pm.PreassemblyManager(batch_size=43, print_logs=True)
+    db = get_pa_loaded_db(400, split=0.8, pam=pa_manager)
+    db.generate_readonly()
+    pa_manager.supplement_corpus(db)
+
+    def get_ro_content():
+        with db.engine.connect() as conn:
+            return {tbl: set(conn.execute(sql))
+                    for tbl, sql in [
+                        ('evidence_counts', 'SELECT mk_hash, ev_count '
+                                            'FROM readonly.evidence_counts'),
+                        ('pa_meta', 'SELECT ag_id, mk_hash, ev_count '
+                                    'FROM readonly.pa_meta'),
+                        ('source_meta', 'SELECT mk_hash, ev_count, num_srcs '
+                                        'FROM readonly.source_meta'),
+                        ('mesh_meta', 'SELECT mk_hash, mesh_num, ev_count '
+                                      'FROM readonly.mesh_meta'),
+                    ]}
+
+    counts = db.refresh_readonly()
+    assert counts['fast_raw_pa_link'][1] > 0, counts
+    refreshed = get_ro_content()
+
+    db.drop_schema('readonly')
+    db.generate_readonly()
+    assert get_ro_content() == refreshed
+
+    # Nothing has changed since the full build, so there is nothing to do.
+    assert not db.refresh_readonly()
+
+
 # @attr('nonpublic', 'slow')
 # def test_db_incremental_preassembly_large():
 #     _check_db_pa_supplement(11721, 2017)
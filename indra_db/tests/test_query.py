@@ -7,7 +7,7 @@ from indra.statements import Agent, get_statement_by_name, get_all_descendants
 from indra_db.client.readonly.query import QueryResult
 from indra_db.schemas.readonly_schema import ro_type_map, ro_role_map, \
     SOURCE_GROUPS
-from indra_db.util import extract_agent_data, get_ro, get_db
+from indra_db.util import extract_agent_data, get_ro, get_db, in_values
 from indra_db.client.readonly.query import *
 
 from indra_db.tests.util import get_temp_db
@@ -259,6 +259,31 @@ def test_has_hash():
     assert set(res.results.keys()) == set(res.source_counts.keys())
 
 
+def test_has_many_hashes():
+    ro = get_db('primary')
+    hashes = {h for h, in ro.session.query(ro.SourceMeta.mk_hash).limit(200)}
+    assert len(hashes) > 50, "Too few hashes to use the array parameter."
+    res = HasHash(hashes).get_hashes(ro)
+    assert set(res.results) == hashes
+    res = (~HasHash(hashes)).get_hashes(ro, limit=50)
+    assert not set(res.results) & hashes
+
+
+def test_has_many_string_hashes():
+    ro = get_db('primary')
+    hashes = {h for h, in ro.session.query(ro.SourceMeta.mk_hash).limit(200)}
+    assert len(hashes) > 50, "Too few hashes to use the array parameter."
+
+    # Web clients post hashes as strings.
+    res = HasHash([str(h) for h in hashes]).get_hashes(ro)
+    assert set(res.results) == hashes
+
+    # The array parameter should also accept strings directly.
+    q = ro.session.query(ro.SourceMeta.mk_hash)\
+        .filter(in_values(ro.SourceMeta.mk_hash, [str(h) for h in hashes]))
+    assert {h for h, in q} == hashes
+
+
 def test_has_agent():
     ro = get_db('primary')
     q = HasAgent('RAS')
@@ -519,6 +544,19 @@ def test_get_agents():
     assert len(js['results']) == len(res.results)
 
 
+def test_cursor_paging():
+    ro = get_db('primary')
+    query = HasAgent('TP53')
+    first = query.get_interactions(ro, limit=5)
+    assert first.next_cursor is not None
+    second = query.get_interactions(ro, limit=5, after=first.next_cursor)
+    assert not set(first.results) & set(second.results)
+
+    # Paging with cursors should match paging with offsets.
+    by_offset = query.get_interactions(ro, limit=5, offset=5)
+    assert set(second.results) == set(by_offset.results)
+
+
 def test_evidence_filtering_has_only_source():
     ro = get_db('primary')
     q1 = HasAgent('TP53')
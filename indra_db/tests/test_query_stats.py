@@ -0,0 +1,54 @@
+from threading import Thread, Event
+
+from indra_db.tests.util import get_temp_db
+from indra_db.util.data_gatherer import DataGatherer, get_current_stage
+
+
+def test_stages_per_thread():
+    main_gatherer = DataGatherer('main', [])
+    main_gatherer.start()
+    try:
+        entered = Event()
+        checked = Event()
+        stages = {}
+
+        def run():
+            stages['before'] = get_current_stage()
+            gatherer = DataGatherer('worker', [])
+            gatherer.start()
+            stages['in_worker'] = get_current_stage()
+            entered.set()
+            checked.wait(10)
+
+        t = Thread(target=run)
+        t.start()
+        entered.wait(10)
+
+        # Each thread should only see the stages it entered itself.
+        assert get_current_stage() == 'main'
+        checked.set()
+        t.join()
+        assert stages == {'before': None, 'in_worker': 'worker'}, stages
+    finally:
+        from indra_db.util import data_gatherer
+        data_gatherer._get_active_gatherers().remove(main_gatherer)
+    assert get_current_stage() is None
+
+
+def test_query_stats():
+    db = get_temp_db(clear=True)
+    stats = db.enable_stats()
+    for pmid in ['1', '2', '3']:
+        db.select_all(db.TextRef, db.TextRef.pmid == pmid)
+    db.copy('text_ref', [('4',), ('5',)], ('pmid',))
+
+    stats_json = db.stats().get_json()
+    tr_queries = [q for q in stats_json['queries']
+                  if q['statement'].startswith('SELECT text_ref.id')]
+    assert len(tr_queries) == 1, tr_queries
+    assert tr_queries[0]['count'] == 3
+    copy_stats, = stats_json['copies']
+    assert copy_stats['table'] == 'text_ref'
+    assert copy_stats['rows'] == 2
+    assert copy_stats['bytes'] > 0
+    assert 'indra_db_copy_bytes_total' in stats.get_prometheus()
@@ -0,0 +1,93 @@
+import json
+from os import environ, path
+from tempfile import mkdtemp
+from threading import Lock
+from time import sleep
+
+from sqlalchemy.ext.declarative import declarative_base
+
+from indra_db.databases import _run_in_dependency_order
+from indra_db.exceptions import IndraDbException
+from indra_db.schemas.readonly_schema import ro_type_map, ro_role_map, \
+    StatementTypeMapping, get_schema, CREATE_ORDER
+
+
+def test_type_map_round_trip():
+    map_file = path.join(mkdtemp(), 'type_map.json')
+    ro_type_map.dump(map_file)
+
+    environ['INDRA_DB_TYPE_MAP'] = map_file
+    try:
+        loaded = StatementTypeMapping()
+        assert loaded.get_with_clause() == ro_type_map.get_with_clause()
+        assert loaded.get_int('Activation') \
+            == ro_type_map.get_int('Activation')
+
+        # The mapping should be read from the file, not from INDRA.
+        with open(map_file, 'w') as f:
+            json.dump(['Foo', 'Bar'], f)
+        custom = StatementTypeMapping()
+        assert custom.get_int('Bar') == 1
+        assert custom.get_str(0) == 'Foo'
+    finally:
+        environ.pop('INDRA_DB_TYPE_MAP')
+
+
+def test_role_map():
+    for role in ['SUBJECT', 'OTHER', 'OBJECT']:
+        assert ro_role_map.get_str(ro_role_map.get_int(role)) == role
+    assert "role_map(role_num, role)" in ro_role_map.get_with_clause()
+
+
+def test_readonly_dependencies():
+    ro_tables = get_schema(declarative_base())
+    assert set(CREATE_ORDER) == set(ro_tables)
+
+    # The serial order must build every table after those it depends on.
+    for i, ro_name in enumerate(CREATE_ORDER):
+        for dep in ro_tables[ro_name]._depends_on:
+            assert dep in CREATE_ORDER[:i], (ro_name, dep)
+
+
+def test_readonly_build_scheduling():
+    tasks = [('0', 'a'), ('1', 'b'), ('2', 'c'), ('-', 'd')]
+    deps = {'a': set(), 'b': {'a'}, 'c': {'a', 'b'}, 'd': set()}
+    events = []
+    lock = Lock()
+
+    def build(i, name, fail=None):
+        with lock:
+            events.append(('start', name))
+        sleep(0.05)
+        if name == fail:
+            raise ValueError("Deliberate failure.")
+        with lock:
+            events.append(('end', name))
+
+    # Every table starts only after those it depends on have finished.
+    _run_in_dependency_order(tasks, deps, build, 3)
+    assert {name for _, name in events} == set(deps)
+    for name, name_deps in deps.items():
+        start = events.index(('start', name))
+        assert all(events.index(('end', dep)) < start for dep in name_deps)
+
+    # A failure stops any more tables from starting.
+    del events[:]
+    try:
+        _run_in_dependency_order(tasks, deps,
+                                 lambda i, name: build(i, name, 'a'), 3)
+        assert False, "The failure was not raised."
+    except ValueError:
+        pass
+    assert ('start', 'b') not in events and ('start', 'c') not in events
+    assert ('end', 'd') in events
+
+    # Tables that depend on each other cannot be built.
+    del events[:]
+    try:
+        _run_in_dependency_order([('0', 'a'), ('1', 'b')],
+                                 {'a': {'b'}, 'b': {'a'}}, build, 2)
+        assert False, "The cycle was not detected."
+    except IndraDbException:
+        pass
+    assert not events
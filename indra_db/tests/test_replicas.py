@@ -0,0 +1,37 @@
+from indra_db.tests.util import get_temp_db, TEST_DB_URL
+
+
+def test_replica_routing():
+    # Two good replicas, and one on a port where nothing is listening.
+    bad_url = TEST_DB_URL.replace('@localhost/', '@localhost:1/')
+    db = get_temp_db(clear=True,
+                     replica_urls=[TEST_DB_URL, TEST_DB_URL, bad_url],
+                     replica_check_interval=3600)
+    replicas = db.replicas.engines[:2]
+
+    # Reads go to the replicas, and the bad one is passed over. All the reads
+    # of a transaction, including through `connection()`, use one replica.
+    assert db.replicas.check_all() == 2
+    q = db.session.query(db.TextRef.id)
+    first = db.session.get_bind(clause=q.statement)
+    assert first in replicas
+    for _ in range(3):
+        assert db.session.get_bind(clause=q.statement) is first
+        q.all()
+    assert db.session.connection().engine is first
+    db.session.commit()
+
+    # The next transaction uses the other replica.
+    second = db.session.get_bind(clause=q.statement)
+    assert second in replicas and second is not first
+
+    # Once the transaction writes, everything goes to the primary.
+    db.session.rollback()
+    db.session.add(db.TextRef(pmid='12345'))
+    db.session.flush()
+    q = db.session.query(db.TextRef.id)
+    assert db.session.get_bind(clause=q.statement) is db.engine
+    assert db.session.connection().engine is db.engine
+    assert len(q.all()) == 1
+    db.session.commit()
+    assert db.session.get_bind(clause=q.statement) in replicas
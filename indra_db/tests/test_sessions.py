@@ -0,0 +1,38 @@
+from threading import Thread
+
+from indra_db.tests.util import get_temp_db
+
+
+def test_session_scope():
+    db = get_temp_db(clear=True)
+    with db.session_scope() as session:
+        session.add(db.TextRef(pmid='12345'))
+    assert db.select_one(db.TextRef, db.TextRef.pmid == '12345') is not None
+
+    # An exception within the scope should roll back its work.
+    try:
+        with db.session_scope() as session:
+            session.add(db.TextRef(pmid='54321'))
+            raise ValueError("Deliberate failure.")
+    except ValueError:
+        pass
+    assert db.select_one(db.TextRef, db.TextRef.pmid == '54321') is None
+
+
+def test_sessions_per_thread():
+    db = get_temp_db(clear=True)
+    sessions = []
+
+    def grab():
+        db.grab_session()
+        sessions.append(db.session)
+        db.release_session()
+
+    threads = [Thread(target=grab) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(sessions) == 2
+    assert sessions[0] is not sessions[1]
+    assert db.session not in sessions
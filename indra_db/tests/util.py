@@ -30,9 +30,16 @@ def capitalize_list_of_tpls(l):
             for e in l]
 
 
-def get_temp_db(clear=False):
-    """Get a DatabaseManager for the test database."""
-    db = PrincipalDatabaseManager('postgresql://postgres:@localhost/indradb_test')
+TEST_DB_URL = 'postgresql://postgres:@localhost/indradb_test'
+
+
+def get_temp_db(clear=False, **kwargs):
+    """Get a DatabaseManager for the test database.
+
+    Any extra keyword arguments are passed on to the
+    `PrincipalDatabaseManager`, e.g. to give it `replica_urls`.
+    """
+    db = PrincipalDatabaseManager(TEST_DB_URL, **kwargs)
     if clear:
         db._clear(force=True)
     db.grab_session()
@@ -5,7 +5,8 @@ import logging
 from indra_db.databases import PrincipalDatabaseManager, \
     ReadonlyDatabaseManager
 from indra_db.exceptions import IndraDbException
-from indra_db.config import get_databases, get_readonly_databases
+from indra_db.config import get_databases, get_readonly_databases, \
+    get_replica_urls
 
 
 logger = logging.getLogger('util-constructors')
@@ -14,7 +15,7 @@ logger = logging.getLogger('util-constructors')
 __PRIMARY_DB = None
 
 
-def get_primary_db(force_new=False):
+def get_primary_db(force_new=False, use_replicas=False):
     """Get a DatabaseManager instance for the primary database host.
 
     The primary database host is defined in the defaults.txt file, or in a file
@@ -30,7 +31,8 @@ def get_primary_db(force_new=False):
         db1 is db2
 
     This means also that, for example `db1.select_one(db2.TextRef)` will work,
-    in the above context.
+    in the above context. The instance may be shared between threads, as each
+    thread gets its own session from the manager's connection pool.
 
     It is still recommended that when creating a script or function, or other
     general application, you should not rely on this feature to get your access
@@ -46,6 +48,11 @@ def get_primary_db(force_new=False):
         whether there is an existing instance or not. Default is False, so that
         if this function has been called before within the global scope, a the
         instance that was first created will be returned.
+    use_replicas : bool
+        If True, send reads to any replicas of the database in the config or
+        env. Note that rows committed on the primary may not yet be visible
+        on a replica. Default is False. This only applies when a new instance
+        is created.
 
     Returns
     -------
@@ -61,27 +68,47 @@ def get_primary_db(force_new=False):
 
     global __PRIMARY_DB
     if __PRIMARY_DB is None or force_new:
-        __PRIMARY_DB = PrincipalDatabaseManager(primary_host, label='primary')
+        __PRIMARY_DB = PrincipalDatabaseManager(
+            primary_host, label='primary',
+            replica_urls=get_replica_urls('primary') if use_replicas else None
+        )
         __PRIMARY_DB.grab_session()
     return __PRIMARY_DB
 
 
-def get_db(db_label):
-    """Get a db instance base on it's name in the config or env."""
+def get_db(db_label, use_replicas=False, **pool_kwargs):
+    """Get a db instance base on it's name in the config or env.
+
+    Any keyword arguments configure the connection pool and replicas, as
+    described for the `DatabaseManager`. If `use_replicas` is True, and
+    `replica_urls` is not given, reads are sent to any replicas of the
+    database in the config or env. This is off by default, as rows committed
+    on the primary may not yet be visible on a replica, which would surprise
+    code that writes and then reads.
+    """
     defaults = get_databases()
     db_url = defaults[db_label]
-    db = PrincipalDatabaseManager(db_url, label=db_label)
+    if use_replicas:
+        pool_kwargs.setdefault('replica_urls', get_replica_urls(db_label))
+    db = PrincipalDatabaseManager(db_url, label=db_label, **pool_kwargs)
     db.grab_session()
     return db
 
 
-def get_ro(ro_label):
-    """Get a readonly database instance, based on its name/"""
+def get_ro(ro_label, **pool_kwargs):
+    """Get a readonly database instance, based on its name.
+
+    Any keyword arguments configure the connection pool and replicas, as
+    described for the `DatabaseManager`. Unless `replica_urls` is given, any
+    replicas of the database in the config or env are used.
+    """
     defaults = get_readonly_databases()
     if ro_label == 'primary' and 'override' in defaults:
         logger.info("Found an override database: using in place of primary.")
         ro_label = 'override'
     db_url = defaults[ro_label]
-    ro = ReadonlyDatabaseManager(db_url, label=ro_label)
+    pool_kwargs.setdefault('replica_urls',
+                           get_replica_urls(ro_label, readonly=True))
+    ro = ReadonlyDatabaseManager(db_url, label=ro_label, **pool_kwargs)
     ro.grab_session()
     return ro
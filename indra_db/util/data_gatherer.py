@@ -4,6 +4,7 @@ import boto3
 import logging
 import functools
 import traceback
+from threading import local
 from datetime import datetime, timedelta
 from collections import defaultdict as dd
 
@@ -15,6 +16,26 @@ S3_DATA_LOC = {'bucket': 'bigmech', 'prefix': 'indra-db/managers/'}
 DAY_FMT = '%Y%m%d'
 TIME_FMT = '%H%M%S'
 
+# Each thread keeps its own stack of the DataGatherers in context.
+_thread_local = local()
+
+
+def _get_active_gatherers():
+    if not hasattr(_thread_local, 'gatherers'):
+        _thread_local.gatherers = []
+    return _thread_local.gatherers
+
+
+def get_current_stage():
+    """Get the label of the innermost DataGatherer in context, if any.
+
+    Only the DataGatherers entered in the current thread are considered.
+    """
+    active_gatherers = _get_active_gatherers()
+    if not active_gatherers:
+        return None
+    return active_gatherers[-1].get_stage_label()
+
 
 class DGContext(object):
     def __init__(self, gatherer):
@@ -52,6 +73,11 @@ class DataGatherer(object):
         self._sub_label = sub_label
         return
 
+    def get_stage_label(self):
+        if self._sub_label:
+            return self._label + '/' + self._sub_label
+        return self._label
+
     def start(self):
         self._timing = {
             'start': datetime.utcnow(),
@@ -60,6 +86,7 @@ class DataGatherer(object):
         }
         self._counts = dict.fromkeys(self._counts_fields, 0)
         self._in_context = True
+        _get_active_gatherers().append(self)
         return
 
     def add(self, field, num=1):
@@ -75,6 +102,9 @@ class DataGatherer(object):
 
     def dump(self, err_type, err, tb):
         logger.info("Leaving manager env with error type: %s" % err_type)
+        active_gatherers = _get_active_gatherers()
+        if self in active_gatherers:
+            active_gatherers.remove(self)
         s3 = boto3.client('s3')
 
         if err_type:
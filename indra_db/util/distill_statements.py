@@ -5,11 +5,11 @@ __all__ = ['distill_stmts', 'get_filtered_rdg_stmts', 'get_filtered_db_stmts',
 import json
 import pickle
 import logging
+import warnings
 from datetime import datetime
 from collections import defaultdict
 
 from indra.util import clockit
-from indra.statements import Statement
 from indra.util.nested_dict import NestedDict
 from indra_db.databases import reader_versions
 
@@ -63,6 +63,7 @@ def extract_duplicates(stmts, key_func=None):
 
 def get_reading_stmt_dict(db, clauses=None, get_full_stmts=True):
     """Get a nested dict of statements, keyed by ref, content, and reading."""
+    from indra.statements import Statement
     # Construct the query for metadata from the database.
     elements = [db.TextRef, db.TextContent.id, db.TextContent.source,
                 db.TextContent.text_type, db.Reading.id,
@@ -228,6 +229,7 @@ def get_filtered_rdg_stmts(stmt_nd, get_full_stmts, linked_sids=None):
 
 def get_filtered_db_stmts(db, get_full_stmts=False, clauses=None):
     """Get the set of statements/ids from databases minus exact duplicates."""
+    from indra.statements import Statement
     # Only get the json if it's going to be used.
     if get_full_stmts:
         tbl_list = [db.RawStatements.json]
@@ -306,44 +308,64 @@ def distill_stmts(db, get_full_stmts=False, clauses=None,
     if len(bad_link_sids):
         logger.error("Found pre-existing evidence links that were bettered...")
         logger.info("Removing the links...")
-        rm_links = db.select_all(
-            db.RawUniqueLinks,
-            db.RawUniqueLinks.raw_stmt_id.in_(bad_link_sids)
-        )
-        db.delete_all(rm_links)
+        delete_raw_statements_by_id(db, bad_link_sids, remove=['links'])
 
     return stmts
 
 
-def delete_raw_statements_by_id(db, raw_sids, sync_session=False,
+RAW_STMT_DEPENDENTS = [
+    ('links', 'raw_unique_links', 'raw_stmt_id'),
+    ('agents', 'raw_agents', 'stmt_id'),
+    ('mods', 'raw_mods', 'stmt_id'),
+    ('muts', 'raw_muts', 'stmt_id'),
+    ('activity', 'raw_activity', 'stmt_id'),
+    ('discarded', 'discarded_statements', 'stmt_id'),
+    ('statements', 'raw_statements', 'id'),
+]
+
+
+def delete_raw_statements_by_id(db, raw_sids, sync_session=None,
                                 remove='all'):
-    """Delete raw statements, their agents, and their raw-unique links.
+    """Delete raw statements, and the rows that depend on them.
+
+    The ids are copied into a temporary table, and the rows in each table are
+    removed with a single join, in dependency order: evidence links, agents,
+    mods, muts, activity, discard records, and finally the statements
+    themselves, all in one transaction. Any number of ids may be given at
+    once.
 
-    It is best to batch over this function with sets of 1000 or so ids. Setting
-    sync_session to False will result in a much faster resolution, but you may
-    find some ORM objects have not been updated.
+    Note that `remove='all'` now covers every table that refers to the raw
+    statements. It used to remove only the links, agents, and statements, so
+    it now also deletes the matching rows of raw_mods, raw_muts,
+    raw_activity, and discarded_statements. Pass an explicit list to keep
+    any of them.
+
+    Parameters
+    ----------
+    db : :py:class:`DatabaseManager`
+        A database manager instance to access the database.
+    raw_sids : iterable[int]
+        The ids of the raw statements.
+    sync_session : None
+        Deprecated, and ignored: the deletion is done outside the ORM, so
+        objects already loaded in the session are never updated. Giving any
+        value raises a DeprecationWarning.
+    remove : 'all' or list[str]
+        Which of 'links', 'agents', 'mods', 'muts', 'activity', 'discarded',
+        and 'statements' to delete. By default, all of them.
+
+    Returns
+    -------
+    counts : OrderedDict
+        The number of rows deleted from each table, keyed by table name.
     """
+    if sync_session is not None:
+        warnings.warn("The sync_session argument is ignored, and will be "
+                      "removed: the ORM session is never synchronized.",
+                      DeprecationWarning)
     if remove == 'all':
-        remove = ['links', 'agents', 'statements']
-
-    # First, delete the evidence links.
-    if 'links' in remove:
-        ev_q = db.filter_query(db.RawUniqueLinks,
-                               db.RawUniqueLinks.raw_stmt_id.in_(raw_sids))
-        logger.info("Deleting any connected evidence links...")
-        ev_q.delete(synchronize_session=sync_session)
-
-    # Second, delete the agents.
-    if 'agents' in remove:
-        ag_q = db.filter_query(db.RawAgents,
-                               db.RawAgents.stmt_id.in_(raw_sids))
-        logger.info("Deleting all connected agents...")
-        ag_q.delete(synchronize_session=sync_session)
-
-    # Now finally delete the statements.
-    if 'statements' in remove:
-        raw_q = db.filter_query(db.RawStatements,
-                                db.RawStatements.id.in_(raw_sids))
-        logger.info("Deleting all raw indicated statements...")
-        raw_q.delete(synchronize_session=sync_session)
-    return
+        remove = [label for label, _, _ in RAW_STMT_DEPENDENTS]
+    targets = [(tbl_name, col_name)
+               for label, tbl_name, col_name in RAW_STMT_DEPENDENTS
+               if label in remove]
+    return db.delete_by_id_set(raw_sids, targets)
@@ -0,0 +1,145 @@
+"""Tools to move directory-format database dumps to and from s3.
+
+A directory-format dump (`pg_dump -Fd`) is a directory of files that may be
+written and read by several jobs in parallel. To keep it intact in transit,
+a manifest of the sha256 checksum of every file is written alongside the
+files, and checked before the dump is restored.
+"""
+
+__all__ = ['CHECKSUM_FILE', 'write_checksums', 'verify_checksums',
+           'upload_dump_dir', 'download_dump_dir', 'is_s3_dump_dir']
+
+import json
+import logging
+from os import path, listdir, makedirs
+from hashlib import sha256
+from concurrent.futures import ThreadPoolExecutor
+
+from indra_db.exceptions import IndraDbException
+
+logger = logging.getLogger(__name__)
+
+
+CHECKSUM_FILE = 'checksums.json'
+MULTIPART_CHUNK_SIZE = 64*2**20
+
+
+def _file_checksum(file_path, block_size=2**20):
+    h = sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _dump_file_names(dump_dir):
+    return sorted(fname for fname in listdir(dump_dir)
+                  if fname != CHECKSUM_FILE)
+
+
+def write_checksums(dump_dir, workers=4):
+    """Write the checksums of the files in a dump directory to a manifest."""
+    fnames = _dump_file_names(dump_dir)
+    with ThreadPoolExecutor(workers) as pool:
+        sums = pool.map(_file_checksum,
+                        [path.join(dump_dir, fname) for fname in fnames])
+        checksums = dict(zip(fnames, sums))
+    with open(path.join(dump_dir, CHECKSUM_FILE), 'w') as f:
+        json.dump(checksums, f, indent=1)
+    return checksums
+
+
+def verify_checksums(dump_dir, workers=4):
+    """Check the files in a dump directory against its manifest.
+
+    An IndraDbException is raised if any file is missing or differs from
+    the checksum recorded when the dump was made. If there is no manifest,
+    a warning is logged, and the dump is assumed to be good.
+    """
+    manifest = path.join(dump_dir, CHECKSUM_FILE)
+    if not path.exists(manifest):
+        logger.warning("No checksums found for %s; not verifying."
+                       % dump_dir)
+        return
+    with open(manifest, 'r') as f:
+        checksums = json.load(f)
+
+    missing = set(checksums) - set(_dump_file_names(dump_dir))
+    if missing:
+        raise IndraDbException("Dump %s is missing files: %s"
+                               % (dump_dir, sorted(missing)))
+
+    fnames = sorted(checksums)
+    with ThreadPoolExecutor(workers) as pool:
+        sums = pool.map(_file_checksum,
+                        [path.join(dump_dir, fname) for fname in fnames])
+        bad = [fname for fname, checksum in zip(fnames, sums)
+               if checksum != checksums[fname]]
+    if bad:
+        raise IndraDbException("Checksums of files in dump %s do not match: "
+                               "%s" % (dump_dir, bad))
+    logger.info("Verified checksums of %d files in %s."
+                % (len(fnames), dump_dir))
+    return
+
+
+def _get_transfer_config(workers):
+    from boto3.s3.transfer import TransferConfig
+    return TransferConfig(multipart_chunksize=MULTIPART_CHUNK_SIZE,
+                          max_concurrency=workers)
+
+
+def upload_dump_dir(dump_dir, s3_path, workers=4):
+    """Upload a dump directory, with its checksums, to an s3 prefix.
+
+    Each file is uploaded in parallel multipart chunks. The manifest of
+    checksums is uploaded last, so its presence marks a complete dump.
+    """
+    import boto3
+    s3 = boto3.client('s3')
+    config = _get_transfer_config(workers)
+    fnames = _dump_file_names(dump_dir)
+
+    def upload(fname):
+        s3.upload_file(path.join(dump_dir, fname), s3_path.bucket,
+                       s3_path.get_element_path(fname).key, Config=config)
+
+    logger.info("Uploading %d dump files to %s." % (len(fnames), s3_path))
+    with ThreadPoolExecutor(workers) as pool:
+        list(pool.map(upload, fnames))
+    upload(CHECKSUM_FILE)
+    return
+
+
+def download_dump_dir(s3_path, dump_dir, workers=4):
+    """Download a dump from an s3 prefix into a directory, and verify it."""
+    import boto3
+    s3 = boto3.client('s3')
+    config = _get_transfer_config(workers)
+    checksum_key = s3_path.get_element_path(CHECKSUM_FILE)
+    checksums = json.loads(checksum_key.get(s3)['Body'].read())
+
+    makedirs(dump_dir, exist_ok=True)
+
+    def download(fname):
+        s3.download_file(s3_path.bucket, s3_path.get_element_path(fname).key,
+                         path.join(dump_dir, fname), Config=config)
+
+    logger.info("Downloading %d dump files from %s."
+                % (len(checksums), s3_path))
+    with ThreadPoolExecutor(workers) as pool:
+        list(pool.map(download, list(checksums) + [CHECKSUM_FILE]))
+    verify_checksums(dump_dir, workers)
+    return
+
+
+def is_s3_dump_dir(s3_path):
+    """Check whether an s3 path is the prefix of a complete dump directory."""
+    import boto3
+    from botocore.exceptions import ClientError
+    s3 = boto3.client('s3')
+    try:
+        s3.head_object(**s3_path.get_element_path(CHECKSUM_FILE).kw())
+    except ClientError:
+        return False
+    return True
@@ -1,19 +1,63 @@
 __all__ = ['unpack', '_get_trids', '_fix_evidence_refs',
            'get_raw_stmts_frm_db_list', '_set_evidence_text_ref',
-           'get_statement_object']
+           'get_statement_object', 'in_values', 'IN_LIST_THRESHOLD']
 
 import json
 import zlib
 import logging
 
+from sqlalchemy import any_, all_, bindparam, cast
+from sqlalchemy.dialects.postgresql import ARRAY
+
 from indra.util import clockit
-from indra.statements import Statement
 
 logger = logging.getLogger('util-helpers')
 
 
+IN_LIST_THRESHOLD = 50
+
+
+def in_values(column, values, negate=False, threshold=IN_LIST_THRESHOLD):
+    """Get a clause requiring `column` to be (or not be) among `values`.
+
+    SQLAlchemy renders `column.in_(values)` with a separate bound parameter
+    for every element, which is slow to compile, and slow for Postgres to
+    plan, once the collection gets large. Past `threshold` values, the
+    collection is instead sent as a single array parameter, giving
+    `column = ANY(:array)` (or `column != ALL(:array)` if `negate` is True).
+
+    Parameters
+    ----------
+    column : sqlalchemy column or instrumented attribute
+        The column to constrain.
+    values : iterable
+        The values that column should (or should not) take. Any iterable,
+        including sets, generators, and dict keys, is accepted.
+    negate : bool
+        If True, require that the column NOT be among the values. Default is
+        False.
+    threshold : int
+        The size above which the array form is used. Default is
+        IN_LIST_THRESHOLD.
+    """
+    values = list(values)
+    if len(values) <= threshold:
+        if negate:
+            return column.notin_(values)
+        return column.in_(values)
+
+    # Cast the array, so values such as strings of digits are converted to
+    # the type of the column, as they would be in an IN list.
+    arr_type = ARRAY(column.type)
+    arr = cast(bindparam(None, values, type_=arr_type), arr_type)
+    if negate:
+        return column != all_(arr)
+    return column == any_(arr)
+
+
 def get_statement_object(db_stmt):
     """Get an INDRA Statement object from a db_stmt."""
+    from indra.statements import Statement
     if isinstance(db_stmt, bytes):
         jb = db_stmt
     else:
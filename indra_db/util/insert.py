@@ -7,8 +7,6 @@ import pickle
 import logging
 
 from indra.util.get_version import get_version
-from indra.statements import Complex, SelfModification, ActiveForm, \
-    Conversion, Translocation, make_hash
 
 from indra_db.exceptions import IndraDbException
 
@@ -145,6 +143,7 @@ def insert_pa_agents(db, stmts, verbose=False, skip=None, commit=True):
 
 
 def hash_pa_agents(agent_tuples):
+    from indra.statements import make_hash
     logger.info("Adding hashes to %d pa agent refs." % len(agent_tuples))
     hashed_tuples = []
     for ref in agent_tuples:
@@ -173,6 +172,8 @@ def regularize_agent_id(id_val, id_ns):
 
 def extract_agent_data(stmt, stmt_id):
     """Create the tuples for copying agents into the database."""
+    from indra.statements import Complex, SelfModification, ActiveForm, \
+        Conversion, Translocation
     # Figure out how the agents are structured and assign roles.
     ag_list = stmt.agent_list(deep_sorted=True)
     nary_stmt_types = [Complex, SelfModification, ActiveForm, Conversion,
@@ -321,6 +322,7 @@ def insert_pa_stmts(db, stmts, verbose=False, do_copy=True,
         are not committed (thus allowing multiple related insertions to be
         neatly rolled back upon failure.)
     """
+    from indra.statements import ActiveForm
     logger.info("Beginning to insert pre-assembled statements.")
     stmt_data = []
     indra_version = get_version()
@@ -0,0 +1,216 @@
+"""Opt-in instrumentation of the SQL issued through a DatabaseManager.
+
+When enabled (see `DatabaseManager.enable_stats`), every statement executed
+through the engine is reduced to a fingerprint, with literals and parameters
+replaced by `?`, and a count, latency histogram, and number of rows returned
+are kept for each fingerprint. Copies are recorded by table, with the number
+of rows and bytes sent. All records are labeled with the `DataGatherer` stage
+active at the time, if any.
+
+The results are available as json, or in the Prometheus text format.
+"""
+
+__all__ = ['QueryStats', 'fingerprint_sql']
+
+import re
+import json
+import logging
+from hashlib import md5
+from threading import Lock
+from time import perf_counter
+
+from indra_db.util.data_gatherer import get_current_stage
+
+logger = logging.getLogger(__name__)
+
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 60)
+
+_param_patt = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<![:\w]):\w+")
+_literal_patt = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_list_patt = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_space_patt = re.compile(r"\s+")
+
+
+def fingerprint_sql(sql):
+    """Reduce a SQL statement to a form shared by all its executions."""
+    fp = _param_patt.sub('?', sql)
+    fp = _literal_patt.sub('?', fp)
+    fp = _list_patt.sub('(?, ...)', fp)
+    return _space_patt.sub(' ', fp).strip()
+
+
+def _escape_label(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"')\
+        .replace('\n', r'\n')
+
+
+class _Histogram(object):
+    """Running count, sum, and bucketed count of observed durations."""
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0]*len(LATENCY_BUCKETS)
+
+    def observe(self, dt):
+        self.count += 1
+        self.total += dt
+        self.max = max(self.max, dt)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if dt <= bound:
+                self.buckets[i] += 1
+                break
+
+    def get_json(self):
+        cumulative = []
+        n = 0
+        for bound, num in zip(LATENCY_BUCKETS, self.buckets):
+            n += num
+            cumulative.append([bound, n])
+        return {'count': self.count, 'total_sec': self.total,
+                'max_sec': self.max, 'buckets': cumulative}
+
+
+class QueryStats(object):
+    """A thread-safe record of the queries and copies made to a database.
+
+    Parameters
+    ----------
+    label : str or None
+        A label for the database, included in the Prometheus output.
+    """
+    def __init__(self, label=None):
+        self.label = label
+        self._lock = Lock()
+        self._queries = {}
+        self._copies = {}
+        self._statements = {}
+
+    def reset(self):
+        """Clear all the records."""
+        with self._lock:
+            self._queries = {}
+            self._copies = {}
+            self._statements = {}
+
+    def record_query(self, sql, duration, rows=0):
+        """Record one execution of a SQL statement."""
+        fp = fingerprint_sql(sql)
+        fp_id = md5(fp.encode('utf-8')).hexdigest()[:12]
+        key = (fp_id, get_current_stage())
+        with self._lock:
+            self._statements[fp_id] = fp
+            entry = self._queries.get(key)
+            if entry is None:
+                entry = self._queries[key] = {'hist': _Histogram(), 'rows': 0}
+            entry['hist'].observe(duration)
+            entry['rows'] += max(rows, 0)
+
+    def record_copy(self, table, duration, rows=0, n_bytes=0):
+        """Record one copy into a table."""
+        key = (table, get_current_stage())
+        with self._lock:
+            entry = self._copies.get(key)
+            if entry is None:
+                entry = self._copies[key] = {'hist': _Histogram(), 'rows': 0,
+                                             'bytes': 0}
+            entry['hist'].observe(duration)
+            entry['rows'] += rows
+            entry['bytes'] += n_bytes
+
+    def attach(self, engine):
+        """Listen for the statements executed by a sqlalchemy engine."""
+        from sqlalchemy import event
+
+        def before(conn, cursor, statement, parameters, context,
+                   executemany):
+            starts = conn.info.setdefault('query_stats_start', [])
+            starts.append(perf_counter())
+
+        def after(conn, cursor, statement, parameters, context, executemany):
+            start = conn.info['query_stats_start'].pop()
+            self.record_query(statement, perf_counter() - start,
+                              cursor.rowcount)
+
+        def on_error(exception_context):
+            conn = exception_context.connection
+            starts = conn.info.get('query_stats_start') if conn else None
+            if starts:
+                start = starts.pop()
+                self.record_query(exception_context.statement or '',
+                                  perf_counter() - start)
+
+        event.listen(engine, 'before_cursor_execute', before)
+        event.listen(engine, 'after_cursor_execute', after)
+        event.listen(engine, 'handle_error', on_error)
+        return
+
+    def get_json(self):
+        """Get the stats as json, with the slowest statements first."""
+        with self._lock:
+            queries = [dict(fingerprint=fp_id, stage=stage,
+                            statement=self._statements[fp_id],
+                            rows=entry['rows'], **entry['hist'].get_json())
+                       for (fp_id, stage), entry in self._queries.items()]
+            copies = [dict(table=table, stage=stage, rows=entry['rows'],
+                           bytes=entry['bytes'], **entry['hist'].get_json())
+                      for (table, stage), entry in self._copies.items()]
+        queries.sort(key=lambda d: d['total_sec'], reverse=True)
+        copies.sort(key=lambda d: d['total_sec'], reverse=True)
+        return {'label': self.label, 'queries': queries, 'copies': copies}
+
+    def dump_json(self, fname):
+        """Write the json stats to a file."""
+        with open(fname, 'w') as f:
+            json.dump(self.get_json(), f, indent=2)
+
+    def get_prometheus(self):
+        """Get the stats in the Prometheus text exposition format.
+
+        Statements are labeled by the id of their fingerprint, as the full
+        text would make for unwieldy labels; the json gives the statement for
+        each id.
+        """
+        stats = self.get_json()
+        lines = []
+
+        def labels(**kwargs):
+            if self.label is not None:
+                kwargs = dict(db=self.label, **kwargs)
+            return ','.join('%s="%s"' % (k, _escape_label(v))
+                            for k, v in kwargs.items() if v is not None)
+
+        def add_histogram(name, entries, label_keys):
+            lines.append('# TYPE %s histogram' % name)
+            for entry in entries:
+                lbl = {k: entry[k] for k in label_keys}
+                for bound, n in entry['buckets']:
+                    lines.append('%s_bucket{%s} %d'
+                                 % (name, labels(le=bound, **lbl), n))
+                lines.append('%s_bucket{%s} %d'
+                             % (name, labels(le='+Inf', **lbl),
+                                entry['count']))
+                lines.append('%s_sum{%s} %f'
+                             % (name, labels(**lbl), entry['total_sec']))
+                lines.append('%s_count{%s} %d'
+                             % (name, labels(**lbl), entry['count']))
+
+        def add_counter(name, entries, label_keys, field):
+            lines.append('# TYPE %s counter' % name)
+            for entry in entries:
+                lbl = {k: entry[k] for k in label_keys}
+                lines.append('%s{%s} %d' % (name, labels(**lbl), entry[field]))
+
+        q_keys = ('fingerprint', 'stage')
+        add_histogram('indra_db_query_seconds', stats['queries'], q_keys)
+        add_counter('indra_db_query_rows_total', stats['queries'], q_keys,
+                    'rows')
+
+        c_keys = ('table', 'stage')
+        add_histogram('indra_db_copy_seconds', stats['copies'], c_keys)
+        add_counter('indra_db_copy_rows_total', stats['copies'], c_keys,
+                    'rows')
+        add_counter('indra_db_copy_bytes_total', stats['copies'], c_keys,
+                    'bytes')
+        return '\n'.join(lines) + '\n'
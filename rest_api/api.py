@@ -2,32 +2,30 @@ import sys
 import json
 import logging
 from os import path, environ
-from functools import wraps
+from functools import wraps, lru_cache
 from datetime import datetime
 
-from flask import Flask, request, abort, Response, redirect, jsonify
+from flask import Flask, request, abort, Response, redirect, jsonify, \
+    stream_with_context
 from flask import url_for as base_url_for
 from flask_compress import Compress
 from flask_cors import CORS
 from flask_jwt_extended import get_jwt_identity, jwt_optional
 from jinja2 import Environment, ChoiceLoader
 
-from indra.assemblers.html.assembler import loader as indra_loader, \
-    stmts_from_json, HtmlAssembler, SOURCE_COLORS, _format_evidence_text, \
-    _format_stmt_text
-from indra.assemblers.english import EnglishAssembler
-from indra.statements import make_statement_camel
 from indra_db.client.readonly.query import HasAgent, HasType, HasNumAgents, \
     HasOnlySource, HasHash, QueryCore, FromPapers, FromMeshId, EvidenceFilter, \
-    EmptyQuery
+    EmptyQuery, HasSources, get_evidence
 
 from indralab_auth_tools.auth import auth, resolve_auth, config_auth
 
+from indra_db import get_ro
 from indra_db.exceptions import BadHashError
 from indra_db.client import submit_curation, stmt_from_interaction,\
-    get_curations
-from .util import process_agent, DbAPIError, LogTracker, sec_since, get_source,\
-    get_s3_client, gilda_ground
+    get_curations, get_curation_counts
+from .util import process_agents, DbAPIError, LogTracker, sec_since, get_source,\
+    get_s3_client, gilda_ground, StageProfiler, LocalHistogramSink, \
+    AdmissionController, AdmissionRejected, estimate_query_cost, S3JsonCache
 
 logger = logging.getLogger("db rest api")
 logger.setLevel(logging.INFO)
@@ -44,6 +42,11 @@ if not TESTING:
     app.config['DEBUG'] = True
     SC, jwt = config_auth(app)
 
+# Compress the binary msgpack responses along with the usual text types.
+app.config['COMPRESS_MIMETYPES'] = ['text/html', 'text/css', 'text/xml',
+                                    'application/json',
+                                    'application/javascript',
+                                    'application/x-msgpack']
 Compress(app)
 CORS(app)
 
@@ -51,9 +54,24 @@ TITLE = "The INDRA Database"
 HERE = path.abspath(path.dirname(__file__))
 DEPLOYMENT = environ.get('INDRA_DB_API_DEPLOYMENT')
 
-# Instantiate a jinja2 env.
-env = Environment(loader=ChoiceLoader([app.jinja_loader, auth.jinja_loader,
-                                       indra_loader]))
+# Optionally keep histograms of the time spent in each stage of a request.
+if environ.get('INDRA_DB_API_TIMING') == '1':
+    TIMING_SINK = LocalHistogramSink()
+else:
+    TIMING_SINK = None
+
+# Keep the monitor data from S3 in memory, checking for changes at most once
+# a minute.
+MONITOR_CACHE = S3JsonCache(
+    max_age=float(environ.get('INDRA_DB_API_MONITOR_MAX_AGE', 60))
+)
+
+# Limit the number of light and heavy queries that run at once.
+ADMISSION = AdmissionController(
+    light_slots=int(environ.get('INDRA_DB_API_LIGHT_SLOTS', 16)),
+    heavy_slots=int(environ.get('INDRA_DB_API_HEAVY_SLOTS', 2)),
+    heavy_cost=float(environ.get('INDRA_DB_API_HEAVY_COST', 1e6)),
+)
 
 
 def url_for(*args, **kwargs):
@@ -63,18 +81,48 @@ def url_for(*args, **kwargs):
     return res
 
 
-# Here we can add functions to the jinja2 env.
-env.globals.update(url_for=url_for)
+@lru_cache(maxsize=1)
+def get_jinja_env():
+    """Get the jinja2 env, which is only built when a page is rendered.
+
+    The INDRA HTML assembler, which supplies some of the templates, is slow to
+    import, so it is not loaded until it is needed.
+    """
+    from indra.assemblers.html.assembler import loader as indra_loader
+    env = Environment(loader=ChoiceLoader([app.jinja_loader,
+                                           auth.jinja_loader, indra_loader]))
+
+    # Here we can add functions to the jinja2 env.
+    env.globals.update(url_for=url_for)
+    return env
+
+
+@lru_cache(maxsize=1)
+def get_shared_ro():
+    """Get the readonly database manager shared by all requests.
+
+    Each thread serving requests gets its own session from the manager's
+    connection pool, which is given back when its request is done.
+    """
+    return get_ro('primary')
+
+
+@app.teardown_request
+def release_ro_session(exc=None):
+    if get_shared_ro.cache_info().currsize:
+        get_shared_ro().release_session()
 
 
 MAX_STATEMENTS = int(1e3)
+MAX_BATCH_QUERIES = 500
+MAX_EVIDENCE_PAGE = 1000
 REDACT_MESSAGE = '[MISSING/INVALID API KEY: limited to 200 char for Elsevier]'
 
 
 def render_my_template(template, title, **kwargs):
     kwargs['title'] = TITLE + ': ' + title
     kwargs['identity'] = get_jwt_identity()
-    return env.get_template(template).render(**kwargs)
+    return get_jinja_env().get_template(template).render(**kwargs)
 
 
 def jwt_nontest_optional(func):
@@ -84,6 +132,130 @@ def jwt_nontest_optional(func):
         return jwt_optional(func)
 
 
+def _get_auths(web_query):
+    """Resolve the user and their access to restricted content."""
+    has = dict.fromkeys(['elsevier', 'medscan'], False)
+    user = None
+    if not TESTING:
+        user, roles = resolve_auth(web_query)
+        for role in roles:
+            for resource in has.keys():
+                has[resource] |= role.permissions.get(resource, False)
+        logger.info('Auths: %s' % str(has))
+    else:
+        web_query.pop('api_key', None)
+    return user, has
+
+
+def _serialize(res_json, fmt):
+    """Serialize a result as msgpack if requested, and otherwise as JSON.
+
+    Unlike JSON, msgpack keeps integer hashes as 64 bit integers, including
+    where they are map keys, so clients must unpack with
+    `strict_map_key=False`.
+    """
+    if fmt == 'msgpack':
+        import msgpack
+        return msgpack.packb(res_json, use_bin_type=True), \
+            'application/x-msgpack'
+    return json.dumps(res_json), 'application/json'
+
+
+def _reject_busy(err):
+    """Abort with a 429 response for a query that could not be admitted."""
+    abort(Response(str(err), 429,
+                   headers={'Retry-After': str(err.retry_after)}))
+
+
+def _answer_query(db_query, has, offs, ev_lim, max_stmts, best_first, fmt,
+                  w_english, w_cur_counts, ro=None, profiler=None):
+    """Run a statement query, and redact and annotate the results."""
+    start_time = datetime.now()
+    if ro is None:
+        ro = get_shared_ro()
+    if profiler is None:
+        profiler = StageProfiler(None)
+    if not has['medscan']:
+        minus_q = ~HasOnlySource('medscan')
+        db_query &= minus_q
+        ev_filter = minus_q.ev_filter()
+    else:
+        ev_filter = None
+
+    result = db_query.get_statements(ro=ro, offset=offs, limit=max_stmts,
+                                     ev_limit=ev_lim, best_first=best_first,
+                                     evidence_filter=ev_filter)
+    for stage, secs in result.timings.items():
+        profiler.add(stage, secs)
+
+    logger.info("Got statements after %s seconds." % sec_since(start_time))
+
+    # Handle any necessary redactions
+    redaction_start = datetime.now()
+    res_json = result.json()
+    stmts_json = res_json.pop('results')
+    elsevier_redactions = 0
+    source_counts = result.source_counts
+    if w_english:
+        from indra.assemblers.html.assembler import stmts_from_json, \
+            _format_evidence_text, _format_stmt_text
+    if not all(has.values()) or fmt == 'json-js' or w_english:
+        for h, stmt_json in stmts_json.copy().items():
+            if w_english:
+                stmt = stmts_from_json([stmt_json])[0]
+                stmt_json['english'] = _format_stmt_text(stmt)
+                stmt_json['evidence'] = _format_evidence_text(stmt)
+
+            if has['elsevier'] and fmt != 'json-js' and not w_english:
+                continue
+
+            if not has['medscan']:
+                source_counts[h].pop('medscan', 0)
+
+            for ev_json in stmt_json['evidence'][:]:
+                if fmt == 'json-js':
+                    ev_json['source_hash'] = str(ev_json['source_hash'])
+
+                # Check for elsevier and redact if necessary
+                if not has['elsevier'] and \
+                        get_source(ev_json) == 'elsevier':
+                    text = ev_json['text']
+                    if len(text) > 200:
+                        ev_json['text'] = text[:200] + REDACT_MESSAGE
+                        elsevier_redactions += 1
+
+    logger.info(f"Redacted {elsevier_redactions} pieces of elsevier "
+                f"evidence.")
+
+    profiler.add('redaction', sec_since(redaction_start))
+    logger.info("Finished redacting evidence after %s seconds."
+                % sec_since(start_time))
+
+    # Get counts of the curations for the resulting statements.
+    if w_cur_counts:
+        with profiler.stage('cur_counts'):
+            cur_counts = get_curation_counts(stmts_json.keys())
+        logger.info("Found curations for %d statements" % len(cur_counts))
+        for h, src_counts in cur_counts.items():
+            # Work these counts into the evidence dict structure.
+            for ev_json in stmts_json[h]['evidence']:
+                src_hash = ev_json.get('source_hash')
+                if src_hash is not None and int(src_hash) in src_counts:
+                    ev_json['num_curations'] = src_counts[int(src_hash)]
+        res_json['num_curations'] = {h: sum(src_cnts.values())
+                                     for h, src_cnts in cur_counts.items()}
+
+    # Add derived values to the res_json.
+    res_json['offset'] = offs
+    res_json['evidence_limit'] = ev_lim
+    res_json['statement_limit'] = MAX_STATEMENTS
+    res_json['statements_returned'] = len(stmts_json)
+    res_json['end_of_statements'] = (len(stmts_json) < MAX_STATEMENTS)
+    res_json['statements_removed'] = 0
+    res_json['evidence_returned'] = result.returned_evidence
+    return res_json, stmts_json, source_counts
+
+
 def _query_wrapper(get_db_query):
     logger.info("Calling outer wrapper.")
 
@@ -91,6 +263,7 @@ def _query_wrapper(get_db_query):
     @jwt_nontest_optional
     def decorator(*args, **kwargs):
         tracker = LogTracker()
+        profiler = StageProfiler(get_db_query.__name__, TIMING_SINK)
         start_time = datetime.now()
         logger.info("Got query for %s at %s!"
                     % (get_db_query.__name__, start_time))
@@ -106,22 +279,14 @@ def _query_wrapper(get_db_query):
         w_cur_counts = _pop(web_query, 'with_cur_counts', False, bool)
 
         # Figure out authorization.
-        has = dict.fromkeys(['elsevier', 'medscan'], False)
-        if not TESTING:
-            user, roles = resolve_auth(web_query)
-            for role in roles:
-                for resource in has.keys():
-                    has[resource] |= role.permissions.get(resource, False)
-            logger.info('Auths: %s' % str(has))
-        else:
-            web_query.pop('api_key', None)
-            has['elsevier'] = False
-            has['medscan'] = False
+        with profiler.stage('auth'):
+            user, has = _get_auths(web_query)
 
         # Actually run the function.
         logger.info("Running function %s after %s seconds."
                     % (get_db_query.__name__, sec_since(start_time)))
-        db_query = get_db_query(web_query, *args, **kwargs)
+        with profiler.stage('query_build'):
+            db_query = get_db_query(web_query, *args, **kwargs)
         if isinstance(db_query, Response):
             return db_query
         elif not isinstance(db_query, QueryCore):
@@ -133,109 +298,53 @@ def _query_wrapper(get_db_query):
             else:
                 ev_lim = 10
 
-        if not has['medscan']:
-            minus_q = ~HasOnlySource('medscan')
-            db_query &= minus_q
-            ev_filter = minus_q.ev_filter()
-        else:
-            ev_filter = None
-
-        result = db_query.get_statements(offset=offs, limit=max_stmts,
-                                         ev_limit=ev_lim, best_first=best_first,
-                                         evidence_filter=ev_filter)
+        cost = estimate_query_cost(db_query, max_stmts, ev_lim)
+        try:
+            with ADMISSION.admit(cost):
+                res_json, stmts_json, source_counts = \
+                    _answer_query(db_query, has, offs, ev_lim, max_stmts,
+                                  best_first, fmt, w_english, w_cur_counts,
+                                  profiler=profiler)
+        except AdmissionRejected as e:
+            _reject_busy(e)
+            return
 
         logger.info("Finished function %s after %s seconds."
                     % (get_db_query.__name__, sec_since(start_time)))
 
-        # Handle any necessary redactions
-        res_json = result.json()
-        stmts_json = res_json.pop('results')
-        elsevier_redactions = 0
-        source_counts = result.source_counts
-        if not all(has.values()) or fmt == 'json-js' or w_english:
-            for h, stmt_json in stmts_json.copy().items():
-                if w_english:
-                    stmt = stmts_from_json([stmt_json])[0]
-                    stmt_json['english'] = _format_stmt_text(stmt)
-                    stmt_json['evidence'] = _format_evidence_text(stmt)
-
-                if has['elsevier'] and fmt != 'json-js' and not w_english:
-                    continue
-
-                if not has['medscan']:
-                    source_counts[h].pop('medscan', 0)
-
-                for ev_json in stmt_json['evidence'][:]:
-                    if fmt == 'json-js':
-                        ev_json['source_hash'] = str(ev_json['source_hash'])
-
-                    # Check for elsevier and redact if necessary
-                    if not has['elsevier'] and \
-                            get_source(ev_json) == 'elsevier':
-                        text = ev_json['text']
-                        if len(text) > 200:
-                            ev_json['text'] = text[:200] + REDACT_MESSAGE
-                            elsevier_redactions += 1
-
-        logger.info(f"Redacted {elsevier_redactions} pieces of elsevier "
-                    f"evidence.")
-
-        logger.info("Finished redacting evidence for %s after %s seconds."
-                    % (get_db_query.__name__, sec_since(start_time)))
-
-        # Get counts of the curations for the resulting statements.
-        if w_cur_counts:
-            curations = get_curations(pa_hash=set(stmts_json.keys()))
-            logger.info("Found %d curations" % len(curations))
-            cur_counts = {}
-            for curation in curations:
-                # Update the overall counts.
-                if curation.pa_hash not in cur_counts:
-                    cur_counts[curation.pa_hash] = 0
-                cur_counts[curation.pa_hash] += 1
-
-                # Work these counts into the evidence dict structure.
-                for ev_json in stmts_json[curation.pa_hash]['evidence']:
-                    if str(ev_json['source_hash']) == str(curation.source_hash):
-                        ev_json['num_curations'] = \
-                            ev_json.get('num_curations', 0) + 1
-                        break
-            res_json['num_curations'] = cur_counts
-
-        # Add derived values to the res_json.
-        res_json['offset'] = offs
-        res_json['evidence_limit'] = ev_lim
-        res_json['statement_limit'] = MAX_STATEMENTS
-        res_json['statements_returned'] = len(stmts_json)
-        res_json['end_of_statements'] = (len(stmts_json) < MAX_STATEMENTS)
-        res_json['statements_removed'] = 0
-        res_json['evidence_returned'] = result.returned_evidence
-
         if fmt == 'html':
-            title = TITLE + ': ' + 'Results'
-            ev_totals = res_json.pop('evidence_totals')
-            stmts = stmts_from_json(stmts_json.values())
-            html_assembler = HtmlAssembler(stmts, res_json, ev_totals,
-                                           source_counts, title=title,
-                                           db_rest_url=request.url_root[:-1])
-            idbr_template = env.get_template('idbr_statements_view.html')
-            identity = user.identity() if user else None
-            content = html_assembler.make_model(idbr_template,
-                                                identity=identity)
-            if tracker.get_messages():
-                level_stats = ['%d %ss' % (n, lvl.lower())
-                               for lvl, n in tracker.get_level_stats().items()]
-                msg = ' '.join(level_stats)
-                content = html_assembler.append_warning(msg)
+            with profiler.stage('render'):
+                from indra.assemblers.html.assembler import stmts_from_json, \
+                    HtmlAssembler
+                title = TITLE + ': ' + 'Results'
+                ev_totals = res_json.pop('evidence_totals')
+                stmts = stmts_from_json(stmts_json.values())
+                html_assembler = HtmlAssembler(
+                    stmts, res_json, ev_totals, source_counts, title=title,
+                    db_rest_url=request.url_root[:-1]
+                )
+                idbr_template = \
+                    get_jinja_env().get_template('idbr_statements_view.html')
+                identity = user.identity() if user else None
+                content = html_assembler.make_model(idbr_template,
+                                                    identity=identity)
+                if tracker.get_messages():
+                    level_stats = ['%d %ss' % (n, lvl.lower())
+                                   for lvl, n
+                                   in tracker.get_level_stats().items()]
+                    msg = ' '.join(level_stats)
+                    content = html_assembler.append_warning(msg)
             mimetype = 'text/html'
-        else:  # Return JSON for all other values of the format argument
-            res_json.update(tracker.get_level_stats())
-            res_json['statements'] = stmts_json
-            res_json['source_counts'] = source_counts
-            content = json.dumps(res_json)
-            mimetype = 'application/json'
+        else:  # Return JSON (or msgpack) for other values of the format
+            with profiler.stage('render'):
+                res_json.update(tracker.get_level_stats())
+                res_json['statements'] = stmts_json
+                res_json['source_counts'] = source_counts
+            with profiler.stage('serialization'):
+                content, mimetype = _serialize(res_json, fmt)
 
         resp = Response(content, mimetype=mimetype)
+        profiler.finish(resp)
         logger.info("Exiting with %d statements with %d/%d evidence of size "
                     "%f MB after %s seconds."
                     % (res_json['statements_returned'],
@@ -271,6 +380,7 @@ def ground():
 
 @dep_route('/search', methods=['GET'])
 def search():
+    from indra.assemblers.html.assembler import SOURCE_COLORS
     return render_my_template('search.html', 'Search',
                               source_colors=SOURCE_COLORS)
 
@@ -299,41 +409,61 @@ def get_data_explorer():
     return render_my_template('daily_data.html', 'Monitor')
 
 
+def _serve_monitor_json(key):
+    from botocore.exceptions import ClientError
+    from indra_db.util.data_gatherer import S3_DATA_LOC
+
+    try:
+        etag, _, body = MONITOR_CACHE.get(S3_DATA_LOC['bucket'],
+                                          S3_DATA_LOC['prefix'] + key)
+    except ClientError as e:
+        if e.response['Error']['Code'] not in {'NoSuchKey', '404'}:
+            raise
+        abort(Response(f"No monitor data found for {key}.", 404))
+        return
+    if etag in request.if_none_match:
+        return Response(status=304, headers={'ETag': f'"{etag}"'})
+    return Response(body, mimetype='application/json',
+                    headers={'ETag': f'"{etag}"'})
+
+
 @dep_route('/monitor/data/runtime')
 def serve_runtime():
+    return _serve_monitor_json('runtimes.json')
+
+
+def _get_monitor_stages():
+    """Get the names of the stages with monitor data, from the cached list."""
     from indra_db.util.data_gatherer import S3_DATA_LOC
 
-    s3 = get_s3_client()
-    res = s3.get_object(Bucket=S3_DATA_LOC['bucket'],
-                        Key=S3_DATA_LOC['prefix']+'runtimes.json')
-    return jsonify(json.loads(res['Body'].read()))
+    keys = MONITOR_CACHE.list_keys(S3_DATA_LOC['bucket'],
+                                   S3_DATA_LOC['prefix'])
+    return [k[:-len('.json')] for k in (key[len(S3_DATA_LOC['prefix']):]
+                                        for key in keys)
+            if k.endswith('.json') and not k.startswith('runtimes')]
 
 
 @dep_route('/monitor/data/liststages')
 def list_stages():
-    from indra_db.util.data_gatherer import S3_DATA_LOC
-
-    s3 = get_s3_client()
-    res = s3.list_objects_v2(Bucket=S3_DATA_LOC['bucket'],
-                             Prefix=S3_DATA_LOC['prefix'],
-                             Delimiter='/')
-
-    ret = [k[:-len('.json')] for k in (e['Key'][len(S3_DATA_LOC['prefix']):]
-                                       for e in res['Contents'])
-           if k.endswith('.json') and not k.startswith('runtimes')]
-    print(ret)
-    return jsonify(ret)
+    return jsonify(_get_monitor_stages())
 
 
 @dep_route('/monitor/data/<stage>')
 def serve_stages(stage):
-    from indra_db.util.data_gatherer import S3_DATA_LOC
+    # Only known stages are fetched, so that arbitrary paths are neither sent
+    # to S3 nor given a place in the cache.
+    if stage not in _get_monitor_stages():
+        abort(Response(f"Unknown stage: {stage}.", 404))
+        return
+    return _serve_monitor_json(stage + '.json')
 
-    s3 = get_s3_client()
-    res = s3.get_object(Bucket=S3_DATA_LOC['bucket'],
-                        Key=S3_DATA_LOC['prefix'] + stage + '.json')
 
-    return jsonify(json.loads(res['Body'].read()))
+@dep_route('/monitor/timing')
+def serve_timing():
+    if TIMING_SINK is None:
+        abort(Response("Request timing is not enabled.", 404))
+        return
+    return jsonify(TIMING_SINK.summary())
 
 
 @dep_route('/statements', methods=['GET'])
@@ -363,12 +493,9 @@ def _db_query_from_web_query(query_dict, require=None, empty_web_query=False):
     filter_ev = query_dict.pop('filter_ev', 'false').lower() == 'true'
     ev_filter = EvidenceFilter()
 
-    # Get the agents without specified locations (subject or object).
-    for raw_ag in iter_free_agents(query_dict):
-        ag, ns = process_agent(raw_ag)
-        db_query &= HasAgent(ag, namespace=ns)
-
-    # Get the agents with specified roles.
+    # Gather the agents without specified locations (subject or object),
+    # and the agents with specified roles.
+    raw_agents = [(raw_ag, None) for raw_ag in iter_free_agents(query_dict)]
     for role in ['subject', 'object']:
         raw_ag = query_dict.pop(role, None)
         if raw_ag is None:
@@ -377,8 +504,15 @@ def _db_query_from_web_query(query_dict, require=None, empty_web_query=False):
             assert len(raw_ag) == 1, f'Malformed agent for {role}: {raw_ag}'
             raw_ag = raw_ag[0]
         num_agents += 1
-        ag, ns = process_agent(raw_ag)
-        db_query &= HasAgent(ag, namespace=ns, role=role.upper())
+        raw_agents.append((raw_ag, role.upper()))
+
+    # Resolve the agents, grounding any that need it all at once.
+    agents = process_agents([raw_ag for raw_ag, _ in raw_agents])
+    for (ag, ns), (_, role) in zip(agents, raw_agents):
+        if role is None:
+            db_query &= HasAgent(ag, namespace=ns)
+        else:
+            db_query &= HasAgent(ag, namespace=ns, role=role)
 
     # Get the raw name of the statement type (we allow for variation in case).
     act_raw = query_dict.pop('type', None)
@@ -387,6 +521,7 @@ def _db_query_from_web_query(query_dict, require=None, empty_web_query=False):
             assert len(act_raw) == 1, \
                 f"Got multiple entries for statement type: {act_raw}."
             act_raw = act_raw[0]
+        from indra.statements import make_statement_camel
         act = make_statement_camel(act_raw)
         db_query &= HasType([act])
 
@@ -481,6 +616,64 @@ def get_statement_by_hash(query_dict, hash_val):
     return _db_query_from_web_query({'hashes': [hash_val]})
 
 
+@dep_route('/statements/from_hash/<hash_val>/evidence', methods=['GET'])
+@jwt_nontest_optional
+def get_evidence_by_hash(hash_val):
+    """Get a page of evidence for one statement.
+
+    The page size is set by `limit`, and the next page is found by passing
+    the `next_cursor` of a page as `after`. The evidence may be restricted to
+    a comma-separated list of `sources`, and to `paper_ids`, given as a
+    comma-separated list of `<type>:<id>`, for example `pmid:12345`.
+    """
+    query = request.args.copy()
+    user, has = _get_auths(query)
+    try:
+        mk_hash = int(hash_val)
+        limit = min(_pop(query, 'limit', 100, int), MAX_EVIDENCE_PAGE)
+        after = _pop(query, 'after')
+
+        ev_filter = None
+        sources = [src for src in _pop(query, 'sources', '').split(',')
+                   if src]
+        if sources:
+            ev_filter = HasSources(sources).ev_filter()
+        paper_ids = set()
+        for paper_id in _pop(query, 'paper_ids', '').split(','):
+            if not paper_id:
+                continue
+            typ, val = paper_id.split(':', 1)
+            paper_ids.add((typ, int(val) if typ in ['tcid', 'trid'] else val))
+        if paper_ids:
+            paper_filter = FromPapers(paper_ids).ev_filter()
+            ev_filter = paper_filter if ev_filter is None \
+                else ev_filter & paper_filter
+    except Exception as e:
+        abort(Response(f'Problem forming query: {e}', 400))
+        return
+
+    if not has['medscan']:
+        medscan_filter = (~HasOnlySource('medscan')).ev_filter()
+        ev_filter = medscan_filter if ev_filter is None \
+            else ev_filter & medscan_filter
+
+    try:
+        res = get_evidence(mk_hash, ro=get_shared_ro(), limit=limit,
+                           after=after, evidence_filter=ev_filter)
+    except ValueError as e:
+        abort(Response(f'Invalid paging parameters: {e}', 400))
+        return
+
+    ret = res.json()
+    for ev_json in ret['results']:
+        if not has['elsevier'] and get_source(ev_json) == 'elsevier':
+            text = ev_json['text']
+            if len(text) > 200:
+                ev_json['text'] = text[:200] + REDACT_MESSAGE
+    ret['evidence'] = ret.pop('results')
+    return jsonify(ret)
+
+
 @dep_route('/statements/from_papers', methods=['POST'])
 @_query_wrapper
 def get_paper_statements(query_dict):
@@ -494,6 +687,114 @@ def get_paper_statements(query_dict):
     return _db_query_from_web_query({'paper_ids': ids, 'mesh_ids': mesh_ids})
 
 
+def _batch_web_query(sub_query):
+    """Format a JSON sub-query from a batch like a web query dict."""
+    query_dict = {}
+    for key, val in sub_query.items():
+        if key == 'agent':
+            if not isinstance(val, list):
+                val = [val]
+            for i, ag in enumerate(val):
+                query_dict[f'agent{i}'] = ag
+            continue
+        elif key == 'mesh_ids' and isinstance(val, str):
+            val = [m for m in val.split(',') if m]
+        elif isinstance(val, bool):
+            val = str(val).lower()
+        elif isinstance(val, (int, float)):
+            val = str(val)
+        query_dict[key] = val
+    return query_dict
+
+
+@dep_route('/statements/batch', methods=['POST'])
+@jwt_nontest_optional
+def get_statements_batch():
+    """Get statements for many queries at once.
+
+    The body should contain a list of `queries`, each a dict of the same
+    parameters that would be given to `/statements/from_agents` (or `hashes`,
+    `paper_ids`, and `mesh_ids` as for the other statement endpoints),
+    including limits such as `max_stmts` and `ev_limit`. The results are
+    streamed back as one JSON object per line, in the order of the queries.
+    """
+    queries = request.json.get('queries') if request.json else None
+    if not queries or not isinstance(queries, list):
+        abort(Response("No list of queries given!", 400))
+        return
+    if len(queries) > MAX_BATCH_QUERIES:
+        abort(Response("Too many queries given, %d allowed."
+                       % MAX_BATCH_QUERIES, 400))
+        return
+
+    web_query = request.args.copy()
+    fmt = _pop(web_query, 'format', 'json')
+    if fmt not in {'json', 'json-js'}:
+        abort(Response(f"Format {fmt} not supported for batch queries.", 400))
+        return
+    w_english = _pop(web_query, 'with_english', False, bool)
+    w_cur_counts = _pop(web_query, 'with_cur_counts', False, bool)
+    user, has = _get_auths(web_query)
+
+    # All the sub-queries share one session with the readonly database.
+    ro = get_shared_ro()
+
+    # Each sub-query is admitted by its own estimated cost while it runs, so
+    # a long batch does not hold a slot between its sub-queries.
+    def iter_results():
+        answers = {}
+        for idx, sub_query in enumerate(queries):
+            start_time = datetime.now()
+            try:
+                query_dict = _batch_web_query(sub_query)
+                offs = _pop(query_dict, 'offset', type_cast=int)
+                ev_lim = _pop(query_dict, 'ev_limit', 10, int)
+                best_first = _pop(query_dict, 'best_first', True, bool)
+                max_stmts = min(_pop(query_dict, 'max_stmts', MAX_STATEMENTS,
+                                     int),
+                                MAX_STATEMENTS)
+                db_query = _db_query_from_web_query(query_dict,
+                                                    empty_web_query=True)
+            except Exception as e:
+                logger.exception(e)
+                yield json.dumps({'index': idx,
+                                  'error': f'Problem forming query: {e}'}) \
+                    + '\n'
+                continue
+
+            # Identical sub-queries (common when building networks) are only
+            # run once.
+            key = (json.dumps(db_query.to_json(), sort_keys=True), offs,
+                   ev_lim, best_first, max_stmts)
+            if key not in answers:
+                cost = estimate_query_cost(db_query, max_stmts, ev_lim)
+                try:
+                    with ADMISSION.admit(cost):
+                        res_json, stmts_json, source_counts = \
+                            _answer_query(db_query, has, offs, ev_lim,
+                                          max_stmts, best_first, fmt,
+                                          w_english, w_cur_counts, ro=ro)
+                except AdmissionRejected as e:
+                    yield json.dumps({'index': idx, 'error': str(e),
+                                      'retry_after': e.retry_after}) + '\n'
+                    continue
+                except Exception as e:
+                    logger.exception(e)
+                    ro.session.rollback()
+                    yield json.dumps({'index': idx,
+                                      'error': f'Query failed: {e}'}) + '\n'
+                    continue
+                res_json['statements'] = stmts_json
+                res_json['source_counts'] = source_counts
+                answers[key] = json.dumps(res_json)
+            logger.info("Finished batch query %d after %s seconds."
+                        % (idx, sec_since(start_time)))
+            yield '{"index": %d, "result": %s}\n' % (idx, answers[key])
+
+    return Response(stream_with_context(iter_results()),
+                    mimetype='application/x-ndjson')
+
+
 @dep_route('/curation', methods=['GET'])
 def describe_curation():
     return redirect('/statements', code=302)
@@ -559,23 +860,24 @@ def _pop(query, k, default=None, type_cast=None):
 @jwt_nontest_optional
 def get_metadata(level):
     start = datetime.utcnow()
+    profiler = StageProfiler(f'get_metadata_{level}', TIMING_SINK)
     query = request.args.copy()
 
     # Figure out authorization.
-    has = dict.fromkeys(['elsevier', 'medscan'], False)
-    user, roles = resolve_auth(query)
-    for role in roles:
-        for resource in has.keys():
-            has[resource] |= role.permissions.get(resource, False)
-    logger.info('Auths: %s' % str(has))
+    with profiler.stage('auth'):
+        user, has = _get_auths(query)
 
     w_curations = _pop(query, 'with_cur_counts', False)
+    fmt = _pop(query, 'format', 'json')
 
-    kwargs = dict(limit=_pop(query, 'limit', type_cast=int),
+    kwargs = dict(ro=get_shared_ro(),
+                  limit=_pop(query, 'limit', type_cast=int),
                   offset=_pop(query, 'offset', type_cast=int),
-                  best_first=_pop(query, 'best_first', True))
+                  best_first=_pop(query, 'best_first', True),
+                  after=_pop(query, 'after'))
     try:
-        db_query = _db_query_from_web_query(query, {'HasAgent'}, True)
+        with profiler.stage('query_build'):
+            db_query = _db_query_from_web_query(query, {'HasAgent'}, True)
     except Exception as e:
         abort(Response(f'Problem forming query: {e}', 400))
         return
@@ -583,19 +885,33 @@ def get_metadata(level):
     if not has['medscan']:
         db_query -= HasOnlySource('medscan')
 
-    if level == 'hashes':
-        res = db_query.get_interactions(**kwargs)
-    elif level == 'relations':
-        res = db_query.get_relations(with_hashes=w_curations, **kwargs)
-    elif level == 'agents':
-        res = db_query.get_agents(with_hashes=w_curations, **kwargs)
-    else:
+    if level not in {'hashes', 'relations', 'agents'}:
         abort(Response(f'Invalid level: {level}'))
         return
 
+    cost = estimate_query_cost(db_query, kwargs['limit'], 0)
+    try:
+        with ADMISSION.admit(cost), profiler.stage('metadata_sql'):
+            if level == 'hashes':
+                res = db_query.get_interactions(**kwargs)
+            elif level == 'relations':
+                res = db_query.get_relations(with_hashes=w_curations,
+                                             **kwargs)
+            else:
+                res = db_query.get_agents(with_hashes=w_curations, **kwargs)
+    except AdmissionRejected as e:
+        _reject_busy(e)
+        return
+    except ValueError as e:
+        abort(Response(f'Invalid paging parameters: {e}', 400))
+        return
+
     dt = (datetime.utcnow() - start).total_seconds()
     logger.info("Got %s results after %.2f." % (len(res.results), dt))
 
+    render_start = datetime.utcnow()
+    if level != 'agents':
+        from indra.assemblers.english import EnglishAssembler
     ret = res.json()
     res_list = []
     for key, entry in ret.pop('results').items():
@@ -626,6 +942,7 @@ def get_metadata(level):
         entry['english'] = eng
 
         res_list.append(entry)
+    profiler.add('render', (datetime.utcnow() - render_start).total_seconds())
 
     # Look up curations, if result with_curations was set.
     if w_curations:
@@ -636,12 +953,13 @@ def get_metadata(level):
                 rel_hash_lookup[rel['hash']] = rel
         else:
             for rel in res_list:
+                rel['cur_count'] = 0
                 for h in rel['hashes']:
-                    rel['cur_count'] = 0
                     rel_hash_lookup[h] = rel
-        curations = get_curations(pa_hash=set(rel_hash_lookup.keys()))
-        for cur in curations:
-            rel_hash_lookup[cur.pa_hash]['cur_count'] += 1
+        with profiler.stage('cur_counts'):
+            cur_counts = get_curation_counts(rel_hash_lookup.keys())
+        for h, src_counts in cur_counts.items():
+            rel_hash_lookup[h]['cur_count'] += sum(src_counts.values())
 
     # Finish up the query.
     dt = (datetime.utcnow() - start).total_seconds()
@@ -649,12 +967,43 @@ def get_metadata(level):
                 % (len(res_list), dt))
 
     ret['relations'] = res_list
-    resp = Response(json.dumps(ret), mimetype='application/json')
+    with profiler.stage('serialization'):
+        content, mimetype = _serialize(ret, fmt)
+        resp = Response(content, mimetype=mimetype)
+    profiler.finish(resp)
 
     dt = (datetime.utcnow() - start).total_seconds()
     logger.info("Result prepared after %.2f seconds." % dt)
     return resp
 
 
+def warm_up():
+    """Do the slow parts of the first request before any traffic arrives.
+
+    This loads the templates, and the English assembler by assembling a
+    small statement. It then opens a connection to the readonly database,
+    reflecting the columns of the source tables and running a small query.
+    It is run at import if INDRA_DB_API_WARM_UP is set to 1, and may
+    otherwise be called by the deployment's own start-up hook.
+    """
+    start = datetime.now()
+    get_jinja_env()
+    from indra.statements import Agent, Activation
+    from indra.assemblers.english import EnglishAssembler
+    stmt = Activation(Agent('MAP2K1'), Agent('MAPK1'))
+    EnglishAssembler([stmt]).make_model()
+
+    ro = get_shared_ro()
+    for tbl in [ro.PaStmtSrc, ro.SourceMeta]:
+        logger.debug("Loaded columns for %s." % tbl.__tablename__)
+    HasAgent('TP53').get_hashes(ro, limit=1)
+    logger.info("Warmed up after %s seconds." % sec_since(start))
+    return
+
+
+if environ.get('INDRA_DB_API_WARM_UP') == '1':
+    warm_up()
+
+
 if __name__ == '__main__':
     app.run()
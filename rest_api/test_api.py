@@ -13,7 +13,8 @@ from indra import get_config
 from indra.statements import stmts_from_json
 from indra.databases import hgnc_client
 
-from .api import app, MAX_STATEMENTS, get_source, REDACT_MESSAGE
+from .api import app, MAX_STATEMENTS, get_source, REDACT_MESSAGE, warm_up, \
+    get_shared_ro
 
 
 HERE = path.dirname(path.abspath(__file__))
@@ -80,7 +81,7 @@ class DbApiTestCase(unittest.TestCase):
         t_delta = datetime.now() - start_time
         dt = t_delta.seconds + t_delta.microseconds/1e6
         print(dt)
-        size = int(resp.headers['Content-Length'])
+        size = int(resp.headers.get('Content-Length', len(resp.data)))
         raw_size = sys.getsizeof(resp.data)
         print("Raw size: {raw:f}/{lim:f}, Compressed size: {comp:f}/{lim:f}."
               .format(raw=raw_size/1e6, lim=SIZELIMIT/1e6, comp=size/1e6))
@@ -147,6 +148,18 @@ class DbApiTestCase(unittest.TestCase):
                             if s1.matches(s2)]))
         return
 
+    def test_warm_up(self):
+        warm_up()
+        ro = get_shared_ro()
+        assert ro.PaStmtSrc.loaded and ro.SourceMeta.loaded
+        assert ro is get_shared_ro(), "The readonly manager was not shared."
+
+        # Requests after the warm up use the same manager.
+        resp = self.app.get('/statements/from_agents?subject=MAP2K1'
+                            '&object=MAPK1')
+        assert resp.status_code == 200, resp
+        assert ro is get_shared_ro()
+
     def test_blank_response(self):
         """Test the response to an empty request."""
         resp, dt, size = self.__time_get_query('statements/from_agents', '')
@@ -378,6 +391,40 @@ class DbApiTestCase(unittest.TestCase):
         self.__check_time(dt, time_goal=1)
         return
 
+    def test_msgpack_format(self):
+        import msgpack
+        url = 'statements/from_hash/25011516823924690'
+        resp, dt, size = self.__time_query('get', url, 'format=msgpack')
+        assert resp.status_code == 200, \
+            '%s: %s' % (resp.status_code, resp.data.decode())
+        assert resp.mimetype == 'application/x-msgpack', resp.mimetype
+        resp_dict = msgpack.unpackb(resp.data, raw=False,
+                                    strict_map_key=False)
+        assert list(resp_dict['statements'].keys()) == [25011516823924690]
+        self.__check_stmts(resp_dict['statements'].values())
+        return
+
+    def test_evidence_paging(self):
+        url = 'statements/from_hash/-29396420431585282/evidence'
+        resp, dt, size = self.__time_query('get', url, 'limit=5')
+        assert resp.status_code == 200, \
+            '%s: %s' % (resp.status_code, resp.data.decode())
+        first = json.loads(resp.data)
+        assert len(first['evidence']) == 5, len(first['evidence'])
+        assert first['next_cursor'] is not None
+        self.__check_time(dt, time_goal=1)
+
+        resp, dt, size = self.__time_query(
+            'get', url, 'limit=5&after=%s' % first['next_cursor']
+        )
+        assert resp.status_code == 200, \
+            '%s: %s' % (resp.status_code, resp.data.decode())
+        second = json.loads(resp.data)
+        first_hashes = {ev['source_hash'] for ev in first['evidence']}
+        assert not any(ev['source_hash'] in first_hashes
+                       for ev in second['evidence'])
+        return
+
     def __test_basic_paper_query(self, id_val, id_type, min_num_results=1):
         id_list = [{'id': id_val, 'type': id_type}]
         resp, dt, size = self.__time_query('post',
@@ -476,10 +523,220 @@ class DbApiTestCase(unittest.TestCase):
         self.__time_query('post', 'curation/submit/12345?test', tag='test',
                           curator='tester', text='This is text.')
 
+    def test_batch_query(self):
+        queries = [{'agent': ['MEK@FPLX', 'ERK@FPLX'], 'max_stmts': 5},
+                   {'subject': 'MAP2K1', 'object': 'MAPK1',
+                    'type': 'Phosphorylation', 'ev_limit': 2},
+                   {'agent': 'MEK@FPLX', 'bogus': 'value'}]
+        resp, dt, size = self.__time_query('post', 'statements/batch',
+                                           queries=queries)
+        assert resp.status_code == 200, \
+            '%s: %s' % (resp.status_code, resp.data.decode())
+        lines = [json.loads(line) for line in resp.data.splitlines()]
+        assert [line['index'] for line in lines] == [0, 1, 2], lines
+        assert len(lines[0]['result']['statements']) <= 5
+        for stmt_json in lines[1]['result']['statements'].values():
+            assert len(stmt_json['evidence']) <= 2
+        assert 'error' in lines[2]
+        self.__check_time(dt, time_goal=10)
+
     def test_interaction_query(self):
         self.__time_query('get', 'metadata/relations/from_agents',
                           'agent0=mek%40AUTO&limit=50&with_cur_counts=true')
 
 
+class StubS3(object):
+    """A stand-in for an S3 client, serving JSON files from a dict."""
+    def __init__(self, files):
+        self.files = files
+        self.calls = []
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None):
+        from io import BytesIO
+        from botocore.exceptions import ClientError
+        self.calls.append(('get_object', Key, IfNoneMatch))
+        if Key not in self.files:
+            raise ClientError({'Error': {'Code': 'NoSuchKey'}}, 'GetObject')
+        etag, data = self.files[Key]
+        if IfNoneMatch == etag:
+            raise ClientError({'Error': {'Code': '304'}}, 'GetObject')
+        return {'ETag': '"%s"' % etag,
+                'Body': BytesIO(json.dumps(data).encode('utf-8'))}
+
+    def list_objects_v2(self, Bucket, Prefix, Delimiter):
+        self.calls.append(('list_objects_v2', Prefix, None))
+        return {'Contents': [{'Key': k} for k in sorted(self.files)
+                             if k.startswith(Prefix)]}
+
+
+class S3JsonCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        from indra_db.util.data_gatherer import S3_DATA_LOC
+        from .util import S3JsonCache
+        self.prefix = S3_DATA_LOC['prefix']
+        self.s3 = StubS3({self.prefix + 'reading.json': ('abc', {'n': 1}),
+                          self.prefix + 'runtimes.json': ('rt', {})})
+        self.cache = S3JsonCache(max_age=60, s3=self.s3)
+
+    def test_etag_reuse(self):
+        key = self.prefix + 'reading.json'
+        etag, data, body = self.cache.get('bigmech', key)
+        assert etag == 'abc' and data == {'n': 1}
+        assert json.loads(body) == data
+
+        # Within max_age, the file is served without asking S3.
+        assert self.cache.get('bigmech', key)[0] == 'abc'
+        assert len(self.s3.calls) == 1
+
+    def test_not_modified(self):
+        key = self.prefix + 'reading.json'
+        self.cache.max_age = 0
+        _, data, body = self.cache.get('bigmech', key)
+
+        # Once stale, the file is checked with its ETag, and kept as it is.
+        etag, data2, body2 = self.cache.get('bigmech', key)
+        assert self.s3.calls[-1] == ('get_object', key, 'abc')
+        assert etag == 'abc' and data2 is data and body2 is body
+
+        # A changed file is downloaded again.
+        self.s3.files[key] = ('def', {'n': 2})
+        etag, data3, _ = self.cache.get('bigmech', key)
+        assert etag == 'def' and data3 == {'n': 2}
+
+    def test_if_none_match_response(self):
+        from . import api
+        orig_cache = api.MONITOR_CACHE
+        api.MONITOR_CACHE = self.cache
+        try:
+            client = app.test_client()
+            resp = client.get('/monitor/data/reading')
+            assert resp.status_code == 200, resp.status_code
+            assert resp.headers['ETag'] == '"abc"'
+            assert json.loads(resp.data) == {'n': 1}
+
+            resp = client.get('/monitor/data/reading',
+                              headers={'If-None-Match': '"abc"'})
+            assert resp.status_code == 304, resp.status_code
+
+            # Unknown stages are not looked up on S3.
+            n_calls = len(self.s3.calls)
+            resp = client.get('/monitor/data/nonsense')
+            assert resp.status_code == 404, resp.status_code
+            assert not any(call[1].endswith('nonsense.json')
+                           for call in self.s3.calls[n_calls:])
+        finally:
+            api.MONITOR_CACHE = orig_cache
+
+
+class FakeResponse(object):
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+def _fake_match(db, db_id, score=1.0):
+    return {'term': {'db': db, 'id': db_id}, 'score': score}
+
+
+class GildaGroundingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        from unittest import mock
+        from . import util as api_util
+        self.util = api_util
+        self.cache = api_util.TTLCache(max_size=10, ttl=60)
+        self.patches = [mock.patch.object(api_util, 'GROUNDING_CACHE',
+                                          self.cache),
+                        mock.patch.object(api_util, 'GILDA_MODE', 'web')]
+        for patch in self.patches:
+            patch.start()
+
+        # Stand in for the gilda web service.
+        self.posts = []
+        groundings = {'MEK': [_fake_match('FPLX', 'MEK')],
+                      'ERK': [_fake_match('FPLX', 'ERK')],
+                      'nonsense': []}
+
+        def post(url, json):
+            self.posts.append((url, json))
+            if url.endswith('/ground_multi'):
+                return FakeResponse([groundings[q['text']] for q in json])
+            return FakeResponse(groundings[json['text']])
+
+        fake_requests = mock.Mock()
+        fake_requests.post = post
+        self.patches.append(mock.patch.dict('sys.modules',
+                                            {'requests': fake_requests}))
+        self.patches[-1].start()
+
+    def tearDown(self):
+        for patch in reversed(self.patches):
+            patch.stop()
+
+    def test_batch_in_one_call(self):
+        res = self.util.process_agents(['MEK@AUTO', 'ERK@AUTO',
+                                        'MAPK1@HGNC', 'TP53'])
+        assert res == [('MEK', 'FPLX'), ('ERK', 'FPLX'), ('MAPK1', 'HGNC'),
+                       ('TP53', 'NAME')], res
+        assert len(self.posts) == 1, self.posts
+        url, body = self.posts[0]
+        assert url.endswith('/ground_multi')
+        assert {q['text'] for q in body} == {'MEK', 'ERK'}
+
+    def test_cache_hits(self):
+        self.util.process_agents(['MEK@AUTO', 'ERK@AUTO'])
+        self.util.process_agents(['MEK@AUTO', 'ERK@AUTO'])
+        assert len(self.posts) == 1, self.posts
+        assert self.cache.hits == 2
+
+        # Only the new text is sent, on its own.
+        self.util.gilda_ground_many(['MEK', 'nonsense'])
+        assert len(self.posts) == 2, self.posts
+        assert self.posts[-1][0].endswith('/ground')
+        assert self.posts[-1][1] == {'text': 'nonsense'}
+
+    def test_cache_expiry(self):
+        from unittest import mock
+        with mock.patch.object(self.util, 'perf_counter', return_value=0):
+            self.util.gilda_ground('MEK')
+        with mock.patch.object(self.util, 'perf_counter', return_value=30):
+            self.util.gilda_ground('MEK')
+        assert len(self.posts) == 1, self.posts
+        with mock.patch.object(self.util, 'perf_counter', return_value=61):
+            self.util.gilda_ground('MEK')
+        assert len(self.posts) == 2, self.posts
+
+    def test_cache_size(self):
+        self.cache.max_size = 1
+        self.util.gilda_ground_many(['MEK', 'ERK'])
+        assert self.cache.get('MEK') is None
+        assert self.cache.get('ERK') is not None
+
+    def test_local_mode(self):
+        from unittest import mock
+        match = mock.Mock()
+        match.to_json.return_value = _fake_match('HGNC', '6871')
+        fake_gilda = mock.Mock()
+        fake_gilda.ground.return_value = [match]
+        with mock.patch.object(self.util, 'GILDA_MODE', 'local'), \
+                mock.patch.dict('sys.modules', {'gilda': fake_gilda}):
+            res = self.util.process_agents(['MAPK1@AUTO'])
+        assert res == [('6871', 'HGNC')], res
+        assert not self.posts
+
+    def test_no_grounding(self):
+        from .util import DbAPIError
+        with self.assertRaises(DbAPIError):
+            self.util.process_agents(['MEK@AUTO', 'nonsense@AUTO'])
+        with self.assertRaises(DbAPIError):
+            self.util._apply_grounding('nonsense', [])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,12 @@
+import json
 import logging
 from io import StringIO
+from os import environ
+from time import perf_counter
 from datetime import datetime
+from threading import Lock, BoundedSemaphore
+from contextlib import contextmanager
+from collections import OrderedDict
 
 logger = logging.getLogger('db rest api - util')
 
@@ -9,6 +15,15 @@ class DbAPIError(Exception):
     pass
 
 
+class AdmissionRejected(DbAPIError):
+    def __init__(self, pool_name, retry_after):
+        self.pool_name = pool_name
+        self.retry_after = retry_after
+        msg = ("Too many %s queries are running; retry after %d seconds."
+               % (pool_name, retry_after))
+        super(AdmissionRejected, self).__init__(msg)
+
+
 def get_s3_client():
     import boto3
     from botocore import config
@@ -20,9 +35,8 @@ def get_s3_client():
 # ==============================================
 
 
-def process_agent(agent_param):
-    """Get the agent id and namespace from an input param."""
-
+def _parse_agent_param(agent_param):
+    """Split an input param into the agent id and namespace."""
     if not agent_param.endswith('@TEXT'):
         param_parts = agent_param.split('@')
         if len(param_parts) == 2:
@@ -40,24 +54,147 @@ def process_agent(agent_param):
         ns = 'NAME'
 
     logger.info("Resolved %s to ag=%s, ns=%s" % (agent_param, ag, ns))
-    if ns == 'AUTO':
-        res = gilda_ground(ag)
-        ns = res[0]['term']['db']
-        ag = res[0]['term']['id']
-        logger.info("Auto-mapped grounding with gilda to ag=%s, ns=%s with "
-                    "score=%s out of %d options"
-                    % (ag, ns, res[0]['score'], len(res)))
+    return ag, ns
+
+
+def _apply_grounding(ag, res):
+    """Get the agent id and namespace from the top gilda grounding."""
+    if not res:
+        raise DbAPIError('Could not ground agent: \"%s\"' % ag)
+    ns = res[0]['term']['db']
+    gr_ag = res[0]['term']['id']
+    logger.info("Auto-mapped grounding with gilda to ag=%s, ns=%s with "
+                "score=%s out of %d options"
+                % (gr_ag, ns, res[0]['score'], len(res)))
+    return gr_ag, ns
+
 
+def process_agent(agent_param):
+    """Get the agent id and namespace from an input param."""
+    ag, ns = _parse_agent_param(agent_param)
+    if ns == 'AUTO':
+        ag, ns = _apply_grounding(ag, gilda_ground(ag))
     return ag, ns
 
 
-def gilda_ground(agent_text):
+def process_agents(agent_params):
+    """Get the agent ids and namespaces for a list of input params.
+
+    Any agents that need to be grounded are grounded together, in a single
+    batch.
+    """
+    parsed = [_parse_agent_param(param) for param in agent_params]
+    to_ground = {ag for ag, ns in parsed if ns == 'AUTO'}
+    if not to_ground:
+        return parsed
+    groundings = gilda_ground_many(to_ground)
+    return [_apply_grounding(ag, groundings[ag]) if ns == 'AUTO' else (ag, ns)
+            for ag, ns in parsed]
+
+
+class TTLCache(object):
+    """A thread-safe, least-recently-used cache whose entries expire.
+
+    Parameters
+    ----------
+    max_size : int
+        The most entries to keep. When full, the least recently used entry is
+        dropped.
+    ttl : float
+        The number of seconds an entry remains valid.
+    """
+    def __init__(self, max_size=1024, ttl=3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Get a value from the cache, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or perf_counter() - entry[1] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """Add a value to the cache."""
+        with self._lock:
+            self._entries[key] = (value, perf_counter())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        with self._lock:
+            self._entries.clear()
+
+
+GILDA_URL = environ.get('GILDA_URL', 'http://grounding.indra.bio')
+GILDA_MODE = environ.get('INDRA_DB_GILDA_MODE', 'web')
+GROUNDING_CACHE = TTLCache(
+    max_size=int(environ.get('INDRA_DB_GILDA_CACHE_SIZE', 4096)),
+    ttl=float(environ.get('INDRA_DB_GILDA_CACHE_TTL', 24*3600))
+)
+
+
+def _gilda_ground_uncached(agent_texts):
+    """Ground a list of texts with gilda, in process or via the web service.
+
+    Gilda is run in process if the INDRA_DB_GILDA_MODE environment variable
+    is "local", otherwise the web service at GILDA_URL is used.
+    """
+    if GILDA_MODE == 'local':
+        import gilda
+        return [[match.to_json() for match in gilda.ground(text)]
+                for text in agent_texts]
+
     import requests
-    res = requests.post('http://grounding.indra.bio/ground',
-                        json={'text': agent_text})
+    if len(agent_texts) == 1:
+        res = requests.post(f'{GILDA_URL}/ground',
+                            json={'text': agent_texts[0]})
+        res.raise_for_status()
+        return [res.json()]
+    res = requests.post(f'{GILDA_URL}/ground_multi',
+                        json=[{'text': text} for text in agent_texts])
+    res.raise_for_status()
     return res.json()
 
 
+def gilda_ground_many(agent_texts):
+    """Ground several texts with gilda, returning a dict keyed by text.
+
+    Previously grounded texts are taken from the cache, and the rest are
+    grounded together.
+    """
+    groundings = {}
+    missing = []
+    for text in agent_texts:
+        res = GROUNDING_CACHE.get(text)
+        if res is None:
+            missing.append(text)
+        else:
+            groundings[text] = res
+
+    if missing:
+        for text, res in zip(missing, _gilda_ground_uncached(missing)):
+            GROUNDING_CACHE.put(text, res)
+            groundings[text] = res
+    return groundings
+
+
+def gilda_ground(agent_text):
+    return gilda_ground_many([agent_text])[agent_text]
+
+
 def get_source(ev_json):
     notes = ev_json.get('annotations')
     if notes is None:
@@ -101,3 +238,276 @@ class LogTracker(object):
                 ret[level] = 0
             ret[level] += 1
         return ret
+
+
+class StageProfiler(object):
+    """Record the time spent in each stage of handling a request.
+
+    Parameters
+    ----------
+    endpoint : str
+        The name of the endpoint being profiled, used to label the metrics.
+    sink : Optional[LocalHistogramSink]
+        If given, the stage timings are recorded in this sink when the profile
+        is finished.
+    """
+    def __init__(self, endpoint, sink=None):
+        self.endpoint = endpoint
+        self.sink = sink
+        self.stages = OrderedDict()
+
+    @contextmanager
+    def stage(self, name):
+        """Time the code run within this context as the given stage."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, perf_counter() - start)
+
+    def add(self, name, seconds):
+        """Add a number of seconds to the given stage."""
+        self.stages[name] = self.stages.get(name, 0) + seconds
+
+    def server_timing(self):
+        """Get the value of a Server-Timing header for the stages."""
+        return ', '.join('%s;dur=%.1f' % (name, secs*1000)
+                         for name, secs in self.stages.items())
+
+    def finish(self, resp=None):
+        """Send the timings to the sink, and add the header to a response."""
+        if self.sink is not None:
+            for name, secs in self.stages.items():
+                self.sink.record(self.endpoint, name, secs)
+        if resp is not None and self.stages:
+            resp.headers['Server-Timing'] = self.server_timing()
+        return resp
+
+
+class LocalHistogramSink(object):
+    """Accumulate histograms of stage timings in memory.
+
+    Parameters
+    ----------
+    buckets : Optional[list[float]]
+        The upper bounds, in seconds, of the histogram buckets. A final bucket
+        with no upper bound is always included.
+    """
+    default_buckets = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5,
+                       10, 30]
+
+    def __init__(self, buckets=None):
+        self.buckets = sorted(buckets or self.default_buckets)
+        self._hists = {}
+        self._lock = Lock()
+
+    def record(self, endpoint, stage, seconds):
+        """Record a single observation of a stage's duration."""
+        with self._lock:
+            key = (endpoint, stage)
+            if key not in self._hists:
+                self._hists[key] = {'counts': [0]*(len(self.buckets) + 1),
+                                    'count': 0, 'sum': 0.0}
+            hist = self._hists[key]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    break
+            else:
+                i = len(self.buckets)
+            hist['counts'][i] += 1
+            hist['count'] += 1
+            hist['sum'] += seconds
+
+    def summary(self):
+        """Get a JSON-able summary of the histograms."""
+        labels = [str(b) for b in self.buckets] + ['+Inf']
+        ret = {}
+        with self._lock:
+            for (endpoint, stage), hist in self._hists.items():
+                ret.setdefault(endpoint, {})[stage] = {
+                    'buckets': dict(zip(labels, hist['counts'])),
+                    'count': hist['count'],
+                    'mean': hist['sum']/hist['count'],
+                }
+        return ret
+
+
+# Relative costs of the component queries, roughly proportional to the number
+# of rows each must scan to produce hashes.
+COMPONENT_COSTS = {'HasAgent': 1, 'HasHash': 1, 'HasType': 1,
+                   'HasNumAgents': 1, 'HasNumEvidence': 1, 'FromPapers': 2,
+                   'FromMeshId': 3, 'Intersection': 2, 'Union': 2}
+
+
+def estimate_query_cost(db_query, num_stmts, ev_limit):
+    """Estimate the cost of a query from its query tree and its limits.
+
+    Parameters
+    ----------
+    db_query : QueryCore
+        The query to be run.
+    num_stmts : int or None
+        The maximum number of statements (or metadata entries) that will be
+        returned. None means no limit.
+    ev_limit : int or None
+        The maximum number of evidence per statement. None means all
+        evidence; 0 means none.
+
+    Returns
+    -------
+    cost : float
+        A unitless estimate of the amount of work the database will do.
+    """
+    weight = sum(COMPONENT_COSTS.get(name, 1)
+                 for name in db_query.get_component_queries())
+
+    # Hash queries can return no more statements than hashes were given.
+    stmt_hashes = getattr(db_query, 'stmt_hashes', None)
+    if stmt_hashes is not None and not db_query._inverted:
+        num_stmts = len(stmt_hashes) if num_stmts is None \
+            else min(num_stmts, len(stmt_hashes))
+    if num_stmts is None:
+        num_stmts = 10000
+
+    if ev_limit is None:
+        ev_limit = 1000
+    return weight * num_stmts * max(ev_limit, 1)
+
+
+class AdmissionController(object):
+    """Limit how many light and heavy queries may run at once.
+
+    Queries are sorted by their estimated cost into a "light" or a "heavy"
+    pool, each with its own number of slots, so that a few expensive queries
+    cannot starve short interactive ones. A query waits up to the pool's
+    `max_wait` seconds for a slot, after which it is rejected. Note that the
+    limits are per process.
+
+    Parameters
+    ----------
+    light_slots : int
+        The number of light queries that may run at once.
+    heavy_slots : int
+        The number of heavy queries that may run at once.
+    heavy_cost : float
+        Queries with an estimated cost above this are heavy.
+    light_wait : float
+        Seconds a light query will wait for a slot.
+    heavy_wait : float
+        Seconds a heavy query will wait for a slot.
+    """
+    def __init__(self, light_slots=16, heavy_slots=2, heavy_cost=1e6,
+                 light_wait=2, heavy_wait=10):
+        self.heavy_cost = heavy_cost
+        self._pools = {'light': (BoundedSemaphore(light_slots), light_wait),
+                       'heavy': (BoundedSemaphore(heavy_slots), heavy_wait)}
+
+    def get_pool_name(self, cost):
+        """Get the name of the pool a query of the given cost belongs in."""
+        return 'heavy' if cost > self.heavy_cost else 'light'
+
+    def acquire(self, cost):
+        """Wait for a slot for a query, returning the name of its pool.
+
+        If no slot becomes available in time, AdmissionRejected is raised.
+        """
+        pool_name = self.get_pool_name(cost)
+        sem, max_wait = self._pools[pool_name]
+        if not sem.acquire(timeout=max_wait):
+            logger.warning("Rejecting %s query with cost %s."
+                           % (pool_name, cost))
+            raise AdmissionRejected(pool_name, max(int(max_wait), 1))
+        return pool_name
+
+    def release(self, pool_name):
+        """Give back a slot taken with `acquire`."""
+        self._pools[pool_name][0].release()
+
+    @contextmanager
+    def admit(self, cost):
+        """Hold a slot for a query for the duration of the context."""
+        pool_name = self.acquire(cost)
+        try:
+            yield pool_name
+        finally:
+            self.release(pool_name)
+
+
+class S3JsonCache(object):
+    """Hold JSON files from S3 in memory, refreshing them conditionally.
+
+    Each file is checked against S3 at most once every `max_age` seconds, and
+    then only downloaded again if its ETag has changed. Files are kept both
+    parsed and serialized, so they can be served without being re-encoded.
+    Each file and listing has its own lock, so a slow request to S3 only
+    holds up other requests for the same file.
+
+    Parameters
+    ----------
+    max_age : float
+        The number of seconds after which a file or listing is checked again.
+    s3 : boto3.client
+        (optional) An S3 client. By default one is made on first use.
+    """
+    def __init__(self, max_age=60, s3=None):
+        self.max_age = max_age
+        self._s3 = s3
+        self._files = {}
+        self._listings = {}
+        self._key_locks = {}
+        self._lock = Lock()
+
+    def _get_s3(self):
+        with self._lock:
+            if self._s3 is None:
+                self._s3 = get_s3_client()
+            return self._s3
+
+    def _get_key_lock(self, *key):
+        with self._lock:
+            return self._key_locks.setdefault(key, Lock())
+
+    def get(self, bucket, key):
+        """Get the (etag, parsed JSON, serialized JSON) for a file on S3."""
+        from botocore.exceptions import ClientError
+
+        with self._get_key_lock('file', bucket, key):
+            entry = self._files.get((bucket, key))
+            if entry is not None \
+                    and perf_counter() - entry['checked'] < self.max_age:
+                return entry['etag'], entry['json'], entry['body']
+
+            kwargs = {'Bucket': bucket, 'Key': key}
+            if entry is not None:
+                kwargs['IfNoneMatch'] = entry['etag']
+            try:
+                res = self._get_s3().get_object(**kwargs)
+            except ClientError as e:
+                if entry is None \
+                        or e.response['Error']['Code'] not in {'304',
+                                                               'NotModified'}:
+                    raise
+                logger.debug("%s/%s has not changed." % (bucket, key))
+                entry['checked'] = perf_counter()
+                return entry['etag'], entry['json'], entry['body']
+
+            body = res['Body'].read()
+            entry = {'etag': res['ETag'].strip('"'), 'json': json.loads(body),
+                     'body': body, 'checked': perf_counter()}
+            self._files[(bucket, key)] = entry
+            return entry['etag'], entry['json'], entry['body']
+
+    def list_keys(self, bucket, prefix):
+        """Get the keys of the files directly under a prefix on S3."""
+        with self._get_key_lock('listing', bucket, prefix):
+            entry = self._listings.get((bucket, prefix))
+            if entry is not None \
+                    and perf_counter() - entry['checked'] < self.max_age:
+                return entry['keys']
+
+            res = self._get_s3().list_objects_v2(Bucket=bucket, Prefix=prefix,
+                                                 Delimiter='/')
+            keys = [e['Key'] for e in res.get('Contents', [])]
+            self._listings[(bucket, prefix)] = {'keys': keys,
+                                                'checked': perf_counter()}
+            return keys